@@ -42,6 +42,7 @@ from skytemple.core.module_controller import AbstractController
 from skytemple.core.rom_project import RomProject
 from skytemple.core.settings import SkyTempleSettingsStore
 from skytemple.core.ssb_debugger.manager import DebuggerManager
+from skytemple.core.surface_cache import ScaledSurfaceCache
 from skytemple_files.common.impl_cfg import ImplementationType, get_implementation_type
 from skytemple_files.common.project_file_manager import ProjectFileManager
 from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
@@ -396,6 +397,7 @@ class MainController:
                 return
 
             self.load_view(self._item_store, root_node._self, self._main_item_list)
+            project.prefetch_module_files()
 
             if self._loading_dialog is not None:
                 self._loading_dialog.hide()
@@ -457,6 +459,11 @@ class MainController:
     ):
         logger.debug("View selected. Locking and showing Loader.")
         path = model.get_path(treeiter)
+        project = RomProject.get_current()
+        if project is not None:
+            # Sprites of the old view may be evicted from now on.
+            project.get_sprite_provider().release_pins()
+            ScaledSurfaceCache.instance().release_pins()
         self._lock_trees()
         selected_node = model[treeiter]
         self._init_window_before_view_load(model[treeiter])
@@ -17,14 +17,16 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TypedDict, TYPE_CHECKING, Any
+from typing import TypedDict, TYPE_CHECKING, Any, Generic, overload
 
 from skytemple.core.item_tree import ItemTree, ItemTreeEntryRef
 from skytemple.core.open_request import OpenRequest
+from skytemple_files.common.types.data_handler import DataHandler, T
 from skytemple_files.common.util import Captured
 
 
 if TYPE_CHECKING:
+    from skytemple.core.model_context import ModelContext
     from skytemple.core.module_controller import AbstractController
     from skytemple.core.rom_project import RomProject
     from gi.repository import Gtk
@@ -35,6 +37,69 @@ class DebuggingInfo(TypedDict, total=False):
     additional: Captured | None
 
 
+class _LazyFileBase(Generic[T]):
+    _threadsafe = False
+
+    def __init__(
+        self, file_path_in_rom: str, file_handler_class: type[DataHandler[T]], *, prefetch: bool = True, **kwargs
+    ):
+        self.file_path_in_rom = file_path_in_rom
+        self.file_handler_class = file_handler_class
+        self.prefetch = prefetch
+        self.kwargs = kwargs
+        self.name = ""
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def _open(self, instance: AbstractModule):
+        model = instance.project.open_file_in_rom(  # type: ignore
+            self.file_path_in_rom, self.file_handler_class, self._threadsafe, **self.kwargs
+        )
+        # Shadow the descriptor, further lookups don't go through the project.
+        instance.__dict__[self.name] = model
+        return model
+
+
+class LazyFile(_LazyFileBase[T]):
+    """
+    A file of the ROM, declared as a class attribute of a module. The file is opened with
+    ``RomProject.open_file_in_rom`` (on the ``project`` of the module) when the attribute is first accessed.
+    Keyword arguments are passed to the handler.
+
+    If ``prefetch`` is set, the file is opened in the background after the item tree is shown.
+    See ``AbstractModule.prefetch_hints``.
+    """
+
+    @overload
+    def __get__(self, instance: None, owner: type | None = None) -> LazyFile[T]: ...
+
+    @overload
+    def __get__(self, instance: AbstractModule, owner: type | None = None) -> T: ...
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return self._open(instance)
+
+
+class LazyFileContext(_LazyFileBase[T]):
+    """Like ``LazyFile``, but the file is opened threadsafe and a ``ModelContext`` is returned."""
+
+    _threadsafe = True
+
+    @overload
+    def __get__(self, instance: None, owner: type | None = None) -> LazyFileContext[T]: ...
+
+    @overload
+    def __get__(self, instance: AbstractModule, owner: type | None = None) -> ModelContext[T]: ...
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return self._open(instance)
+
+
 class AbstractModule(ABC):
     """
     A SkyTemple module.
@@ -72,6 +137,19 @@ class AbstractModule(ABC):
         """
         pass
 
+    def prefetch_hints(self) -> list[str]:
+        """
+        Names of attributes of this module to access in the background after the item tree is shown,
+        so that the files behind them are already opened when a view needs them.
+        By default, these are all ``LazyFile`` and ``LazyFileContext`` attributes declared with ``prefetch``.
+        """
+        hints = []
+        for cls in type(self).__mro__:
+            for name, attr in vars(cls).items():
+                if isinstance(attr, _LazyFileBase) and attr.prefetch and name not in hints:
+                    hints.append(name)
+        return hints
+
     def collect_debugging_info(self, open_view: AbstractController | Gtk.Widget) -> DebuggingInfo | None:
         """
         Return debugging information for the currently opened controller or view widget (passed in).
@@ -16,8 +16,10 @@
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 import asyncio
 import sys
+import threading
 from asyncio import AbstractEventLoop
-from collections.abc import Coroutine
+from collections.abc import Callable, Coroutine
+from typing import Any
 from enum import Enum, auto
 
 from gi.repository import GLib, Gio
@@ -25,6 +27,7 @@ from skytemple_files.common.i18n_util import _
 from skytemple_files.common.task_runner import AsyncTaskRunner
 
 from skytemple.core.async_tasks.now import Now
+from skytemple.core.async_tasks.worker_pool import TaskHandle, TaskPriority, WorkerPool
 
 
 class AsyncEventLoopType(Enum):
@@ -44,6 +47,8 @@ class AsyncTaskRunnerType(Enum):
     EVENT_LOOP_BLOCKING_SOON = auto()
     # Schedule the coroutine as a real task on the event loop to be run as soon as there is time.
     EVENT_LOOP_CONCURRENT = auto()
+    # Run asynchronous tasks on a pool of worker threads, by priority.
+    WORKER_POOL = auto()
 
 
 class AsyncConfiguration(Enum):
@@ -65,6 +70,12 @@ class AsyncConfiguration(Enum):
         AsyncEventLoopType.GLIB_ONLY,
         AsyncTaskRunnerType.EVENT_LOOP_BLOCKING_SOON,
     )
+    WORKER_POOL = (
+        "worker_pool",
+        _("Worker threads"),
+        AsyncEventLoopType.GLIB_ONLY,
+        AsyncTaskRunnerType.WORKER_POOL,
+    )
     GBULB = (
         "gbulb",
         _("Using Gbulb event loop"),
@@ -98,7 +109,7 @@ class AsyncConfiguration(Enum):
 
     @classmethod
     def default(cls) -> "AsyncConfiguration":
-        return AsyncConfiguration.BLOCKING_SOON
+        return AsyncConfiguration.WORKER_POOL
 
 
 class AsyncTaskDelegator:
@@ -139,16 +150,34 @@ class AsyncTaskDelegator:
             # TODO: Currently always required for Debugger compatibility
             #  (since that ALWAYS uses this async implementation)
             AsyncTaskRunner.end()
+            WorkerPool.end()
             sys.exit(exit_code)
 
     @classmethod
-    def run_task(cls, coro: Coroutine, threadsafe=True):
+    def run_task(
+        cls,
+        coro: Coroutine,
+        threadsafe=True,
+        priority: TaskPriority = TaskPriority.NORMAL,
+        on_done: Callable[[Any], Any] | None = None,
+    ) -> TaskHandle | None:
         """
         This runs the coroutine, depending on the current configuration for async tasks.
         If the task is marked as not threadsafe (=it is expected to run on the calling thread) the task
         may be run immediately instead of the configured async strategy.
+
+        With AsyncRunnerType.WORKER_POOL (the default), threadsafe tasks run on worker threads. Only mark tasks as
+        threadsafe that don't touch models outside of a ModelContext or any other state of the main thread.
+
+        ``priority`` and ``on_done`` (called with the result of the coroutine on the GLib main loop) are only
+        supported with AsyncRunnerType.WORKER_POOL, which also returns a handle to cancel the task.
+        For all other configurations this returns None.
         """
-        if cls.config_type().async_task_runner_type == AsyncTaskRunnerType.THREAD_BASED:
+        if cls.config_type().async_task_runner_type == AsyncTaskRunnerType.WORKER_POOL:
+            if threadsafe:
+                return WorkerPool.instance().submit(coro, priority, on_done)
+            cls._run_glib_soon(coro)
+        elif cls.config_type().async_task_runner_type == AsyncTaskRunnerType.THREAD_BASED:
             if not threadsafe:
                 if not Now.instance().run_task(coro):
                     raise RuntimeError("Failed to run task.")
@@ -158,27 +187,48 @@ class AsyncTaskDelegator:
             if not Now.instance().run_task(coro):
                 raise RuntimeError("Failed to run task.")
         elif cls.config_type().async_task_runner_type == AsyncTaskRunnerType.EVENT_LOOP_BLOCKING_SOON:
-
-            def try_run_glib_soon(coro):
-                if not Now.instance().run_task(coro):
-                    # Try to defer the task slightly.
-                    GLib.timeout_add(100, lambda: try_run_glib_soon(coro))
-                return False
-
-            GLib.idle_add(lambda: try_run_glib_soon(coro))
+            cls._run_glib_soon(coro)
         elif cls.config_type().async_task_runner_type == AsyncTaskRunnerType.EVENT_LOOP_CONCURRENT:
             asyncio.create_task(coro)
         else:
             raise RuntimeError("Invalid async configuration")
+        return None
+
+    @classmethod
+    def _run_glib_soon(cls, coro: Coroutine):
+        def try_run_glib_soon(coro):
+            if not Now.instance().run_task(coro):
+                # Try to defer the task slightly.
+                GLib.timeout_add(100, lambda: try_run_glib_soon(coro))
+            return False
+
+        GLib.idle_add(lambda: try_run_glib_soon(coro))
+
+    @classmethod
+    def run_on_main_thread(cls, callback: Callable[[], Any]):
+        """
+        Runs the callback on the GLib main loop. If called from the main thread, it is run immediately.
+        Tasks use this to report back to the UI, since they may run on worker threads.
+        """
+        if threading.current_thread() is threading.main_thread():
+            callback()
+        else:
+            GLib.idle_add(lambda: callback() and False)
 
     @classmethod
     async def buffer(cls):
         """Pauses and continues running other tasks for a while, if other tasks are still pending.
         This is mostly useful for giving the UI loop a chance to catch up during heavy computations.
-        This is only supported with AsyncRunnerType.EVENT_LOOP_CONCURRENT, otherwise this does nothing.
+        With AsyncRunnerType.WORKER_POOL, this lets the UI thread run and is the point at which cancelled
+        tasks stop. With AsyncRunnerType.EVENT_LOOP_CONCURRENT, this lets other tasks on the event loop run.
+        Otherwise this does nothing.
         """
         if cls.config_type().async_task_runner_type == AsyncTaskRunnerType.EVENT_LOOP_CONCURRENT:
             await asyncio.sleep(0.001)
+        elif cls.config_type().async_task_runner_type == AsyncTaskRunnerType.WORKER_POOL:
+            if threading.current_thread() is not threading.main_thread():
+                # Gives up the GIL and gives the cancellation of the task a chance to arrive.
+                await asyncio.sleep(0.0005)
 
     @classmethod
     def config_type(cls):
@@ -0,0 +1,156 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+import asyncio
+import itertools
+import logging
+import os
+import queue
+import threading
+from asyncio import AbstractEventLoop
+from collections.abc import Callable, Coroutine
+from enum import IntEnum
+from typing import Any
+
+from gi.repository import GLib
+
+from skytemple.core.async_tasks import AsyncTaskRunnerProtocol
+
+logger = logging.getLogger(__name__)
+WORKER_COUNT = min(4, os.cpu_count() or 1)
+
+
+class TaskPriority(IntEnum):
+    """Lower values are run first."""
+
+    # Results the user is waiting for, eg. sprites that are currently visible.
+    HIGH = 0
+    NORMAL = 1
+    # Results that might be needed later.
+    PREFETCH = 2
+
+
+class TaskHandle:
+    """A task submitted to the WorkerPool."""
+
+    def __init__(self, coro: Coroutine, on_done: Callable[[Any], Any] | None):
+        self._coro = coro
+        self._on_done = on_done
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._loop: AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self):
+        """
+        Cancels the task. If it didn't start yet, it is never run. If it is running, it is cancelled the next time it
+        awaits something (eg. ``AsyncTaskDelegator.buffer``).
+        """
+        with self._lock:
+            self._cancelled = True
+            if self._loop is not None and self._task is not None:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+
+    def _run(self, loop: AbstractEventLoop):
+        with self._lock:
+            if self._cancelled:
+                self._coro.close()
+                return
+            self._loop = loop
+            self._task = loop.create_task(self._coro)
+        try:
+            result = loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            return
+        except BaseException as ex:
+            logger.error("Uncaught exception in asynchronous task.", exc_info=ex)
+            return
+        finally:
+            with self._lock:
+                self._loop = None
+                self._task = None
+        if self._on_done is not None:
+            on_done = self._on_done
+            GLib.idle_add(lambda: on_done(result) and False)
+
+
+class WorkerPool(AsyncTaskRunnerProtocol):
+    """
+    Runs asynchronous tasks on a fixed number of worker threads, each with its own event loop.
+    Tasks with a higher priority are started first; tasks of the same priority in the order they were submitted.
+    """
+
+    _instance: "WorkerPool | None" = None
+
+    @classmethod
+    def instance(cls) -> "WorkerPool":
+        if cls._instance is None:
+            cls._instance = WorkerPool(WORKER_COUNT)
+        return cls._instance
+
+    @classmethod
+    def end(cls):
+        if cls._instance is not None:
+            cls._instance._shutdown()
+            cls._instance = None
+
+    def __init__(self, worker_count: int):
+        self._queue: queue.PriorityQueue[tuple[int, int, TaskHandle | None]] = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"skytemple-worker-{i}", daemon=True) for i in range(worker_count)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def run_task(self, coro: Coroutine) -> bool:
+        self.submit(coro)
+        return True
+
+    def submit(
+        self,
+        coro: Coroutine,
+        priority: TaskPriority = TaskPriority.NORMAL,
+        on_done: Callable[[Any], Any] | None = None,
+    ) -> TaskHandle:
+        """
+        Queues the coroutine. ``on_done`` is called with the result of it on the GLib main loop,
+        if it finished successfully.
+        """
+        handle = TaskHandle(coro, on_done)
+        self._queue.put((priority, next(self._counter), handle))
+        return handle
+
+    def _work(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            while True:
+                _, _, handle = self._queue.get()
+                if handle is None:
+                    return
+                handle._run(loop)
+        finally:
+            loop.close()
+
+    def _shutdown(self):
+        for _ in self._workers:
+            # Sorted after all other tasks.
+            self._queue.put((len(TaskPriority), next(self._counter), None))
@@ -16,8 +16,11 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from collections.abc import Hashable, Sequence
 
 import cairo
+from gi.repository import GdkPixbuf, GLib
+from PIL import Image
 
 
 def pil_to_cairo_surface(im, format=cairo.FORMAT_ARGB32) -> cairo.ImageSurface:
@@ -29,3 +32,111 @@ def pil_to_cairo_surface(im, format=cairo.FORMAT_ARGB32) -> cairo.ImageSurface:
     arr = memoryview(bytearray(im.tobytes("raw", "BGRa")))
     surface = cairo.ImageSurface.create_for_data(arr, format, im.width, im.height)
     return surface
+
+
+def cairo_palette(palette: Sequence[int], transparent_every: int | None = None) -> list[int]:
+    """
+    Converts a flat RGB palette (eg. from Image.getpalette) into a flat RGBA palette for indexed_to_cairo_bytes,
+    which has the colors in the byte order of cairo's ARGB32 format (on little endian machines).
+
+    :param transparent_every: If set, every color with an index that is a multiple of this is fully transparent,
+                              eg. 16 for the first color of each 16 color palette.
+    """
+    out = []
+    for index in range(256):
+        if transparent_every is not None and index % transparent_every == 0:
+            # Premultiplied, so the color is also 0.
+            out += (0, 0, 0, 0)
+        elif index * 3 + 2 < len(palette):
+            out += (palette[index * 3 + 2], palette[index * 3 + 1], palette[index * 3], 255)
+        else:
+            # Like PIL, colors missing in the palette are black.
+            out += (0, 0, 0, 255)
+    return out
+
+
+def indexed_to_cairo_bytes(im: Image.Image, palette: list[int]) -> bytes:
+    """
+    Renders an indexed (mode P) image with a palette from cairo_palette into ARGB32 pixels, eg. for write_to_surface.
+    Unlike converting the image to RGBA and then using pil_to_cairo_surface, this needs neither a separate mask nor
+    premultiplying.
+    """
+    return indexed_to_cairo_image(im, palette).tobytes()
+
+
+def indexed_to_cairo_image(im: Image.Image, palette: list[int]) -> Image.Image:
+    """
+    Like indexed_to_cairo_bytes, but returns the pixels as an RGBA image (with the channels in cairo's order), so
+    parts of it can be cropped and pasted before converting it to bytes.
+    """
+    indexed = im.copy()
+    indexed.putpalette(palette, "RGBA")
+    return indexed.convert("RGBA")
+
+
+def indexed_to_cairo_surface(im: Image.Image, palette: list[int]) -> cairo.ImageSurface:
+    """Like indexed_to_cairo_bytes, but returns a new surface."""
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, im.width, im.height)
+    write_to_surface(surface, indexed_to_cairo_bytes(im, palette), im.width, im.height)
+    return surface
+
+
+def write_to_surface(surface: cairo.ImageSurface, pixels: bytes, width: int, height: int, x: int = 0, y: int = 0):
+    """
+    Copies the ARGB32 pixels of an image with the given size into the surface, with the top left corner at x, y.
+    Takes the stride of the surface into account, so images can be placed anywhere in atlas surfaces.
+    """
+    surface.flush()
+    data = surface.get_data()
+    stride = surface.get_stride()
+    row_len = width * 4
+    src = memoryview(pixels)
+    if x == 0 and stride == row_len:
+        data[y * stride : (y + height) * stride] = src[: height * row_len]
+    else:
+        for row in range(height):
+            offset = (y + row) * stride + x * 4
+            data[offset : offset + row_len] = src[row * row_len : (row + 1) * row_len]
+    surface.mark_dirty()
+
+
+def cairo_surface_to_pixbuf(
+    surface: cairo.ImageSurface, width: int | None = None, height: int | None = None
+) -> GdkPixbuf.Pixbuf:
+    """
+    Converts an ARGB32 surface to a pixbuf. Cairo stores premultiplied BGRA pixels (on little endian machines),
+    pixbufs RGBA without premultiplied alpha.
+
+    :param width: Width of the area at the top left of the surface to convert, the entire width if not set.
+    :param height: Height of the area at the top left of the surface to convert, the entire height if not set.
+    """
+    width = surface.get_width() if width is None else width
+    height = surface.get_height() if height is None else height
+    surface.flush()
+    im = Image.frombuffer("RGBA", (width, height), surface.get_data(), "raw", "BGRa", surface.get_stride(), 1)
+    return GdkPixbuf.Pixbuf.new_from_bytes(
+        GLib.Bytes.new(im.tobytes()), GdkPixbuf.Colorspace.RGB, True, 8, width, height, width * 4
+    )
+
+
+class PixbufCache:
+    """
+    Pixbufs of surfaces (see cairo_surface_to_pixbuf) by a key, eg. the row of a list.
+    The pixbuf of a key is only converted again if a different surface is passed for it; the SpriteProvider
+    returns a new surface once a sprite finished loading or changed.
+    """
+
+    def __init__(self):
+        self._entries: dict[Hashable, tuple[cairo.ImageSurface, int, int, GdkPixbuf.Pixbuf]] = {}
+
+    def get(self, key: Hashable, surface: cairo.ImageSurface, width: int, height: int) -> GdkPixbuf.Pixbuf:
+        entry = self._entries.get(key)
+        # The entry keeps the surface alive, so no other surface can be the same object.
+        if entry is not None and entry[0] is surface and entry[1:3] == (width, height):
+            return entry[3]
+        pixbuf = cairo_surface_to_pixbuf(surface, width, height)
+        self._entries[key] = (surface, width, height, pixbuf)
+        return pixbuf
+
+    def clear(self):
+        self._entries = {}
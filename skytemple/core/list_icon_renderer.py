@@ -16,16 +16,34 @@
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 import typing
 from functools import partial
-from itertools import zip_longest
-from typing import Any
-
-import cairo
-from gi.repository import GdkPixbuf, GLib
 
+from gi.repository import GLib
+
+from skytemple.core.async_tasks.worker_pool import TaskPriority
+from skytemple.core.img_utils import PixbufCache
+from skytemple.core.sprite_provider import (
+    SPRITE_KIND_ACTOR_PLACEHOLDER,
+    SPRITE_KIND_ITEM,
+    SPRITE_KIND_MONSTER,
+    SPRITE_KIND_MONSTER_OUTLINE,
+    SPRITE_KIND_OBJECT,
+    SPRITE_KIND_TRAP,
+    SpriteProvider,
+)
+from skytemple.core.surface_cache import ScaledSurfaceCache
 from skytemple.core.ui_utils import get_list_store_iter_by_idx
 
 ORANGE = "orange"
 ORANGE_RGB = (1, 0.65, 0)
+# The kinds of sprites the methods of the SpriteProvider load, to prefetch the icons of all rows at once.
+_SPRITE_KINDS = {
+    SpriteProvider.get_monster: SPRITE_KIND_MONSTER,
+    SpriteProvider.get_monster_outline: SPRITE_KIND_MONSTER_OUTLINE,
+    SpriteProvider.get_actor_placeholder: SPRITE_KIND_ACTOR_PLACEHOLDER,
+    SpriteProvider.get_for_object: SPRITE_KIND_OBJECT,
+    SpriteProvider.get_for_trap: SPRITE_KIND_TRAP,
+    SpriteProvider.get_for_item: SPRITE_KIND_ITEM,
+}
 
 
 class ListIconRenderer:
@@ -37,12 +55,16 @@ class ListIconRenderer:
     """
 
     def __init__(self, column_id, can_be_placeholder=False):
-        self._icon_pixbufs: dict[Any, GdkPixbuf.Pixbuf] = {}
+        self._icon_pixbufs = PixbufCache()
         self._refresh_timer = None
         self.column_id = column_id
         self.can_be_placeholder = can_be_placeholder
         self._registered_for_reload = []
         self._loading = True
+        # Sprites of the rows added while loading, by sprite provider and kind. They are prefetched together, once
+        # all rows were added.
+        self._queued_prefetches: dict[tuple[SpriteProvider, str], list] = {}
+        self._prefetch_idle = None
 
     def load_icon(self, store, load_fn, target_name, idx, parameters, is_placeholder=False):
         self._registered_for_reload.append((store, idx, (store, load_fn, target_name, idx, parameters, is_placeholder)))
@@ -56,47 +78,66 @@ class ListIconRenderer:
         self.can_be_placeholder = None
         self._registered_for_reload = None
         self._loading = True
+        self._queued_prefetches = None
+        self._prefetch_idle = None
 
     def _get_icon(self, store, load_fn, target_name, idx, parameters, is_placeholder=False):
         was_loading = self._loading
-        sprite, x, y, w, h = load_fn(
-            *parameters,
-            lambda: GLib.idle_add(
-                partial(
-                    self._reload_icon,
-                    parameters,
-                    idx,
-                    store,
-                    load_fn,
-                    target_name,
-                    was_loading,
-                )
-            ),
-        )
+        loaded = None
+        provider = getattr(load_fn, "__self__", None)
+        kind = _SPRITE_KINDS.get(getattr(load_fn, "__func__", None))
+        if was_loading and isinstance(provider, SpriteProvider) and kind is not None:
+            # The keys for prefetch are the parameters of the get_* methods.
+            key = parameters if len(parameters) > 1 else parameters[0]
+            loaded = provider.get_loaded(kind, key)
+            if loaded is None:
+                self._queue_prefetch(provider, kind, key)
+                loaded = provider.get_loader()
+        if loaded is None:
+            loaded = load_fn(
+                *parameters,
+                lambda: GLib.idle_add(
+                    partial(
+                        self._reload_icon,
+                        parameters,
+                        idx,
+                        store,
+                        load_fn,
+                        target_name,
+                        was_loading,
+                    )
+                ),
+            )
+        sprite, x, y, w, h = loaded
 
         if is_placeholder:
-            ctx = cairo.Context(sprite)
-            ctx.set_source_rgb(*ORANGE_RGB)
-            ctx.rectangle(0, 0, w, h)
-            ctx.set_operator(cairo.OPERATOR_IN)
-            ctx.fill()
-
-        data = bytes(sprite.get_data())
-        # this is painful.
-        new_data = bytearray()
-        for b, g, r, a in grouper(data, 4):
-            new_data += bytes([r, g, b, a])
-        self._icon_pixbufs[target_name] = GdkPixbuf.Pixbuf.new_from_data(
-            new_data,  # type: ignore
-            GdkPixbuf.Colorspace.RGB,
-            True,
-            8,
-            w,
-            h,
-            sprite.get_stride(),
-            destroy_fn=None,  # todo: memory leak? Probably not?
-        )
-        return self._icon_pixbufs[target_name]
+            sprite = ScaledSurfaceCache.instance().get(sprite, 1, ORANGE_RGB, w, h)
+
+        return self._icon_pixbufs.get(target_name, sprite, w, h)
+
+    def _queue_prefetch(self, provider: SpriteProvider, kind: str, key):
+        self._queued_prefetches.setdefault((provider, kind), []).append(key)
+        if self._prefetch_idle is None:
+            self._prefetch_idle = GLib.idle_add(self._prefetch_queued)
+
+    def _prefetch_queued(self):
+        try:
+            queued = self._queued_prefetches
+            self._queued_prefetches = {}
+            self._prefetch_idle = None
+            requested = False
+            for (provider, kind), keys in queued.items():
+                # The callback is already run on the main thread.
+                if provider.prefetch(kind, keys, self._reload_icons_in_tree, TaskPriority.HIGH):
+                    requested = True
+            if not requested:
+                # Everything was already loaded or is being loaded for someone else.
+                if self._refresh_timer is not None:
+                    GLib.source_remove(self._refresh_timer)
+                self._refresh_timer = GLib.timeout_add(500, self._reload_icons_in_tree)
+        except (AttributeError, TypeError):
+            pass  # This happens when the view was unloaded in the meantime.
+        return False
 
     def _reload_icon(self, parameters, idx, store, load_fn, target_name, was_loading):
         if store is None:
@@ -118,14 +159,10 @@ class ListIconRenderer:
 
     def _reload_icons_in_tree(self):
         try:
+            # Rows whose sprite is still not loaded are updated individually from now on.
+            self._loading = False
             for model, idx, params in self._registered_for_reload:
                 model[get_list_store_iter_by_idx(model, idx)][self.column_id] = self._get_icon(*params)
-            self._loading = False
             self._refresh_timer = None
         except (AttributeError, TypeError):
             pass  # This happens when the view was unloaded in the meantime.
-
-
-def grouper(iterable, n, fillvalue=None):
-    args = [iter(iterable)] * n
-    return ((bytes(bytearray(x))) for x in zip_longest(fillvalue=fillvalue, *args))
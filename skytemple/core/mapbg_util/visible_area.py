@@ -0,0 +1,42 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+import math
+
+import cairo
+
+# Cells touched by strokes on their borders are still drawn.
+MARGIN = 1
+
+
+def visible_cells(
+    ctx: cairo.Context, cell_width: float, cell_height: float, columns: int, rows: int
+) -> tuple[range, range]:
+    """
+    The columns and rows of a grid of cells starting at the origin that intersect the clip region of the context.
+    The clip extents are in user space, so the current scale and translation of the context are taken into account.
+    """
+    x1, y1, x2, y2 = ctx.clip_extents()
+    return (
+        range(
+            max(0, math.floor((x1 - MARGIN) / cell_width)),
+            min(columns, math.ceil((x2 + MARGIN) / cell_width)),
+        ),
+        range(
+            max(0, math.floor((y1 - MARGIN) / cell_height)),
+            min(rows, math.ceil((y2 + MARGIN) / cell_height)),
+        ),
+    )
@@ -0,0 +1,362 @@
+"""A ROM backing store that memory-maps the ROM file and only copies out files that are actually read."""
+
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import bisect
+import logging
+import mmap
+import os
+import struct
+from collections.abc import MutableSequence
+from typing import overload, Union, Any
+
+from ndspy import fnt as fnt_lib
+from ndspy.rom import NintendoDSRom, _ICON_BANNER_LENGTHS
+
+from skytemple.core.rom_journal import RomJournal, JournalEntry
+
+logger = logging.getLogger(__name__)
+
+HEADER_SIZE = 0x200
+# Either a (start, end) range into the backing buffer or the materialized (modified) file content.
+_Entry = Union[tuple[int, int], bytes]
+
+
+class MappedRomFileList(MutableSequence[bytes]):
+    """
+    Replacement for ``NintendoDSRom.files``.
+
+    Unmodified files are only stored as ranges into the backing buffer and copied out on access.
+    Files that are set or inserted are kept in memory (the "overlay") until the ROM is saved again.
+    """
+
+    def __init__(self, buffer: mmap.mmap | bytes, fat: bytes):
+        self._buffer = buffer
+        # The ranges as they are in the FAT of the backing buffer.
+        self._ranges: list[tuple[int, int]] = [struct.unpack_from("<II", fat, 8 * i) for i in range(len(fat) // 8)]
+        self._entries: list[_Entry] = list(self._ranges)
+        self._structure_changed = False
+
+    @overload
+    def __getitem__(self, index: int) -> bytes: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[bytes]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._resolve(entry) for entry in self._entries[index]]
+        return self._resolve(self._entries[index])
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._entries[index] = list(value)
+            self._structure_changed = True
+        else:
+            self._entries[index] = value
+
+    def __delitem__(self, index):
+        del self._entries[index]
+        self._structure_changed = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def insert(self, index: int, value: bytes):
+        self._entries.insert(index, value)
+        self._structure_changed = True
+
+    @property
+    def structure_changed(self) -> bool:
+        """Whether files were added or removed, which means file IDs no longer match the backing FAT."""
+        return self._structure_changed
+
+    def original_range(self, index: int) -> tuple[int, int]:
+        """The range of the file in the backing buffer. Only valid if the structure didn't change."""
+        return self._ranges[index]
+
+    def rebind(self, buffer: mmap.mmap | bytes):
+        """Points the list to a new backing buffer with the same layout."""
+        self._buffer = buffer
+
+    def is_modified(self, index: int) -> bool:
+        """Returns whether the file was set or inserted since the backing buffer was last (re-)attached."""
+        return not isinstance(self._entries[index], tuple)
+
+    def modified_count(self) -> int:
+        return sum(1 for entry in self._entries if not isinstance(entry, tuple))
+
+    def _resolve(self, entry: _Entry) -> bytes:
+        if isinstance(entry, tuple):
+            start, end = entry
+            return self._buffer[start:end]
+        return entry
+
+
+class MappedNintendoDSRom(NintendoDSRom):
+    """
+    A NintendoDSRom that memory-maps the ROM file instead of reading it into memory.
+
+    Only the header, the binaries and the file tables are read eagerly. The contents of the filesystem
+    are only copied out of the mapped file when they are requested. Saving merges all modified files back
+    into the ROM file and re-maps it afterwards. If possible the modified files can also be written back in place,
+    see ``save_in_place``.
+    """
+
+    files: MappedRomFileList  # type: ignore
+    _ATTRS_NOT_SNAPSHOT = ("files", "filenames", "sortedFileIds")
+
+    def __init__(self, buffer: mmap.mmap | bytes, path: str | None = None):
+        self._buffer = buffer
+        self._path = path
+        super().__init__(buffer)
+
+    @classmethod
+    def fromFile(cls, filePath: str | os.PathLike) -> MappedNintendoDSRom:
+        path = os.fspath(filePath)
+        return cls(_map_file(path), path)
+
+    def close(self):
+        """Releases the memory map. All unmodified files are copied into memory first."""
+        if isinstance(self._buffer, mmap.mmap):
+            self._attach_buffer(self.save(), None)
+
+    def saveToFile(self, filePath: str | os.PathLike, *, updateDeviceCapacity: bool = False) -> None:
+        data = self.save(updateDeviceCapacity=updateDeviceCapacity)
+        # The map must be released before writing, the target may be the mapped file itself.
+        self._release_map()
+        path = os.fspath(filePath)
+        try:
+            with open(path, "wb") as f:
+                f.write(data)
+        except BaseException:
+            self._attach_buffer(data, None)
+            raise
+        self._attach_buffer(_map_file(path), path)
+
+    def save_in_place(self, filePath: str | os.PathLike, journal_path: str) -> bool:
+        """
+        Writes only the modified files and their FAT entries back into the mapped ROM file.
+
+        This is only possible if the ROM is saved to the file it is mapped from, no files were added or removed,
+        nothing outside the filesystem changed and every modified file still fits into the space of the old one.
+        Otherwise nothing is written and False is returned; the ROM has to be saved with ``saveToFile`` instead.
+        The regions are recorded in a journal at ``journal_path`` before the ROM is touched, the journal is
+        deleted once the save completed.
+        """
+        path = os.fspath(filePath)
+        if not isinstance(self._buffer, mmap.mmap) or self._path is None:
+            return False
+        if not os.path.exists(path) or not os.path.samefile(path, self._path):
+            return False
+        if self.files.structure_changed or self._snapshot() != self._pristine:
+            return False
+        if fnt_lib.save(self.filenames) != self._pristine_fnt:
+            return False
+
+        entries = []
+        for i in range(len(self.files)):
+            if not self.files.is_modified(i):
+                continue
+            data = self.files[i]
+            start, end = self.files.original_range(i)
+            new_end = start + len(data)
+            if new_end > end and (start == end or new_end > self._slot_end(start)):
+                return False
+            # Shrunk files leave padding behind, just like a full rebuild would.
+            region_end = max(end, new_end)
+            entries.append(
+                JournalEntry(start, self._buffer[start:region_end], bytes(data) + b"\xff" * (region_end - new_end))
+            )
+            fat_entry = self._fat_offset + 8 * i
+            entries.append(
+                JournalEntry(fat_entry, self._buffer[fat_entry : fat_entry + 8], struct.pack("<II", start, new_end))
+            )
+
+        if len(entries) > 0:
+            journal = RomJournal(len(self._buffer), entries)
+            journal.write(journal_path)
+            self._release_map()
+            try:
+                journal.replay(path)
+            except BaseException:
+                # Unmodified files were not touched, so they can still be read from the file. The journal is kept
+                # so the interrupted save can be recovered when the ROM is opened again.
+                self._buffer = _map_file(path)
+                self.files.rebind(self._buffer)
+                raise
+            self._attach_buffer(_map_file(path), path)
+            os.unlink(journal_path)
+        return True
+
+    def _initFromData(self, data: bytes) -> None:
+        # Mirrors NintendoDSRom._initFromData, but only slices the parts of the ROM that are not
+        # files from the (mapped) data.
+        if len(data) < HEADER_SIZE:
+            raise struct.error("ROM is smaller than its header.")
+        header = bytearray(data[0:HEADER_SIZE])
+
+        self.name = header[0x00:0x0C].rstrip(b"\0")
+        self.idCode = header[0x0C:0x10]
+        self.developerCode = header[0x10:0x12]
+        (
+            self.unitCode,
+            self.encryptionSeedSelect,
+            self.deviceCapacity,
+            self.pad015,
+            self.pad016,
+            self.pad017,
+            self.pad018,
+            self.pad019,
+            self.pad01A,
+            self.pad01B,
+            self.pad01C,
+            self.region,
+            self.version,
+            self.autostart,
+        ) = header[0x12:0x20]
+        (
+            arm9_offset,
+            self.arm9EntryAddress,
+            self.arm9RamAddress,
+            arm9_len,
+            arm7_offset,
+            self.arm7EntryAddress,
+            self.arm7RamAddress,
+            arm7_len,
+            fnt_offset,
+            fnt_len,
+            _fat_offset,
+            _fat_len,
+            arm9_ovt_offset,
+            arm9_ovt_len,
+            arm7_ovt_offset,
+            arm7_ovt_len,
+            self.normalCardControlRegisterSettings,
+            self.secureCardControlRegisterSettings,
+            icon_banner_offset,
+        ) = struct.unpack_from("<19I", header, 0x20)
+        self.secureAreaChecksum, self.secureTransferDelay = struct.unpack_from("<HH", header, 0x6C)
+        self.arm9CodeSettingsPointerAddress, self.arm7CodeSettingsPointerAddress = struct.unpack_from(
+            "<II", header, 0x70
+        )
+        self.secureAreaDisable = header[0x78:0x80]
+        rom_size_or_rsa_sig_offset, _header_size = struct.unpack_from("<II", header, 0x80)
+        self.pad088 = header[0x88:0xC0]
+        self.nintendoLogo = header[0xC0:0x15C]
+        debug_rom_offset, debug_rom_size, self.debugRomAddress = struct.unpack_from("<III", header, 0x160)
+        self.pad16C = header[0x16C:0x200]
+        self.pad200 = bytearray(data[HEADER_SIZE : min(arm9_offset, len(data))])
+
+        real_sig_offset = 0
+        if len(data) >= 0x1004:
+            (real_sig_offset,) = struct.unpack_from("<I", data, 0x1000)
+        if not real_sig_offset and len(data) > rom_size_or_rsa_sig_offset:
+            real_sig_offset = rom_size_or_rsa_sig_offset
+        self.rsaSignature = b""
+        if real_sig_offset:
+            self.rsaSignature = bytearray(data[real_sig_offset : min(len(data), real_sig_offset + 0x88)])
+
+        self.arm9 = bytearray(data[arm9_offset : arm9_offset + arm9_len])
+        self.arm7 = bytearray(data[arm7_offset : arm7_offset + arm7_len])
+        fnt = data[fnt_offset : fnt_offset + fnt_len]
+        self.arm9OverlayTable = bytearray(data[arm9_ovt_offset : arm9_ovt_offset + arm9_ovt_len])
+        self.arm7OverlayTable = bytearray(data[arm7_ovt_offset : arm7_ovt_offset + arm7_ovt_len])
+        if icon_banner_offset:
+            (version,) = struct.unpack_from("<H", data, icon_banner_offset)
+            icon_banner_len = _ICON_BANNER_LENGTHS.get(version, _ICON_BANNER_LENGTHS[1])
+            self.iconBanner = bytearray(data[icon_banner_offset : icon_banner_offset + icon_banner_len])
+        else:
+            self.iconBanner = b""
+        if debug_rom_offset:
+            self.debugRom = bytearray(data[debug_rom_offset : debug_rom_offset + debug_rom_size])
+        else:
+            self.debugRom = b""
+
+        arm9_post_data = bytearray()
+        arm9_post_data_offset = arm9_offset + arm9_len
+        while data[arm9_post_data_offset : arm9_post_data_offset + 4] == b"\x21\x06\xc0\xde":
+            arm9_post_data.extend(data[arm9_post_data_offset : arm9_post_data_offset + 12])
+            arm9_post_data_offset += 12
+        self.arm9PostData = arm9_post_data
+
+        if fnt:
+            self.filenames = fnt_lib.load(fnt)
+        else:
+            self.filenames = fnt_lib.Folder()
+
+        self._attach_buffer(data, self._path)
+
+    def _attach_buffer(self, buffer: mmap.mmap | bytes, path: str | None):
+        """Makes a freshly saved image the backing buffer. This drops all modified files from the overlay."""
+        self._buffer = buffer
+        self._path = path
+        self._fat_offset, fat_len = struct.unpack_from("<II", buffer, 0x48)
+        fat = buffer[self._fat_offset : self._fat_offset + fat_len]
+
+        self.files = MappedRomFileList(buffer, fat)
+        offset_to_id = {}
+        for i in range(len(fat) // 8):
+            (start_offset,) = struct.unpack_from("<I", fat, 8 * i)
+            offset_to_id[start_offset] = i
+        self.sortedFileIds = [offset_to_id[off] for off in sorted(offset_to_id)]
+
+        # Everything that is not a file, used to find out how much space a file may grow into in place.
+        section_offsets = [
+            *struct.unpack_from("<8I", buffer, 0x20)[0::4],
+            *struct.unpack_from("<8I", buffer, 0x40)[0::2],
+        ]
+        section_offsets.append(struct.unpack_from("<I", buffer, 0x68)[0])
+        section_offsets.append(struct.unpack_from("<I", buffer, 0x160)[0])
+        if len(buffer) >= 0x1004:
+            section_offsets.append(struct.unpack_from("<I", buffer, 0x1000)[0])
+        section_offsets.append(struct.unpack_from("<I", buffer, 0x80)[0])
+        self._region_starts = sorted({off for off in section_offsets if off > 0} | set(offset_to_id.keys()))
+
+        self._pristine = self._snapshot()
+        self._pristine_fnt = fnt_lib.save(self.filenames)
+
+    def _slot_end(self, start: int) -> int:
+        """Where the next region after the file starting at ``start`` begins."""
+        idx = bisect.bisect_right(self._region_starts, start)
+        if idx < len(self._region_starts):
+            return min(self._region_starts[idx], len(self._buffer))
+        return len(self._buffer)
+
+    def _snapshot(self) -> dict[str, Any]:
+        return {
+            k: bytes(v) if isinstance(v, bytearray) else v
+            for k, v in vars(self).items()
+            if not k.startswith("_") and k not in self._ATTRS_NOT_SNAPSHOT
+        }
+
+    def _release_map(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __del__(self):
+        if hasattr(self, "_buffer"):
+            self._release_map()
+
+
+def _map_file(path: str) -> mmap.mmap:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+            raise struct.error("ROM is smaller than its header.")
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
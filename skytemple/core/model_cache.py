@@ -0,0 +1,173 @@
+"""On-disk cache of deserialized models, to speed up opening the same ROM again."""
+
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import os
+import pickle
+import secrets
+from typing import Any
+
+import importlib.metadata as importlib_metadata
+
+from skytemple_files.common.impl_cfg import get_implementation_type
+from skytemple_files.common.project_file_manager import ProjectFileManager
+from skytemple_files.common.types.data_handler import DataHandler
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = "model_cache"
+KEY_FILE_NAME = "model_cache.key"
+_SIMPLE_KWARG_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+class ModelCache:
+    """
+    Stores pickled models in the project directory.
+
+    An entry is only used if the raw bytes of the file, the handler, its keyword arguments and the library
+    versions still match the ones it was stored for. There is one entry per file in the ROM; when the content of
+    the file changes, the entry is replaced on the next store.
+
+    Entries are signed with a key that is stored in the user's configuration directory, so caches in project
+    directories that were created on another machine (or by someone else) are never unpickled.
+    """
+
+    def __init__(self, directory: str, key: bytes):
+        self.directory = directory
+        self._key = key
+        self._versions = _library_versions()
+        # Handlers whose models could not be pickled; we don't try again for these.
+        self._unpicklable: set[type[DataHandler]] = set()
+
+    @classmethod
+    def for_project(cls, project_fm: ProjectFileManager) -> ModelCache:
+        return cls(project_fm.dir(CACHE_DIR_NAME), _get_or_create_key())
+
+    def load(self, file_path_in_rom: str, data: bytes, handler: type[DataHandler], kwargs: dict[str, Any]) -> Any:
+        """Returns the cached model for the file or None on a cache miss."""
+        digest = self._digest(file_path_in_rom, data, handler, kwargs)
+        if digest is None:
+            return None
+        entry_path = self._entry_path(file_path_in_rom)
+        try:
+            with open(entry_path, "rb") as f:
+                content = f.read()
+        except OSError:
+            return None
+        signature, entry_digest, payload = content[:32], content[32:64], content[64:]
+        if entry_digest != digest:
+            return None
+        if not hmac.compare_digest(signature, self._sign(entry_digest, payload)):
+            logger.warning(f"Ignoring model cache entry for {file_path_in_rom} with invalid signature.")
+            return None
+        try:
+            return pickle.loads(payload)
+        except Exception as ex:
+            logger.warning(f"Failed to load model cache entry for {file_path_in_rom}.", exc_info=ex)
+            return None
+
+    def store(self, file_path_in_rom: str, data: bytes, handler: type[DataHandler], kwargs: dict[str, Any], model):
+        """Stores the model for the file. Does nothing if the model can't be cached."""
+        if handler in self._unpicklable:
+            return
+        digest = self._digest(file_path_in_rom, data, handler, kwargs)
+        if digest is None:
+            return
+        try:
+            payload = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # Most likely a native model.
+            logger.debug(f"Models of {handler.__name__} can not be cached.")
+            self._unpicklable.add(handler)
+            return
+        entry_path = self._entry_path(file_path_in_rom)
+        try:
+            with open(entry_path + ".tmp", "wb") as f:
+                f.write(self._sign(digest, payload))
+                f.write(digest)
+                f.write(payload)
+            os.replace(entry_path + ".tmp", entry_path)
+        except OSError as ex:
+            logger.warning(f"Failed to write model cache entry for {file_path_in_rom}.", exc_info=ex)
+
+    def _digest(
+        self, file_path_in_rom: str, data: bytes, handler: type[DataHandler], kwargs: dict[str, Any]
+    ) -> bytes | None:
+        if not all(isinstance(v, _SIMPLE_KWARG_TYPES) for v in kwargs.values()):
+            # We can't reliably tell if complex arguments (such as the static data) are still the same.
+            return None
+        h = hashlib.sha256()
+        h.update(file_path_in_rom.encode("utf-8"))
+        h.update(hashlib.sha256(data).digest())
+        h.update(f"{handler.__module__}.{handler.__qualname__}".encode())
+        h.update(repr(sorted(kwargs.items())).encode())
+        h.update(_properties_fingerprint(handler).encode())
+        h.update(self._versions.encode())
+        h.update(str(get_implementation_type()).encode())
+        return h.digest()
+
+    def _sign(self, digest: bytes, payload: bytes) -> bytes:
+        return hmac.new(self._key, digest + payload, hashlib.sha256).digest()
+
+    def _entry_path(self, file_path_in_rom: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(file_path_in_rom.encode("utf-8")).hexdigest() + ".pickle")
+
+
+def _properties_fingerprint(handler: type[DataHandler]) -> str:
+    """Some handlers have global properties that change how files are read (eg. the number of Pokémon)."""
+    properties = getattr(handler, "properties", None)
+    if properties is None:
+        return ""
+    props = properties()
+    return repr(
+        sorted(
+            (k, getattr(props, k))
+            for k in dir(props)
+            if not k.startswith("_") and isinstance(getattr(props, k), _SIMPLE_KWARG_TYPES)
+        )
+    )
+
+
+def _library_versions() -> str:
+    versions = []
+    for dist in ("skytemple-files", "skytemple-rust"):
+        try:
+            versions.append(f"{dist}={importlib_metadata.version(dist)}")
+        except importlib_metadata.PackageNotFoundError:
+            versions.append(f"{dist}=?")
+    return ",".join(versions)
+
+
+def _get_or_create_key() -> bytes:
+    key_path = os.path.join(ProjectFileManager.shared_config_dir(), KEY_FILE_NAME)
+    try:
+        with open(key_path, "rb") as f:
+            key = f.read()
+        if len(key) == 32:
+            return key
+    except OSError:
+        pass
+    key = secrets.token_bytes(32)
+    os.makedirs(ProjectFileManager.shared_config_dir(), exist_ok=True)
+    with open(key_path, "wb") as f:
+        f.write(key)
+    return key
@@ -14,26 +14,119 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+import logging
 import threading
-from contextlib import AbstractContextManager
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
 from typing import TypeVar, Generic
 
+from skytemple.core.profiling import record_span
+
 T = TypeVar("T")
+logger = logging.getLogger(__name__)
+# Waits for a model longer than this (in seconds) are logged.
+LOCK_WAIT_LOG_THRESHOLD = 0.1
 
 
 class ModelContext(Generic[T], AbstractContextManager):
     """
     ContextManager that wraps a model for thread-safe data access.
     References to the model are invalid outside of the context provided.
+
+    Entering the context itself (or ``write``) gives exclusive access to the model. Code that only reads the
+    model can use ``read`` instead: Any number of threads can read the model at the same time.
+    Both can be nested by the same thread, except that a thread that is reading can not start writing.
+    Waiting writers have priority over new readers.
+
+    Time spent waiting for the model is recorded as a "lock-wait" span and summed up in ``wait_count`` and
+    ``wait_time``.
     """
 
     def __init__(self, model: T):
         self._model = model
-        self._lock = threading.RLock()
+        self._cond = threading.Condition(threading.Lock())
+        # Thread ident -> nesting depth
+        self._readers: dict[int, int] = {}
+        self._writer: int | None = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self.wait_count = 0
+        self.wait_time = 0.0
 
     def __enter__(self) -> T:
-        self._lock.acquire()
+        self._acquire_write()
         return self._model
 
     def __exit__(self, exc_type, value, traceback):
-        self._lock.release()
+        self._release_write()
+
+    def write(self) -> "ModelContext[T]":
+        """Exclusive access to the model. The same as entering the context itself."""
+        return self
+
+    @contextmanager
+    def read(self) -> Iterator[T]:
+        """Shared access to the model. The model must not be changed in this context."""
+        self._acquire_read()
+        try:
+            yield self._model
+        finally:
+            self._release_read()
+
+    def _acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and me not in self._readers and not self._can_read():
+                self._wait("read", self._can_read)
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def _release_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._readers[me] == 1:
+                del self._readers[me]
+                self._cond.notify_all()
+            else:
+                self._readers[me] -= 1
+
+    def _acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Can not get write access to a model while reading it.")
+            if not self._can_write():
+                self._waiting_writers += 1
+                try:
+                    self._wait("write", self._can_write)
+                finally:
+                    self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def _release_write(self):
+        with self._cond:
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    def _can_read(self) -> bool:
+        return self._writer is None and self._waiting_writers == 0
+
+    def _can_write(self) -> bool:
+        return self._writer is None and not self._readers
+
+    def _wait(self, mode: str, predicate):
+        """Wait for the predicate. Must be called with the condition held."""
+        start = time.monotonic()
+        with record_span("lock-wait", f"{type(self._model).__name__}.{mode}"):
+            self._cond.wait_for(predicate)
+        waited = time.monotonic() - start
+        self.wait_count += 1
+        self.wait_time += waited
+        if waited > LOCK_WAIT_LOG_THRESHOLD:
+            logger.debug(f"Waited {waited:.3f}s for {mode} access to {type(self._model).__name__}.")
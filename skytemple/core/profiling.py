@@ -27,6 +27,8 @@ from types import TracebackType
 from typing import Protocol, ClassVar, TYPE_CHECKING, Any
 from collections.abc import Iterable
 
+from skytemple.core.profiling_trace import TraceEvent, TraceRecorder
+
 logger = logging.getLogger(__name__)
 
 
@@ -121,6 +123,51 @@ class _SentryImpl(_ProfilingImplementation):
         return span
 
 
+class _TraceImpl(_ProfilingImplementation):
+    class TraceCtx(TaggableContext):
+        def __init__(self, recorder: TraceRecorder, name: str, category: str, tags: dict[str, Any] | None):
+            self.recorder = recorder
+            self.name = name
+            self.category = category
+            self.tags = tags
+            self.event: TraceEvent | None = None
+
+        def set_tag(self, key: str, value: Any):
+            if self.event is not None:
+                try:
+                    self.event.tags[key] = str(value)
+                except Exception:
+                    self.event.tags[key] = "<failed __str__>"
+
+        def __enter__(self):
+            self.event = self.recorder.start(self.name, self.category)
+            if self.tags is not None:
+                for k, v in self.tags.items():
+                    self.set_tag(k, v)
+
+        def __exit__(self, __exc_type, __exc_value, __traceback):
+            assert self.event is not None
+            if __exc_type is not None:
+                self.set_tag("error", __exc_type.__name__)
+            self.recorder.finish(self.event)
+
+    def __init__(self, recorder: TraceRecorder):
+        self.recorder = recorder
+
+    @classmethod
+    def new(cls) -> _TraceImpl | None:
+        recorder = TraceRecorder.instance()
+        if recorder is not None:
+            return cls(recorder)
+        return None
+
+    def make_transaction(self, name: str, tags: dict[str, Any] | None) -> TaggableContext | None:
+        return self.__class__.TraceCtx(self.recorder, name, "transaction", tags)
+
+    def make_span(self, op: str, description: str, tags: dict[str, Any] | None) -> TaggableContext | None:
+        return self.__class__.TraceCtx(self.recorder, description, op, tags)
+
+
 class _Ctx(TaggableContext):
     impls: ClassVar[Iterable[_ProfilingImplementation] | None] = None
 
@@ -182,4 +229,4 @@ def notnone(x):
 
 def make_impls():
     # return [_LogImpl(), _SentryImpl()]
-    return [_SentryImpl()]
+    return [_SentryImpl(), _TraceImpl.new()]
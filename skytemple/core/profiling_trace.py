@@ -0,0 +1,213 @@
+"""Records profiling transactions and spans in memory and exports them for local analysis."""
+
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+ENV_SKYTEMPLE_TRACE = "SKYTEMPLE_TRACE"
+
+
+@dataclass
+class TraceEvent:
+    name: str
+    # "transaction" for transactions, the op of the span otherwise.
+    category: str
+    thread_id: int
+    thread_name: str
+    # Nanoseconds, relative to the start of the recorder.
+    start: int
+    end: int = -1
+    tags: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.category}: {self.name}"
+
+
+class TraceRecorder:
+    """
+    Collects all finished transactions and spans of the application.
+
+    Enabled by setting the environment variable ``SKYTEMPLE_TRACE`` (or passing ``--trace``) to a file path.
+    When SkyTemple exits, the recorded events are written to that path as a Chrome trace (for ``chrome://tracing``
+    or Perfetto), next to it as a speedscope profile (``.speedscope.json``) and as a table of span
+    durations (``.txt``).
+    """
+
+    _instance: TraceRecorder | None = None
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._events: list[TraceEvent] = []
+
+    @classmethod
+    def instance(cls) -> TraceRecorder | None:
+        """The recorder of the application or None, if tracing is not enabled."""
+        if cls._instance is None and os.environ.get(ENV_SKYTEMPLE_TRACE):
+            cls.enable(os.environ[ENV_SKYTEMPLE_TRACE])
+        return cls._instance
+
+    @classmethod
+    def enable(cls, path: str | None = None) -> TraceRecorder:
+        if cls._instance is None:
+            cls._instance = cls(path)
+            from skytemple.core.profiling import reset_impls_cache
+
+            reset_impls_cache()
+        return cls._instance
+
+    def start(self, name: str, category: str) -> TraceEvent:
+        thread = threading.current_thread()
+        return TraceEvent(name, category, thread.ident or 0, thread.name, self._now())
+
+    def finish(self, event: TraceEvent):
+        event.end = self._now()
+        with self._lock:
+            self._events.append(event)
+
+    def events(self) -> list[TraceEvent]:
+        with self._lock:
+            return sorted(self._events, key=lambda e: (e.start, -e.end))
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        events = self.events()
+        trace_events: list[dict[str, Any]] = []
+        threads = {}
+        for event in events:
+            threads[event.thread_id] = event.thread_name
+            trace_events.append(
+                {
+                    "name": event.name,
+                    "cat": event.category,
+                    "ph": "X",
+                    "ts": event.start / 1000,
+                    "dur": (event.end - event.start) / 1000,
+                    "pid": os.getpid(),
+                    "tid": event.thread_id,
+                    "args": event.tags,
+                }
+            )
+        for thread_id, thread_name in threads.items():
+            trace_events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": thread_id,
+                    "args": {"name": thread_name},
+                }
+            )
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def to_speedscope(self) -> dict[str, Any]:
+        frames: list[dict[str, str]] = []
+        frame_ids: dict[str, int] = {}
+        by_thread: dict[int, list[TraceEvent]] = {}
+        for event in self.events():
+            by_thread.setdefault(event.thread_id, []).append(event)
+        profiles = []
+        for thread_events in by_thread.values():
+            opened: list[TraceEvent] = []
+            sc_events: list[dict[str, Any]] = []
+            for event in thread_events:
+                while opened and opened[-1].end <= event.start:
+                    self._close_frame(sc_events, opened.pop(), frame_ids)
+                if opened and event.end > opened[-1].end:
+                    # Overlaps without nesting (eg. interleaved coroutines). Speedscope can't show those.
+                    continue
+                if event.key not in frame_ids:
+                    frame_ids[event.key] = len(frames)
+                    frames.append({"name": event.key})
+                sc_events.append({"type": "O", "frame": frame_ids[event.key], "at": event.start / 1000})
+                opened.append(event)
+            while opened:
+                self._close_frame(sc_events, opened.pop(), frame_ids)
+            profiles.append(
+                {
+                    "type": "evented",
+                    "name": thread_events[0].thread_name,
+                    "unit": "microseconds",
+                    "startValue": thread_events[0].start / 1000,
+                    "endValue": max(e.end for e in thread_events) / 1000,
+                    "events": sc_events,
+                }
+            )
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+            "name": "SkyTemple",
+            "exporter": "skytemple",
+        }
+
+    def summary(self) -> list[tuple[str, int, float, float, float]]:
+        """Per transaction/span name: count, total, p50 and p95 duration (in milliseconds), slowest total first."""
+        durations: dict[str, list[float]] = {}
+        for event in self.events():
+            durations.setdefault(event.key, []).append((event.end - event.start) / 1_000_000)
+        rows = []
+        for key, values in durations.items():
+            values.sort()
+            rows.append((key, len(values), sum(values), _percentile(values, 50), _percentile(values, 95)))
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+    def summary_table(self) -> str:
+        rows = self.summary()
+        width = max([len(row[0]) for row in rows] + [4])
+        lines = [f"{'name':<{width}} {'count':>7} {'total ms':>11} {'p50 ms':>9} {'p95 ms':>9}"]
+        for key, count, total, p50, p95 in rows:
+            lines.append(f"{key:<{width}} {count:>7} {total:>11.2f} {p50:>9.2f} {p95:>9.2f}")
+        return "\n".join(lines)
+
+    def export(self, path: str | None = None):
+        """Writes the Chrome trace to the path and the speedscope profile and table next to it."""
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path to export the trace to.")
+        base, _ = os.path.splitext(path)
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+        with open(base + ".speedscope.json", "w") as f:
+            json.dump(self.to_speedscope(), f)
+        with open(base + ".txt", "w") as f:
+            f.write(self.summary_table() + "\n")
+        logger.info(f"Wrote profiling trace to {path}.")
+
+    def _now(self) -> int:
+        return time.perf_counter_ns() - self._origin
+
+    @staticmethod
+    def _close_frame(sc_events: list[dict[str, Any]], event: TraceEvent, frame_ids: dict[str, int]):
+        sc_events.append({"type": "C", "frame": frame_ids[event.key], "at": event.end / 1000})
+
+
+def _percentile(sorted_values: list[float], percent: int) -> float:
+    index = max(0, -(-len(sorted_values) * percent // 100) - 1)
+    return sorted_values[index]
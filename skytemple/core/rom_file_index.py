@@ -0,0 +1,97 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+from ndspy.fnt import Folder
+
+
+class RomFileIndex:
+    """
+    Index of the paths in the filename table of a ROM.
+
+    Answers the same queries as walking the ndspy filename tree (``get_files_from_rom_with_extension`` and friends),
+    with the same ordering, without walking the tree each time. Must be told about files and folders that are
+    created (``add_file``, ``add_folder``) or rebuilt if the filename table is changed in any other way.
+    """
+
+    def __init__(self, root: Folder):
+        self._root = root
+        self._files: set[str] = set()
+        self._folders: dict[str, Folder] = {}
+        # All file paths in the order the filename tree is walked. Rebuilt lazily after files were added.
+        self._ordered_files: list[str] | None = None
+        # (ext, folder) -> result of get_files_with_ext
+        self._by_ext: dict[tuple[str, str | None], list[str]] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        self._files = set()
+        self._folders = {"": self._root}
+        self._ordered_files = []
+        self._by_ext = {}
+        self._walk("", self._root)
+
+    def add_file(self, path: str):
+        self._files.add(_normalize(path))
+        self._ordered_files = None
+        self._by_ext = {}
+
+    def add_folder(self, path: str, folder: Folder):
+        self._folders[_normalize(path)] = folder
+
+    def exists(self, path: str) -> bool:
+        """Whether a file or folder with this path exists."""
+        path = _normalize(path)
+        return path in self._files or path in self._folders
+
+    def folder(self, path: str) -> Folder | None:
+        return self._folders.get(_normalize(path))
+
+    def files_with_ext(self, ext: str, folder_name: str | None = None) -> list[str]:
+        """
+        Paths of all files ending with the extension (all files, if ``ext`` is empty), recursively.
+        If a folder is given, the paths are relative to it.
+        """
+        key = (ext, None if folder_name is None else _normalize(folder_name))
+        if key not in self._by_ext:
+            self._by_ext[key] = self._collect(*key)
+        return list(self._by_ext[key])
+
+    def _collect(self, ext: str, folder_name: str | None) -> list[str]:
+        if self._ordered_files is None:
+            self.rebuild()
+        assert self._ordered_files is not None
+        suffix = "." + ext
+        prefix = "" if not folder_name else folder_name + "/"
+        return [
+            path[len(prefix) :]
+            for path in self._ordered_files
+            if path.startswith(prefix) and (ext == "" or path.endswith(suffix))
+        ]
+
+    def _walk(self, path: str, folder: Folder):
+        assert self._ordered_files is not None
+        for name in folder.files:
+            self._files.add(path + name)
+            self._ordered_files.append(path + name)
+        for name, subfolder in folder.folders:
+            self._folders[path + name] = subfolder
+            self._walk(path + name + "/", subfolder)
+
+
+def _normalize(path: str) -> str:
+    return path.strip("/")
@@ -0,0 +1,114 @@
+"""Journal of the regions an in-place ROM save overwrites, used to recover from interrupted saves."""
+
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import zlib
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MAGIC = b"STJ\x01"
+_HEADER = struct.Struct("<4sII")
+_ENTRY = struct.Struct("<III")
+_TRAILER = struct.Struct("<I")
+
+
+class JournalEntry(NamedTuple):
+    offset: int
+    old: bytes
+    new: bytes
+
+
+class RomJournal:
+    """
+    A list of regions in the ROM file together with their content before and after a save.
+
+    The journal is written (and synced) completely before the ROM file is touched. If a journal is found
+    for a ROM, the save was interrupted: Applying the old contents rolls the ROM back to the state before the
+    save, applying the new contents finishes the save.
+    """
+
+    def __init__(self, rom_size: int, entries: list[JournalEntry]):
+        self.rom_size = rom_size
+        self.entries = entries
+
+    @classmethod
+    def read(cls, path: str) -> RomJournal | None:
+        """Reads a journal. Returns None if it was not written completely (the ROM was then never touched)."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < _HEADER.size + _TRAILER.size:
+                return None
+            (crc,) = _TRAILER.unpack_from(data, len(data) - _TRAILER.size)
+            if zlib.crc32(data[: -_TRAILER.size]) != crc:
+                return None
+            magic, rom_size, count = _HEADER.unpack_from(data, 0)
+            if magic != JOURNAL_MAGIC:
+                return None
+            entries = []
+            cursor = _HEADER.size
+            for _ in range(count):
+                offset, old_len, new_len = _ENTRY.unpack_from(data, cursor)
+                cursor += _ENTRY.size
+                old = data[cursor : cursor + old_len]
+                cursor += old_len
+                new = data[cursor : cursor + new_len]
+                cursor += new_len
+                entries.append(JournalEntry(offset, old, new))
+            return cls(rom_size, entries)
+        except (OSError, struct.error) as ex:
+            logger.warning(f"Failed to read ROM save journal {path}.", exc_info=ex)
+            return None
+
+    def write(self, path: str):
+        data = bytearray(_HEADER.pack(JOURNAL_MAGIC, self.rom_size, len(self.entries)))
+        for entry in self.entries:
+            data += _ENTRY.pack(entry.offset, len(entry.old), len(entry.new))
+            data += entry.old
+            data += entry.new
+        data += _TRAILER.pack(zlib.crc32(data))
+        with open(path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def matches(self, rom_fn: str) -> bool:
+        """Whether this journal can be applied to the given ROM file. In-place saves never change the ROM size."""
+        return os.path.exists(rom_fn) and os.path.getsize(rom_fn) == self.rom_size
+
+    def replay(self, rom_fn: str):
+        """Writes the new contents of all regions to the ROM."""
+        self._apply(rom_fn, [(entry.offset, entry.new) for entry in self.entries])
+
+    def rollback(self, rom_fn: str):
+        """Writes the old contents of all regions back to the ROM."""
+        self._apply(rom_fn, [(entry.offset, entry.old) for entry in reversed(self.entries)])
+
+    @staticmethod
+    def _apply(rom_fn: str, writes: list[tuple[int, bytes]]):
+        with open(rom_fn, "r+b") as f:
+            for offset, data in writes:
+                f.seek(offset)
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
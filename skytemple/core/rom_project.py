@@ -16,11 +16,13 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+import contextvars
 import logging
 import os
 import shutil
 import struct
 import sys
+import threading
 from enum import Enum, auto
 from typing import (
     TYPE_CHECKING,
@@ -30,6 +32,7 @@ from typing import (
     Literal,
 )
 from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 
 from gi.repository import GLib, Gtk
@@ -40,12 +43,8 @@ from skytemple_files.common.project_file_manager import ProjectFileManager
 from skytemple_files.common.types.data_handler import DataHandler, T
 from skytemple_files.common.types.file_types import FileType
 from skytemple_files.common.util import (
-    get_files_from_rom_with_extension,
-    get_rom_folder,
     create_file_in_rom,
     get_ppmdu_config_for_rom,
-    get_files_from_folder_with_extension,
-    folder_in_rom_exists,
     create_folder_in_rom,
     get_binary_from_rom,
     set_binary_in_rom,
@@ -60,23 +59,31 @@ from skytemple_files.user_error import mark_as_user_err, UserValueError
 from skytemple.core.abstract_module import AbstractModule
 from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
 from skytemple.core.item_tree import ItemTreeEntryRef
+from skytemple.core.mapped_rom import MappedNintendoDSRom
 from skytemple.core.message_dialog import SkyTempleMessageDialog
 from skytemple.core.model_context import ModelContext
+from skytemple.core.model_cache import ModelCache
 from skytemple.core.modules import Modules
 from skytemple.core.open_request import OpenRequest
 from skytemple.core.profiling import record_transaction, record_span, TaggableContext
+from skytemple.core.rom_file_index import RomFileIndex
+from skytemple.core.rom_journal import RomJournal
+from skytemple.core.settings import SkyTempleSettingsStore
 from skytemple.core.sprite_provider import SpriteProvider
 from skytemple.core.string_provider import StringProvider, StringType
 from skytemple.core.ui_utils import assert_not_none
 
 logger = logging.getLogger(__name__)
 BACKUP_NAME = ".~backup.bin"
+JOURNAL_NAME = ".~journal.bin"
+SAVE_WORKERS = min(8, os.cpu_count() or 1)
+LOAD_WORKERS = min(8, os.cpu_count() or 1)
 
 if TYPE_CHECKING:
     from skytemple.controller.main import MainController
     from skytemple.module.rom.module import RomModule
 
-from contextlib import nullcontext, AbstractContextManager
+from contextlib import nullcontext, AbstractContextManager, contextmanager
 
 
 class BinaryName(Enum):
@@ -124,12 +131,16 @@ class RomProject:
         Open a file (in a new thread).
         If the main controller is set, it will be informed about this.
         """
-        # First check for a backup file from last save.
+        # First check for a backup file or journal from last save.
         backup_fn = os.path.join(ProjectFileManager(filename).dir(), BACKUP_NAME)
         if os.path.exists(backup_fn):
             cls.handle_backup_restore(filename, backup_fn, main_controller)
+        journal_fn = os.path.join(ProjectFileManager(filename).dir(), JOURNAL_NAME)
+        if os.path.exists(journal_fn):
+            cls.handle_journal_restore(filename, journal_fn, main_controller)
 
-        AsyncTaskDelegator.run_task(cls._open_impl(filename, main_controller))
+        # Not threadsafe: Loading the modules creates models and UI state on the main thread.
+        AsyncTaskDelegator.run_task(cls._open_impl(filename, main_controller), threadsafe=False)
 
     @classmethod
     async def _open_impl(cls, filename, main_controller: "MainController"):
@@ -185,9 +196,54 @@ class RomProject:
         else:
             os.unlink(backup_fn)
 
+    @classmethod
+    def handle_journal_restore(cls, rom_fn: str, journal_fn: str, main_controller: "MainController"):
+        journal = RomJournal.read(journal_fn)
+        if journal is None or not journal.matches(rom_fn):
+            # The journal was not written completely, which means the ROM was not touched yet.
+            logger.warning(f"Discarding incomplete save journal {journal_fn}.")
+            os.unlink(journal_fn)
+            return
+        dialog: Gtk.MessageDialog = SkyTempleMessageDialog(
+            main_controller.window(),
+            Gtk.DialogFlags.MODAL,
+            Gtk.MessageType.WARNING,
+            Gtk.ButtonsType.NONE,
+            _(
+                "There was a save journal for this ROM found. This indicates that the ROM was corrupted when SkyTemple tried to save it last."
+            ),
+        )
+        as_is: Gtk.Widget = dialog.add_button(_("No, load ROM as-is"), 0)
+        as_is.get_style_context().add_class("destructive-action")
+        dialog.add_button(_("Undo last save"), 1)
+        dialog.add_button(_("Finish last save"), 2)
+
+        dialog.format_secondary_text(
+            _(
+                "Do you want to repair the ROM?\n"
+                "If you select 'Undo last save', the ROM is restored to the state before the interrupted save.\n"
+                "If you select 'Finish last save', the rest of the interrupted save is written to the ROM.\n"
+                "If you select 'No, load ROM as-is', the journal will be deleted and SkyTemple will attempt to load the (potentially) corrupted ROM file."
+            )
+        )
+        response = dialog.run()
+        dialog.destroy()
+        if response == 1:
+            journal.rollback(rom_fn)
+        elif response == 2:
+            journal.replay(rom_fn)
+        os.unlink(journal_fn)
+
     def __init__(self, filename: str, cb_open_view: Callable[[ItemTreeEntryRef], None]):
         self.filename = filename
         self._rom: NintendoDSRom | None = None
+        self._file_index: RomFileIndex | None = None
+        # Working copies of the binaries (arm9, overlays), by section name. See get_binary / modify_binary.
+        self._binaries: dict[str, bytearray] = {}
+        self._dirty_binaries: dict[str, SectionProtocol] = {}
+        # Immutable copies of the working copies returned by get_binary, until the binary is modified.
+        self._binary_snapshots: dict[str, bytes] = {}
+        self._binaries_lock = threading.RLock()
         self._rom_module: Optional["RomModule"] = None
         self._loaded_modules: dict[str, AbstractModule] = {}
         self._sprite_renderer: SpriteProvider | None = None
@@ -195,6 +251,9 @@ class RomProject:
         # Dict of filenames -> models
         self._opened_files: dict[str, Any] = {}
         self._opened_files_contexts: dict[str, ModelContext] = {}
+        # Locks per filename, held while a file is opened. Modules are loaded concurrently, see load.
+        self._open_locks: dict[str, threading.Lock] = {}
+        self._open_locks_lock = threading.Lock()
         # List of filenames that were requested to be opened threadsafe.
         self._files_threadsafe: list[str] = []
         self._files_unsafe: list[str] = []
@@ -207,6 +266,8 @@ class RomProject:
         # Callback for opening views using iterators from the main view list.
         self._cb_open_view: Callable[[ItemTreeEntryRef], None] = cb_open_view
         self._project_fm = ProjectFileManager(filename)
+        # Optional on-disk cache of deserialized models
+        self._model_cache: ModelCache | None = None
 
         self._icon_banner: IconBanner | None = None
 
@@ -215,10 +276,16 @@ class RomProject:
 
     async def load(self, transaction: TaggableContext | None = None):
         """Load the ROM into memory and initialize all modules"""
+        settings = SkyTempleSettingsStore()
         with record_span("rom", "load"):
-            with record_span("rom", "open-file"):
+            with record_span("rom", "open-file") as span:
                 try:
-                    self._rom = NintendoDSRom.fromFile(self.filename)
+                    if settings.get_memory_mapped_rom():
+                        # Only map the file, files are read from it when they are first requested.
+                        span.set_tag("rom-backing", "mapped")
+                        self._rom = MappedNintendoDSRom.fromFile(self.filename)
+                    else:
+                        self._rom = NintendoDSRom.fromFile(self.filename)
                 except OSError as e:
                     mark_as_user_err(e)
                     raise e
@@ -228,7 +295,11 @@ class RomProject:
                         + " "
                         + _('Are you sure you provided a ROM? A ROM usually has the file extension ".nds".')
                     )
+            with record_span("rom", "index-files"):
+                self._file_index = RomFileIndex(self._rom.filenames)
             await AsyncTaskDelegator.buffer()
+            if settings.get_model_cache_enabled():
+                self._model_cache = ModelCache.for_project(self._project_fm)
             self._loaded_modules = {}
 
             with record_span("rom", "load-static-data"):
@@ -237,14 +308,12 @@ class RomProject:
                 if transaction is not None:
                     transaction.set_tag("rom-edition", self._rom_module.get_static_data().game_edition)
             with record_span("sys", "init-modules"):
-                for name, module in Modules.all().items():
-                    logger.debug(f"Loading module {name} for ROM...")
-                    if name == "rom":
-                        continue
-                    else:
-                        with record_span("init-module", module.__name__):
-                            self._loaded_modules[name] = module(self)
-                    await AsyncTaskDelegator.buffer()
+                with ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="skytemple-load") as pool:
+                    futures = self._submit_module_inits(pool)
+                    # Join in dependency order, so the modules are stored in the same order as before.
+                    for name, future in futures.items():
+                        self._loaded_modules[name] = future.result()
+                        await AsyncTaskDelegator.buffer()
 
             with record_span("ui", "load-sprite-provider"):
                 self._sprite_renderer = SpriteProvider(self)
@@ -254,6 +323,32 @@ class RomProject:
             await AsyncTaskDelegator.buffer()
             self._icon_banner = IconBanner(self._rom)
 
+    def _submit_module_inits(self, pool: ThreadPoolExecutor) -> dict[str, Future[AbstractModule]]:
+        """
+        Construct all modules (except the ROM module) in the pool. A module is only constructed after
+        the modules it depends on.
+        The modules are submitted in dependency order, so a task only ever waits for tasks that were already
+        picked up by a worker and the pool can't deadlock.
+        """
+        futures: dict[str, Future[AbstractModule]] = {}
+        for name, module in Modules.all().items():
+            if name == "rom":
+                continue
+            dependencies = [futures[dep] for dep in module.depends_on() if dep in futures]
+            # Each task runs in a copy of the current context, so the spans stay attached to the load transaction.
+            futures[name] = pool.submit(contextvars.copy_context().run, self._init_module, name, module, dependencies)
+        return futures
+
+    def _init_module(
+        self, name: str, module: type[AbstractModule], dependencies: list[Future[AbstractModule]]
+    ) -> AbstractModule:
+        for dependency in dependencies:
+            # Re-raises if the dependency failed.
+            dependency.result()
+        logger.debug(f"Loading module {name} for ROM...")
+        with record_span("init-module", module.__name__):
+            return module(self)
+
     def get_rom_module(self) -> "RomModule":
         assert self._rom_module is not None
         return self._rom_module
@@ -268,6 +363,27 @@ class RomProject:
             return iter(list(self._loaded_modules.values()) + [self._rom_module])
         return iter(self._loaded_modules.values())
 
+    def prefetch_module_files(self):
+        """
+        Open the files the modules hinted at (see ``AbstractModule.prefetch_hints``) in a background thread.
+        Should be called after the item tree is shown.
+        """
+        threading.Thread(target=self._prefetch_module_files, name="skytemple-prefetch", daemon=True).start()
+
+    def _prefetch_module_files(self):
+        with record_span("sys", "prefetch-module-files"):
+            for module in self.get_modules():
+                for attr in module.prefetch_hints():
+                    if RomProject._current is not self:
+                        # Another ROM was opened in the meantime.
+                        return
+                    with record_span("prefetch-module-file", f"{module.__class__.__name__}.{attr}"):
+                        try:
+                            getattr(module, attr)
+                        except Exception as ex:
+                            # The error is raised again when the file is actually needed.
+                            logger.warning(f"Failed to prefetch {attr} of {module.__class__.__name__}.", exc_info=ex)
+
     if TYPE_CHECKING:
         from skytemple.module.rom.module import RomModule
         from skytemple.module.bgp.module import BgpModule
@@ -399,14 +515,22 @@ class RomProject:
         Additional keyword arguments are passed to the handler (if the model isn't already loaded!!)
         The keyword arguments will also be used for serializing again.
         """
-        if file_path_in_rom not in self._opened_files:
-            with record_span("open-rom-file", file_handler_class.__name__):
-                assert self._rom is not None
-                bin = self._rom.getFileByName(file_path_in_rom)
-                self._opened_files[file_path_in_rom] = file_handler_class.deserialize(bin, **kwargs)
-                self._file_handlers[file_path_in_rom] = file_handler_class
-                self._file_handler_kwargs[file_path_in_rom] = kwargs
-        return self._open_common(file_path_in_rom, threadsafe)
+        with self._open_lock(file_path_in_rom):
+            if file_path_in_rom not in self._opened_files:
+                with record_span("open-rom-file", file_handler_class.__name__):
+                    assert self._rom is not None
+                    bin = self._rom.getFileByName(file_path_in_rom)
+                    model = None
+                    if self._model_cache is not None:
+                        model = self._model_cache.load(file_path_in_rom, bin, file_handler_class, kwargs)
+                    if model is None:
+                        model = file_handler_class.deserialize(bin, **kwargs)
+                        if self._model_cache is not None:
+                            self._model_cache.store(file_path_in_rom, bin, file_handler_class, kwargs, model)
+                    self._opened_files[file_path_in_rom] = model
+                    self._file_handlers[file_path_in_rom] = file_handler_class
+                    self._file_handler_kwargs[file_path_in_rom] = kwargs
+            return self._open_common(file_path_in_rom, threadsafe)
 
     def open_sir0_file_in_rom(
         self,
@@ -424,24 +548,32 @@ class RomProject:
 
         If ``threadsafe`` is True, instead of returning the model, a ModelContext[T] is returned.
         """
-        if file_path_in_rom not in self._opened_files:
-            with record_span("open-sir0-rom-file", sir0_serializable_type.__name__):
-                assert self._rom is not None
-                bin = self._rom.getFileByName(file_path_in_rom)
-                sir0 = FileType.SIR0.deserialize(bin)
-                self._opened_files[file_path_in_rom] = FileType.SIR0.unwrap_obj(sir0, sir0_serializable_type)
-                self._file_handlers[file_path_in_rom] = FileType.SIR0
-                self._file_handler_kwargs[file_path_in_rom] = {}
-        return self._open_common(file_path_in_rom, threadsafe)
+        with self._open_lock(file_path_in_rom):
+            if file_path_in_rom not in self._opened_files:
+                with record_span("open-sir0-rom-file", sir0_serializable_type.__name__):
+                    assert self._rom is not None
+                    bin = self._rom.getFileByName(file_path_in_rom)
+                    sir0 = FileType.SIR0.deserialize(bin)
+                    self._opened_files[file_path_in_rom] = FileType.SIR0.unwrap_obj(sir0, sir0_serializable_type)
+                    self._file_handlers[file_path_in_rom] = FileType.SIR0
+                    self._file_handler_kwargs[file_path_in_rom] = {}
+            return self._open_common(file_path_in_rom, threadsafe)
 
     def open_sprconf(self, threadsafe=False):
         """Opens the MONSTER/sprconf.json if it exists, if not it creates it first."""
-        if SPRCONF_FILENAME not in self._opened_files:
-            assert self._rom is not None
-            self._opened_files[SPRCONF_FILENAME] = FileType.SPRCONF.load(self._rom)
-            self._file_handlers[SPRCONF_FILENAME] = FileType.SPRCONF
-            self._file_handler_kwargs[SPRCONF_FILENAME] = {}
-        return self._open_common(SPRCONF_FILENAME, threadsafe)
+        with self._open_lock(SPRCONF_FILENAME):
+            if SPRCONF_FILENAME not in self._opened_files:
+                assert self._rom is not None
+                self._opened_files[SPRCONF_FILENAME] = FileType.SPRCONF.load(self._rom)
+                self._file_handlers[SPRCONF_FILENAME] = FileType.SPRCONF
+                self._file_handler_kwargs[SPRCONF_FILENAME] = {}
+            return self._open_common(SPRCONF_FILENAME, threadsafe)
+
+    def _open_lock(self, file_path_in_rom: str) -> threading.Lock:
+        with self._open_locks_lock:
+            if file_path_in_rom not in self._open_locks:
+                self._open_locks[file_path_in_rom] = threading.Lock()
+            return self._open_locks[file_path_in_rom]
 
     def _open_common(self, file_path_in_rom: str, threadsafe):
         if threadsafe:
@@ -461,6 +593,9 @@ class RomProject:
     def is_opened(self, filename):
         return filename in self._opened_files
 
+    def is_modified(self, filename):
+        return filename in self._modified_files
+
     def mark_as_modified(self, file: str | object):
         """Mark a file as modified, either by filename or model. TODO: Input checking"""
         if isinstance(file, str):
@@ -480,7 +615,9 @@ class RomProject:
 
     def save(self, main_controller: Optional["MainController"]):
         """Save the rom. The main controller will be informed about this, if given."""
-        AsyncTaskDelegator.run_task(self._save_impl(main_controller))
+        # Not threadsafe: Edits on the main thread must not happen between serializing the models
+        # and resetting the list of modified files.
+        AsyncTaskDelegator.run_task(self._save_impl(main_controller), threadsafe=False)
 
     def open_file_manually(self, filename: str):
         """Returns the raw bytes of a file. GENERALLY NOT RECOMMENDED."""
@@ -507,15 +644,15 @@ class RomProject:
         """
         assert self._rom is not None
         create_file_in_rom(self._rom, filename, data)
+        self._get_file_index().add_file(filename)
         self.force_mark_as_modified()
 
     async def _save_impl(self, main_controller: Optional["MainController"]):
         with record_transaction("__save-rom"):
             try:
                 with record_span("rom", "serialize-open"):
-                    for name in self._modified_files:
-                        self.prepare_save_model(name)
-                        await AsyncTaskDelegator.buffer()
+                    self.prepare_save_models(self._modified_files)
+                await AsyncTaskDelegator.buffer()
                 self._modified_files = []
                 with record_span("rom", "save-banner"):
                     if self._icon_banner:
@@ -541,6 +678,23 @@ class RomProject:
         If assert_that is given, it is asserted, that the model matches the one on record.
         """
         assert self._rom is not None
+        self._rom.setFileByName(name, self._serialize_model(name, assert_that))
+
+    def prepare_save_models(self, names: list[str]):
+        """
+        Write the binary models for all the given files to the ROM object in memory.
+        The models are serialized in parallel, the files are written to the ROM in the given order on the
+        calling thread.
+        """
+        assert self._rom is not None
+        with ThreadPoolExecutor(max_workers=SAVE_WORKERS, thread_name_prefix="skytemple-save") as pool:
+            # Each task runs in a copy of the current context, so the spans stay attached to the save transaction.
+            futures = [pool.submit(contextvars.copy_context().run, self._serialize_model, name) for name in names]
+            for name, future in zip(names, futures):
+                self._rom.setFileByName(name, future.result())
+
+    def _serialize_model(self, name, assert_that=None) -> bytes:
+        """Serialize the model of the file. Threadsafe models are serialized while holding their context."""
         context: AbstractContextManager = (
             self._opened_files_contexts[name]
             if name in self._opened_files_contexts
@@ -555,12 +709,21 @@ class RomProject:
                     model = FileType.SIR0.wrap_obj(model)
                 if assert_that is not None:
                     assert assert_that is model, "The model that is being saved must match!"
-                binary_data = handler.serialize(model, **self._file_handler_kwargs[name])
-                self._rom.setFileByName(name, binary_data)
+                return handler.serialize(model, **self._file_handler_kwargs[name])
 
     def save_as_is(self):
         """Simply save the current ROM to disk."""
         assert self._rom is not None
+        self.flush_binaries()
+        if isinstance(self._rom, MappedNintendoDSRom):
+            # Try to only write back what changed. This is protected by a journal of the overwritten regions
+            # instead of a full backup.
+            journal_fn = os.path.join(self.get_project_file_manager().dir(), JOURNAL_NAME)
+            with record_span("rom", "save-in-place") as span:
+                saved_in_place = self._rom.save_in_place(self.filename, journal_fn)
+                span.set_tag("in-place", saved_in_place)
+            if saved_in_place:
+                return
         # First copy current ROM to a temp file.
         backup_fn = os.path.join(self.get_project_file_manager().dir(), BACKUP_NAME)
         # When doing "Save As..." the file may not exist yet.
@@ -573,23 +736,29 @@ class RomProject:
             os.unlink(backup_fn)
 
     def get_files_with_ext(self, ext, folder_name: str | None = None):
-        assert self._rom is not None
-        if folder_name is None:
-            return get_files_from_rom_with_extension(self._rom, ext)
-        else:
-            folder = self._rom.filenames.subfolder(folder_name)
-            if folder is None:
-                return []
-            return get_files_from_folder_with_extension(folder, ext)
+        """
+        Returns the paths to all files in the ROM (or the given folder) ending with the extension.
+        If a folder is given, the paths are relative to it.
+        """
+        return self._get_file_index().files_with_ext(ext, folder_name)
 
     def get_rom_folder(self, path):
-        assert self._rom is not None
-        return get_rom_folder(self._rom, path)
+        return self._get_file_index().folder(path)
 
     def file_exists(self, path):
-        """Check if a file exists"""
-        assert self._rom is not None
-        return path in self._rom.filenames
+        """Check if a file (or folder) exists"""
+        return self._get_file_index().exists(path)
+
+    def rebuild_file_index(self):
+        """
+        Rebuilds the index of the ROM filesystem. Must be called after the filesystem was changed other than through
+        this project (eg. by applying patches).
+        """
+        self._get_file_index().rebuild()
+
+    def _get_file_index(self) -> RomFileIndex:
+        assert self._file_index is not None
+        return self._file_index
 
     def create_new_file(self, new_filename, model, file_handler_class: type[DataHandler[T]], **kwargs):
         """Creates a new file in the ROM and fills it with the model content provided and
@@ -597,6 +766,7 @@ class RomProject:
         assert self._rom is not None
         copy_bin = file_handler_class.serialize(model, **kwargs)
         create_file_in_rom(self._rom, new_filename, copy_bin)
+        self._get_file_index().add_file(new_filename)
         self._opened_files[new_filename] = file_handler_class.deserialize(copy_bin, **kwargs)
         self._file_handlers[new_filename] = file_handler_class
         self._file_handler_kwargs[new_filename] = kwargs
@@ -605,8 +775,9 @@ class RomProject:
     def ensure_dir(self, dir_name):
         """Makes sure the specified directory exists in the ROM-FS. If not, it is created."""
         assert self._rom is not None
-        if not folder_in_rom_exists(self._rom, dir_name):
+        if self._get_file_index().folder(dir_name) is None:
             create_folder_in_rom(self._rom, dir_name)
+            self._get_file_index().add_folder(dir_name, assert_not_none(self._rom.filenames.subfolder(dir_name)))
 
     def load_rom_data(self):
         assert self._rom is not None
@@ -638,33 +809,91 @@ class RomProject:
         if self._patcher is None:
             assert self._rom is not None
             self._patcher = Patcher(self._rom, self.get_rom_module().get_static_data())
+        # The patcher works on the ROM directly, so it needs to see all edits to the binaries.
+        self.flush_binaries()
         return self._patcher
 
-    def get_binary(self, binary: SectionProtocol | BinaryName | str) -> bytes:
+    @contextmanager
+    def direct_rom_access(self) -> Iterator[NintendoDSRom]:
+        """
+        Context for code that works on the ROM object directly instead of through the project (eg. applying patches).
+        Pending edits to binaries are written to the ROM before, and all cached state derived from the ROM is
+        discarded after.
+        """
         assert self._rom is not None
-        if isinstance(binary, str) or isinstance(binary, BinaryName):
-            the_binary = getattr(self.get_rom_module().get_static_data().bin_sections, str(binary))
-        else:
-            the_binary = binary
-        return get_binary_from_rom(self._rom, the_binary)
+        self.flush_binaries()
+        try:
+            yield self._rom
+        finally:
+            with self._binaries_lock:
+                self._binaries = {}
+                self._binary_snapshots = {}
+            self.rebuild_file_index()
+
+    def get_binary(self, binary: SectionProtocol | BinaryName | str) -> bytes:
+        """
+        Returns one of the binaries (such as arm9 or overlay), as it is now; later modifications are not reflected.
+        The copy is shared by all calls until the binary is modified.
+        """
+        the_binary = self._resolve_binary(binary)
+        with self._binaries_lock:
+            snapshot = self._binary_snapshots.get(the_binary.name)
+            if snapshot is None:
+                snapshot = bytes(self._get_binary_buffer(the_binary))
+                self._binary_snapshots[the_binary.name] = snapshot
+            return snapshot
 
     def modify_binary(
         self,
         binary: SectionProtocol | BinaryName | str,
         modify_cb: Callable[[bytearray], None],
     ):
-        """Modify one of the binaries (such as arm9 or overlay) and save it to the ROM"""
-        assert self._rom is not None
-        if isinstance(binary, str) or isinstance(binary, BinaryName):
-            the_binary = getattr(self.get_rom_module().get_static_data().bin_sections, str(binary))
-        else:
-            the_binary = binary
-        with record_span("modify-binary", the_binary.name):
-            data = bytearray(self.get_binary(the_binary))
+        """
+        Modify one of the binaries (such as arm9 or overlay). The binary is edited in place, the changes are
+        written back to the ROM when it is saved (or when the ROM is accessed directly, see flush_binaries).
+        """
+        with self.binary_transaction(binary) as data:
             modify_cb(data)
-            set_binary_in_rom(self._rom, the_binary, data)
+
+    @contextmanager
+    def binary_transaction(self, binary: SectionProtocol | BinaryName | str) -> Iterator[bytearray]:
+        """
+        Context manager for applying several edits to one of the binaries at once.
+        Yields the working copy of the binary; it must not be resized or used after the context exits.
+        """
+        the_binary = self._resolve_binary(binary)
+        with record_span("modify-binary", the_binary.name):
+            with self._binaries_lock:
+                data = self._get_binary_buffer(the_binary)
+                try:
+                    yield data
+                finally:
+                    # Even a failed edit may already have changed the working copy.
+                    self._dirty_binaries[the_binary.name] = the_binary
+                    self._binary_snapshots.pop(the_binary.name, None)
             self.force_mark_as_modified()
 
+    def flush_binaries(self):
+        """Writes all modified binaries back to the ROM."""
+        assert self._rom is not None
+        with self._binaries_lock:
+            for name, section in self._dirty_binaries.items():
+                with record_span("flush-binary", name):
+                    set_binary_in_rom(self._rom, section, bytes(self._binaries[name]))
+            self._dirty_binaries = {}
+
+    def _resolve_binary(self, binary: SectionProtocol | BinaryName | str) -> SectionProtocol:
+        if isinstance(binary, str) or isinstance(binary, BinaryName):
+            return getattr(self.get_rom_module().get_static_data().bin_sections, str(binary))
+        return binary
+
+    def _get_binary_buffer(self, binary: SectionProtocol) -> bytearray:
+        assert self._rom is not None
+        with self._binaries_lock:
+            if binary.name not in self._binaries:
+                self._binaries[binary.name] = get_binary_from_rom(self._rom, binary)
+            return self._binaries[binary.name]
+
     def is_patch_applied(self, patch_name):
         patcher = self.create_patcher()
         try:
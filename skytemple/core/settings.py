@@ -48,6 +48,11 @@ KEY_SENTRY_USER_ID = "error_reports_user_id"
 KEY_ENABLE_CSD = "enable_csd"
 KEY_APPROVED_PLUGINS = "approved_plugins"
 KEY_SHOW_SYMBOLS_SCREEN_WARNING = "symbols_warning"
+KEY_MEMORY_MAPPED_ROM = "memory_mapped_rom"
+KEY_MODEL_CACHE = "model_cache"
+KEY_SPRITE_CACHE_SIZE = "sprite_cache_size_mb"
+KEY_SPRITE_DISK_CACHE = "sprite_disk_cache"
+KEY_SPRITE_DISK_CACHE_SIZE = "sprite_disk_cache_size_mb"
 
 KEY_WINDOW_SIZE_X = "width"
 KEY_WINDOW_SIZE_Y = "height"
@@ -246,12 +251,21 @@ class SkyTempleSettingsStore:
         self._save()
 
     def get_async_configuration(self) -> AsyncConfiguration:
-        # Not supported to be configured anymore.
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_ASYNC_CONFIGURATION in self.loaded_config[SECT_GENERAL]:
+                try:
+                    config = AsyncConfiguration(self.loaded_config[SECT_GENERAL][KEY_ASYNC_CONFIGURATION])
+                    if config.available():
+                        return config
+                except ValueError:
+                    pass
         return AsyncConfiguration.default()
 
-    def set_async_configuration(self, _value: AsyncConfiguration):
-        # Not supported to be configured anymore.
-        pass
+    def set_async_configuration(self, value: AsyncConfiguration):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_ASYNC_CONFIGURATION] = value.value
+        self._save()
 
     def csd_enabled(self) -> bool:
         if SECT_GENERAL in self.loaded_config:
@@ -292,6 +306,74 @@ class SkyTempleSettingsStore:
         self.loaded_config[SECT_GENERAL][KEY_SHOW_SYMBOLS_SCREEN_WARNING] = "1" if value else "0"
         self._save()
 
+    def get_memory_mapped_rom(self) -> bool:
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_MEMORY_MAPPED_ROM in self.loaded_config[SECT_GENERAL]:
+                return int(self.loaded_config[SECT_GENERAL][KEY_MEMORY_MAPPED_ROM]) > 0
+        return False  # default is disabled.
+
+    def set_memory_mapped_rom(self, value: bool):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_MEMORY_MAPPED_ROM] = "1" if value else "0"
+        self._save()
+
+    def get_model_cache_enabled(self) -> bool:
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_MODEL_CACHE in self.loaded_config[SECT_GENERAL]:
+                return int(self.loaded_config[SECT_GENERAL][KEY_MODEL_CACHE]) > 0
+        return False  # default is disabled.
+
+    def set_model_cache_enabled(self, value: bool):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_MODEL_CACHE] = "1" if value else "0"
+        self._save()
+
+    def get_sprite_cache_size(self) -> int:
+        """Budget for rendered sprites kept in memory, in MiB."""
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_SPRITE_CACHE_SIZE in self.loaded_config[SECT_GENERAL]:
+                try:
+                    return max(1, int(self.loaded_config[SECT_GENERAL][KEY_SPRITE_CACHE_SIZE]))
+                except ValueError:
+                    pass
+        return 256
+
+    def set_sprite_cache_size(self, value: int):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_SPRITE_CACHE_SIZE] = str(value)
+        self._save()
+
+    def get_sprite_disk_cache_enabled(self) -> bool:
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_SPRITE_DISK_CACHE in self.loaded_config[SECT_GENERAL]:
+                return int(self.loaded_config[SECT_GENERAL][KEY_SPRITE_DISK_CACHE]) > 0
+        return False  # default is disabled.
+
+    def set_sprite_disk_cache_enabled(self, value: bool):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_SPRITE_DISK_CACHE] = "1" if value else "0"
+        self._save()
+
+    def get_sprite_disk_cache_size(self) -> int:
+        """Budget for rendered sprites stored in the project directory, in MiB."""
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_SPRITE_DISK_CACHE_SIZE in self.loaded_config[SECT_GENERAL]:
+                try:
+                    return max(1, int(self.loaded_config[SECT_GENERAL][KEY_SPRITE_DISK_CACHE_SIZE]))
+                except ValueError:
+                    pass
+        return 64
+
+    def set_sprite_disk_cache_size(self, value: int):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_SPRITE_DISK_CACHE_SIZE] = str(value)
+        self._save()
+
     def _save(self):
         with open_utf8(self.config_file, "w") as f:
             self.loaded_config.write(f)
@@ -20,7 +20,9 @@ import json
 import logging
 import os
 import threading
-from typing import TYPE_CHECKING, Union
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from typing import TYPE_CHECKING, NamedTuple, Union
 
 import cairo
 
@@ -30,13 +32,17 @@ from skytemple_files.dungeon_data.mappa_bin.protocol import MappaTrapType
 from skytemple_files.graphics.img_itm.model import ImgItm
 from skytemple_files.graphics.img_trp.model import ImgTrp
 
-from PIL import Image, ImageFilter
+from PIL import Image, ImageChops, ImageFilter
 from gi.repository import Gdk, Gtk
 
 from skytemple.core.img_utils import pil_to_cairo_surface
 from skytemple.core.model_context import ModelContext
+from skytemple.core.settings import SkyTempleSettingsStore
+from skytemple.core.sprite_render_cache import CACHE_DIR_NAME as RENDER_CACHE_DIR_NAME, SpriteRenderCache
+from skytemple.core.surface_cache import CacheStats, SurfaceCache, surface_size
 from skytemple.core.ui_utils import data_dir, assert_not_none
 from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
+from skytemple.core.async_tasks.worker_pool import TaskPriority
 from skytemple_files.common.types.file_types import FileType
 from skytemple_files.common.util import MONSTER_MD, MONSTER_BIN, open_utf8, DUNGEON_BIN
 from skytemple_files.container.bin_pack.model import BinPack
@@ -150,6 +156,28 @@ TRAP_PALETTE_MAP = {
 TRP_FILENAME = "traps.trp.img"
 ITM_FILENAME = "items.itm.img"
 FILE_NAME_STANDIN_SPRITES = ".standin_sprites.json"
+SPRITE_KIND_MONSTER = "monster"
+SPRITE_KIND_MONSTER_OUTLINE = "monster_outline"
+SPRITE_KIND_ACTOR_PLACEHOLDER = "actor_placeholder"
+SPRITE_KIND_OBJECT = "object"
+SPRITE_KIND_TRAP = "trap"
+SPRITE_KIND_ITEM = "item"
+# Lookup tables for Image.point
+_LUT_ABOVE_200 = [255 if v > 200 else 0 for v in range(256)]
+_LUT_BELOW_200 = [255 if v < 200 else 0 for v in range(256)]
+_LUT_PALETTE_OPAQUE = [0 if v % 16 == 0 else 255 for v in range(256)]
+# How many decoded monster sprites are kept, so other directions and outlines of them can be rendered without
+# decompressing them again.
+DECODED_SPRITE_CACHE_SIZE = 32
+# The directions of monster sprites (direction 0 shows the same frame as 1).
+ALL_DIRECTIONS = range(1, 9)
+
+
+class MonsterSpriteSource(NamedTuple):
+    """The raw (compressed) entry of a monster sprite and its index in the monster.bin."""
+
+    sprite_id: int
+    data: bytes
 
 
 class SpriteProvider:
@@ -163,19 +191,16 @@ class SpriteProvider:
         self._loader_surface_dims: tuple[int, int] | None = None
         self._loader_surface: cairo.ImageSurface | None = None
 
-        self._loaded__monsters: dict[ActorSpriteKey, SpriteAndOffsetAndDims] = {}
-        self._loaded__monsters_outlines: dict[ActorSpriteKey, SpriteAndOffsetAndDims] = {}
-        self._loaded__actor_placeholders: dict[ActorSpriteKey, SpriteAndOffsetAndDims] = {}
-        self._loaded__objects: dict[str, SpriteAndOffsetAndDims] = {}
-        self._loaded__traps: dict[int, SpriteAndOffsetAndDims] = {}
-        self._loaded__items: dict[int, SpriteAndOffsetAndDims] = {}
+        # All loaded sprites, keyed by (kind, key of the sprite), see the SPRITE_KIND_* constants.
+        self._loaded: SurfaceCache[tuple[str, Hashable], SpriteAndOffsetAndDims] = SurfaceCache(
+            SkyTempleSettingsStore().get_sprite_cache_size() * 1024 * 1024
+        )
 
-        self._requests__monsters: list[ActorSpriteKey] = []
-        self._requests__monsters_outlines: list[ActorSpriteKey] = []
-        self._requests__actor_placeholders: list[ActorSpriteKey] = []
-        self._requests__objects: list[str] = []
-        self._requests__traps: list[int] = []
-        self._requests__items: list[int] = []
+        # Sprites that are currently being loaded, keyed like _loaded.
+        self._requests: set[tuple[str, Hashable]] = set()
+        # Recently decoded monster sprites by sprite index, with the data they were decoded from.
+        self._decoded_sprites: OrderedDict[int, tuple[bytes, Wan]] = OrderedDict()
+        self._decoded_sprites_lock = threading.Lock()
 
         self._monster_md: ModelContext[MdProtocol] = self._project.open_file_in_rom(
             MONSTER_MD, FileType.MD, threadsafe=True
@@ -186,6 +211,18 @@ class SpriteProvider:
         self._dungeon_bin: ModelContext[DungeonBinPack] | None = None
 
         self._stripes = Image.open(os.path.join(data_dir(), "stripes.png"))
+        # The stripes pattern, tiled to the size of the largest placeholder so far.
+        self._stripes_tiled: Image.Image | None = None
+        settings = SkyTempleSettingsStore()
+        render_cache_dir = os.path.join(project.get_project_file_manager().dir(), RENDER_CACHE_DIR_NAME)
+        self._render_cache: SpriteRenderCache | None = None
+        if settings.get_sprite_disk_cache_enabled():
+            os.makedirs(render_cache_dir, exist_ok=True)
+            self._render_cache = SpriteRenderCache(
+                render_cache_dir, settings.get_sprite_disk_cache_size() * 1024 * 1024
+            )
+        else:
+            SpriteRenderCache.remove(render_cache_dir)
         self._loaded_standins: dict[int, int] | None = None
 
         # init_loader MUST be called next!
@@ -225,87 +262,73 @@ class SpriteProvider:
 
     def reset(self):
         with sprite_provider_lock:
-            self._loaded__monsters = {}
-            self._loaded__actor_placeholders = {}
-            self._loaded__objects = {}
-            self._loaded__traps = {}
-            self._loaded__items = {}
-
-            self._requests__monsters = []
-            self._requests__actor_placeholders = []
-            self._requests__objects = []
-            self._requests__traps = []
-            self._requests__items = []
-
-    def get_actor_placeholder(self, actor_id, direction_id: int, after_load_cb=lambda: None) -> SpriteAndOffsetAndDims:
+            self._loaded.clear()
+            self._requests = set()
+        with self._decoded_sprites_lock:
+            self._decoded_sprites.clear()
+
+    def release_pins(self):
+        """
+        Allows sprites that were used so far to be evicted from the cache again. Should be called when the view
+        changes; the sprites the new view requests are pinned until the next call.
+        """
+        with sprite_provider_lock:
+            logger.debug(f"Sprite cache: {self._loaded.stats()}")
+            self._loaded.release_pins()
+
+    def cache_stats(self) -> CacheStats:
+        with sprite_provider_lock:
+            return self._loaded.stats()
+
+    def _store(self, kind: str, key: Hashable, loaded: SpriteAndOffsetAndDims):
+        """Must be called with the sprite_provider_lock held."""
+        # Errors share one small surface, but counting them individually doesn't really matter.
+        self._loaded.put((kind, key), loaded, surface_size(loaded[0]))
+
+    def get_actor_placeholder(
+        self, actor_id, direction_id: int, after_load_cb=lambda: None, *, all_directions=False
+    ) -> SpriteAndOffsetAndDims:
         """
         Returns a placeholder sprite for the actor with the given index (in the actor table).
         As long as the sprite is being loaded, the loader sprite is returned instead.
+        If all_directions is set, the other directions are loaded in the background as well.
         """
-        with sprite_provider_lock:
-            if (actor_id, direction_id) in self._loaded__actor_placeholders:
-                return self._loaded__actor_placeholders[(actor_id, direction_id)]
-            if (actor_id, direction_id) not in self._requests__actor_placeholders:
-                self._requests__actor_placeholders.append((actor_id, direction_id))
-                self._load_actor_placeholder(actor_id, direction_id, after_load_cb)
-        return self.get_loader()
+        return self._get(SPRITE_KIND_ACTOR_PLACEHOLDER, (actor_id, direction_id), after_load_cb, all_directions)
 
-    def get_monster(self, md_index, direction_id: int, after_load_cb=lambda: None) -> SpriteAndOffsetAndDims:
+    def get_monster(
+        self, md_index, direction_id: int, after_load_cb=lambda: None, *, all_directions=False
+    ) -> SpriteAndOffsetAndDims:
         """
         Returns the sprite using the index from the monster.md.
         As long as the sprite is being loaded, the loader sprite is returned instead.
+        If all_directions is set, the other directions are loaded in the background as well.
         """
-        with sprite_provider_lock:
-            if (md_index, direction_id) in self._loaded__monsters:
-                return self._loaded__monsters[(md_index, direction_id)]
-            if (md_index, direction_id) not in self._requests__monsters:
-                self._requests__monsters.append((md_index, direction_id))
-                self._load_monster(md_index, direction_id, after_load_cb)
-        return self.get_loader()
+        return self._get(SPRITE_KIND_MONSTER, (md_index, direction_id), after_load_cb, all_directions)
 
-    def get_monster_outline(self, md_index, direction_id: int, after_load_cb=lambda: None) -> SpriteAndOffsetAndDims:
+    def get_monster_outline(
+        self, md_index, direction_id: int, after_load_cb=lambda: None, *, all_directions=False
+    ) -> SpriteAndOffsetAndDims:
         """
         Returns the outline of a sprite using the index from the monster.md.
         As long as the sprite is being loaded, the loader sprite is returned instead.
+        If all_directions is set, the other directions are loaded in the background as well.
         """
-        with sprite_provider_lock:
-            if (md_index, direction_id) in self._loaded__monsters_outlines:
-                return self._loaded__monsters_outlines[(md_index, direction_id)]
-            if (md_index, direction_id) not in self._requests__monsters_outlines:
-                self._requests__monsters_outlines.append((md_index, direction_id))
-                self._load_monster_outline(md_index, direction_id, after_load_cb)
-        return self.get_loader()
+        return self._get(SPRITE_KIND_MONSTER_OUTLINE, (md_index, direction_id), after_load_cb, all_directions)
 
     def get_for_object(self, name, after_load_cb=lambda: None) -> SpriteAndOffsetAndDims:
         """
         Returns a named object sprite file from the GROUND directory.
         As long as the sprite is being loaded, the loader sprite is returned instead.
         """
-        with sprite_provider_lock:
-            if name in self._loaded__objects:
-                return self._loaded__objects[name]
-            if name not in self._requests__objects:
-                self._requests__objects.append(name)
-                self._load_object(name, after_load_cb)
-        return self.get_loader()
+        return self._get(SPRITE_KIND_OBJECT, name, after_load_cb)
 
     def get_for_trap(self, trp: MappaTrapType | int, after_load_cb=lambda: None) -> SpriteAndOffsetAndDims:
         """
         Returns a trap sprite.
         As long as the sprite is being loaded, the loader sprite is returned instead.
         """
-        if isinstance(trp, MappaTrapType):
-            trpv = trp.value
-        else:
-            trpv = trp
         self._load_dungeon_bin()
-        with sprite_provider_lock:
-            if trpv in self._loaded__traps:
-                return self._loaded__traps[trpv]
-            if trpv not in self._requests__traps:
-                self._requests__traps.append(trpv)
-                self._load_trap(trpv, after_load_cb)
-        return self.get_loader()
+        return self._get(SPRITE_KIND_TRAP, self._trap_id(trp), after_load_cb)
 
     def get_for_item(self, itm: ItemPEntryProtocol, after_load_cb=lambda: None) -> SpriteAndOffsetAndDims:
         """
@@ -313,218 +336,314 @@ class SpriteProvider:
         As long as the sprite is being loaded, the loader sprite is returned instead.
         """
         self._load_dungeon_bin()
-        with sprite_provider_lock:
-            if itm.item_id in self._loaded__items:
-                return self._loaded__items[itm.item_id]
-            if itm.item_id not in self._requests__items:
-                self._requests__items.append(itm.item_id)
-                self._load_item(itm, after_load_cb)
-        return self.get_loader()
-
-    def _load_actor_placeholder(self, actor_id, direction_id: int, after_load_cb):
-        AsyncTaskDelegator.run_task(self._load_actor_placeholder__impl(actor_id, direction_id, after_load_cb))
+        return self._get(SPRITE_KIND_ITEM, itm, after_load_cb)
+
+    def prefetch(
+        self,
+        kind: str,
+        keys: Iterable,
+        after_load_cb=lambda: None,
+        priority: TaskPriority = TaskPriority.PREFETCH,
+    ) -> bool:
+        """
+        Loads a batch of sprites of one kind (one of the SPRITE_KIND_* constants) in the background, in a single task.
+        The keys are what the get_* method for the kind takes: (md_index, direction_id) for monsters and outlines,
+        (actor_id, direction_id) for actor placeholders, the name for objects, the trap for traps and the item entry
+        for items.
 
-    async def _load_actor_placeholder__impl(self, actor_id, direction_id: int, after_load_cb):
-        md_index = FALLBACK_STANDIN_ENTITIY
-        if actor_id in self.get_standin_entities():
-            md_index = self.get_standin_entities()[actor_id]
-        try:
-            sprite_img, cx, cy, w, h = self._retrieve_monster_sprite(md_index, direction_id)
-
-            # Convert to outline + stripes
-            alpha_sprite = sprite_img.getchannel("A")
-
-            im_outline = sprite_img.filter(ImageFilter.FIND_EDGES)
-            alpha_outline = im_outline.getchannel("A")
-
-            out_sprite = Image.new("RGBA", im_outline.size)
-            for i in range(0, out_sprite.width, self._stripes.width):
-                for j in range(0, out_sprite.height, self._stripes.height):
-                    out_sprite.paste(self._stripes, (i, j))
-
-            im_outline = Image.new("RGBA", im_outline.size, color="white")
-            out_sprite.paste(im_outline, (0, 0, im_outline.width, im_outline.height), alpha_outline)
-
-            out_sprite.putalpha(alpha_sprite)
-            # Make red transparent
-            data = out_sprite.getdata()
-            new_data = []
-            for item in data:
-                if item[0] > 200 and item[1] < 200 and item[2] < 200:
-                    new_data.append((255, 255, 255, 0))
-                else:
-                    new_data.append(item)
-            out_sprite.putdata(new_data)  # type: ignore
-
-            # /
-
-            surf = pil_to_cairo_surface(out_sprite)
-            loaded = surf, cx, cy, w, h
-        except BaseException:
-            loaded = self.get_error()
+        after_load_cb is called once, after the whole batch was loaded. Sprites that are already loaded or being
+        loaded are skipped; if that leaves nothing to load, False is returned and after_load_cb is never called.
+        """
+        if kind in (SPRITE_KIND_TRAP, SPRITE_KIND_ITEM):
+            self._load_dungeon_bin()
+        if kind == SPRITE_KIND_TRAP:
+            keys = (self._trap_id(trp) for trp in keys)
         with sprite_provider_lock:
-            self._loaded__actor_placeholders[(actor_id, direction_id)] = loaded
-            try:
-                self._requests__actor_placeholders.remove((actor_id, direction_id))
-            except ValueError:
-                pass
-        after_load_cb()
+            return self._request(kind, keys, after_load_cb, priority)
 
-    def _load_monster(self, md_index, direction_id: int, after_load_cb):
-        AsyncTaskDelegator.run_task(self._load_monster__impl(md_index, direction_id, after_load_cb))
-
-    async def _load_monster__impl(self, md_index, direction_id: int, after_load_cb):
-        try:
-            pil_img, cx, cy, w, h = self._retrieve_monster_sprite(md_index, direction_id)
-            surf = pil_to_cairo_surface(pil_img)
-            loaded = surf, cx, cy, w, h
-        except BaseException:
-            loaded = self.get_error()
+    def get_loaded(self, kind: str, key) -> SpriteAndOffsetAndDims | None:
+        """
+        Returns a sprite of one kind, with the key as for prefetch, if it is loaded. Otherwise None is returned,
+        without loading it.
+        """
+        if kind == SPRITE_KIND_TRAP:
+            key = self._trap_id(key)
         with sprite_provider_lock:
-            self._loaded__monsters[(md_index, direction_id)] = loaded
-            try:
-                self._requests__monsters.remove((md_index, direction_id))
-            except ValueError:
-                pass
-        after_load_cb()
-
-    def _load_monster_outline(self, md_index, direction_id: int, after_load_cb):
-        AsyncTaskDelegator.run_task(self._load_monster_outline__impl(md_index, direction_id, after_load_cb))
+            return self._loaded.get((kind, self._cache_key(kind, key)))
 
-    async def _load_monster_outline__impl(self, md_index, direction_id: int, after_load_cb):
-        try:
-            sprite_img, cx, cy, w, h = self._retrieve_monster_sprite(md_index, direction_id)
-
-            # Convert to outline + stripes
-
-            im_outline = sprite_img.filter(ImageFilter.FIND_EDGES)
-            alpha_outline = im_outline.getchannel("A")
-            im_outline = Image.new("RGBA", im_outline.size, color="white")
-            im_outline.putalpha(alpha_outline)
-
-            # /
-
-            surf = pil_to_cairo_surface(im_outline)
-            loaded = surf, cx, cy, w, h
-        except BaseException:
-            loaded = self.get_error()
+    def _get(self, kind: str, key: Hashable, after_load_cb, all_directions=False) -> SpriteAndOffsetAndDims:
         with sprite_provider_lock:
-            self._loaded__monsters_outlines[(md_index, direction_id)] = loaded
-            try:
-                self._requests__monsters_outlines.remove((md_index, direction_id))
-            except ValueError:
-                pass
-        after_load_cb()
+            loaded = self._loaded.get((kind, self._cache_key(kind, key)))
+            if loaded is not None:
+                return loaded
+            if self._request(kind, (key,), after_load_cb, TaskPriority.HIGH) and all_directions:
+                # Rendered from the same decoded sprite, as long as it is still in the cache.
+                assert isinstance(key, tuple)
+                self._request(kind, ((key[0], d) for d in ALL_DIRECTIONS), lambda: None, TaskPriority.PREFETCH)
+        return self.get_loader()
 
-    def _retrieve_monster_sprite(self, md_index, direction_id: int) -> tuple[Image.Image, int, int, int, int]:
+    def _request(self, kind: str, keys: Iterable, after_load_cb, priority: TaskPriority) -> bool:
+        """Must be called with the sprite_provider_lock held."""
+        batch = []
+        for key in keys:
+            cache_key = (kind, self._cache_key(kind, key))
+            if cache_key not in self._requests and cache_key not in self._loaded:
+                self._requests.add(cache_key)
+                batch.append(key)
+        if not batch:
+            return False
+        AsyncTaskDelegator.run_task(self._load_batch(kind, batch, after_load_cb), priority=priority)
+        return True
+
+    async def _load_batch(self, kind: str, batch: list, after_load_cb):
         try:
-            with self._monster_md as monster_md:
-                actor_sprite_id = monster_md[md_index].sprite_index
-            if actor_sprite_id < 0:
-                raise ValueError("Invalid Sprite index")
-            with self._monster_bin as monster_bin:
-                sprite = self._load_sprite_from_bin_pack(monster_bin, actor_sprite_id)
-
-                ani_group = sprite.anim_groups[0]
-                frame_id = direction_id - 1 if direction_id > 0 else 0
-                mfg_id = ani_group[frame_id].frames[0].frame_id
-
-                sprite_img, (cx, cy) = sprite.render_frame(sprite.frames[mfg_id])
-            return sprite_img, cx, cy, sprite_img.width, sprite_img.height
-        except BaseException as e:
-            # Error :(
-            logger.warning(f"Error loading a monster sprite for {md_index}.", exc_info=e)
-            raise RuntimeError(f"Error loading monster sprite for {md_index}") from e
-
-    def _load_object(self, name, after_load_cb):
-        AsyncTaskDelegator.run_task(self._load_object__impl(name, after_load_cb))
-
-    async def _load_object__impl(self, name, after_load_cb):
-        try:
-            with self._load_sprite_from_rom(f"GROUND/{name}.wan") as sprite:
-                ani_group = sprite.anim_groups[0]
-                frame_id = 0
-                mfg_id = ani_group[frame_id].frames[0].frame_id
-
-                sprite_img, (cx, cy) = sprite.render_frame(sprite.frames[mfg_id])
-            surf = pil_to_cairo_surface(sprite_img)
+            sources = self._batch_sources(kind, batch)
+            for key in batch:
+                try:
+                    loaded = self._render_batch_entry(kind, key, sources)
+                except BaseException as e:
+                    # Error :(
+                    logger.warning(f"Error loading a {kind} sprite for {key}.", exc_info=e)
+                    loaded = self.get_error()
+                cache_key = self._cache_key(kind, key)
+                with sprite_provider_lock:
+                    self._store(kind, cache_key, loaded)
+                    self._requests.discard((kind, cache_key))
+                await AsyncTaskDelegator.buffer()
+        finally:
+            # If the task was cancelled, the remaining sprites must be requested again.
             with sprite_provider_lock:
-                self._loaded__objects[name] = (
-                    surf,
-                    cx,
-                    cy,
-                    sprite_img.width,
-                    sprite_img.height,
-                )
-
-        except BaseException as e:
-            # Error :(
-            logger.warning(f"Error loading an object sprite for {name}.", exc_info=e)
-            with sprite_provider_lock:
-                self._loaded__objects[name] = self.get_error()
-        with sprite_provider_lock:
-            try:
-                self._requests__objects.remove(name)
-            except ValueError:
-                pass
-        after_load_cb()
-
-    def _load_trap(self, trp: int, after_load_cb):
-        AsyncTaskDelegator.run_task(self._load_trap__impl(trp, after_load_cb))
+                for key in batch:
+                    self._requests.discard((kind, self._cache_key(kind, key)))
+        AsyncTaskDelegator.run_on_main_thread(after_load_cb)
 
-    async def _load_trap__impl(self, trp: int, after_load_cb):
-        try:
+    def _batch_sources(
+        self, kind: str, batch: list
+    ) -> Mapping[Hashable, bytes | MonsterSpriteSource | BaseException | None]:
+        """
+        Reads the raw data the sprites of the batch are rendered from, keyed by _source_key.
+        Each file is only locked once for the entire batch. None if the sprites must not be looked up in the
+        on-disk render cache.
+        """
+        if kind in (SPRITE_KIND_MONSTER, SPRITE_KIND_MONSTER_OUTLINE, SPRITE_KIND_ACTOR_PLACEHOLDER):
+            return self._monster_sprite_sources({self._source_key(kind, key) for key in batch})
+        if kind in (SPRITE_KIND_TRAP, SPRITE_KIND_ITEM):
+            filename = TRP_FILENAME if kind == SPRITE_KIND_TRAP else ITM_FILENAME
             assert self._dungeon_bin is not None
-            with self._dungeon_bin as dungeon_bin:
-                traps: ImgTrp = dungeon_bin.get(TRP_FILENAME)
-            surf = pil_to_cairo_surface(traps.to_pil(trp, TRAP_PALETTE_MAP[trp]).convert("RGBA"))
-            with sprite_provider_lock:
-                self._loaded__traps[trp] = surf, 0, 0, 24, 24
-
-        except BaseException as e:
-            # Error :(
-            logger.warning(f"Error loading an trap sprite for {trp}.", exc_info=e)
-            with sprite_provider_lock:
-                self._loaded__traps[trp] = self.get_error()
-        with sprite_provider_lock:
             try:
-                self._requests__traps.remove(trp)
-            except ValueError:
-                pass
-        after_load_cb()
+                with self._dungeon_bin as dungeon_bin:
+                    if self._project.is_modified(DUNGEON_BIN):
+                        # The raw data of the subfiles is only updated on save, the models may have been changed.
+                        return {filename: None}
+                    return {filename: dungeon_bin.get_raw(filename)}
+            except BaseException as e:
+                return {filename: e}
+        # Objects each have their own file.
+        return {}
+
+    def _render_batch_entry(
+        self, kind: str, key, sources: Mapping[Hashable, bytes | MonsterSpriteSource | BaseException | None]
+    ) -> SpriteAndOffsetAndDims:
+        if kind == SPRITE_KIND_OBJECT:
+            return self._load_object(key)
+        source = sources[self._source_key(kind, key)]
+        if isinstance(source, BaseException):
+            raise source
+        if isinstance(source, MonsterSpriteSource):
+            monster_source = source
+            if kind == SPRITE_KIND_MONSTER:
+                render = self._render_monster
+            elif kind == SPRITE_KIND_MONSTER_OUTLINE:
+                render = self._render_monster_outline
+            else:
+                render = self._render_actor_placeholder
+            return self._render_cached(kind, source.data, (key[1],), lambda: render(monster_source, key[1]))
+        if kind == SPRITE_KIND_TRAP:
+            return self._render_cached(kind, source, (key, TRAP_PALETTE_MAP[key]), lambda: self._render_trap(key))
+        if kind == SPRITE_KIND_ITEM:
+            return self._render_cached(kind, source, (key.sprite, key.palette), lambda: self._render_item(key))
+        raise ValueError(f"Unknown sprite kind {kind}.")
+
+    @staticmethod
+    def _cache_key(kind: str, key) -> Hashable:
+        """The key of the sprite in _loaded and _requests (next to the kind)."""
+        if kind == SPRITE_KIND_ITEM:
+            return key.item_id
+        return key
+
+    def _source_key(self, kind: str, key) -> Hashable:
+        """The key of the raw data of the sprite in the result of _batch_sources."""
+        if kind == SPRITE_KIND_ACTOR_PLACEHOLDER:
+            return self.get_standin_entities().get(key[0], FALLBACK_STANDIN_ENTITIY)
+        if kind == SPRITE_KIND_TRAP:
+            return TRP_FILENAME
+        if kind == SPRITE_KIND_ITEM:
+            return ITM_FILENAME
+        return key[0]
+
+    @staticmethod
+    def _trap_id(trp: MappaTrapType | int) -> int:
+        if isinstance(trp, MappaTrapType):
+            return trp.value
+        return trp
 
-    def _load_item(self, itm: ItemPEntryProtocol, after_load_cb):
-        AsyncTaskDelegator.run_task(self._load_item__impl(itm, after_load_cb))
+    def _render_actor_placeholder(self, source: MonsterSpriteSource, direction_id: int) -> SpriteAndOffsetAndDims:
+        sprite_img, cx, cy, w, h = self._render_monster_sprite(source, direction_id)
 
-    async def _load_item__impl(self, item: ItemPEntryProtocol, after_load_cb):
-        try:
-            assert self._dungeon_bin is not None
-            with self._dungeon_bin as dungeon_bin:
-                items: ImgItm = dungeon_bin.get(ITM_FILENAME)
-            img = items.to_pil(item.sprite, item.palette)
-            alpha = [px % 16 != 0 for px in img.getdata()]
-            img = img.convert("RGBA")
-            alphaimg = Image.new("1", (img.width, img.height))
-            alphaimg.putdata(alpha)
-            img.putalpha(alphaimg)
-            surf = pil_to_cairo_surface(img)
-            with sprite_provider_lock:
-                self._loaded__items[item.item_id] = surf, 0, 0, 16, 16
-        except BaseException as e:
-            # Error :(
-            logger.warning(f"Error loading an item sprite for {item}.", exc_info=e)
-            with sprite_provider_lock:
-                self._loaded__items[item.item_id] = self.get_error()
-        with sprite_provider_lock:
-            try:
-                self._requests__items.remove(item.item_id)
-            except ValueError:
-                pass
-        after_load_cb()
+        # Convert to outline + stripes
+        alpha_sprite = sprite_img.getchannel("A")
+        alpha_outline = sprite_img.filter(ImageFilter.FIND_EDGES).getchannel("A")
+
+        out_sprite = self._tiled_stripes(sprite_img.size)
+        out_sprite.paste((255, 255, 255, 255), (0, 0, *out_sprite.size), alpha_outline)
 
-    def _load_sprite_from_bin_pack(self, bin_pack: BinPack, file_id) -> Wan:
-        # TODO: Support of bin_pack item management via the RomProject instead?
-        return FileType.WAN.deserialize(FileType.COMMON_AT.deserialize(bin_pack[file_id]).decompress())
+        out_sprite.putalpha(alpha_sprite)
+        # Make red transparent
+        r, g, b, _ = out_sprite.split()
+        is_red = ImageChops.multiply(
+            ImageChops.multiply(r.point(_LUT_ABOVE_200), g.point(_LUT_BELOW_200)), b.point(_LUT_BELOW_200)
+        )
+        out_sprite.paste((255, 255, 255, 0), (0, 0, *out_sprite.size), is_red)
+
+        # /
+
+        return pil_to_cairo_surface(out_sprite), cx, cy, w, h
+
+    def _tiled_stripes(self, size: tuple[int, int]) -> Image.Image:
+        """A new image of the given size, filled with the stripes pattern."""
+        tiled = self._stripes_tiled
+        if tiled is None or tiled.width < size[0] or tiled.height < size[1]:
+            width = max(size[0], tiled.width if tiled else 0)
+            height = max(size[1], tiled.height if tiled else 0)
+            tiled = Image.new("RGBA", (width, height))
+            for i in range(0, width, self._stripes.width):
+                for j in range(0, height, self._stripes.height):
+                    tiled.paste(self._stripes, (i, j))
+            self._stripes_tiled = tiled
+        return tiled.crop((0, 0, *size))
+
+    def _render_monster(self, source: MonsterSpriteSource, direction_id: int) -> SpriteAndOffsetAndDims:
+        pil_img, cx, cy, w, h = self._render_monster_sprite(source, direction_id)
+        return pil_to_cairo_surface(pil_img), cx, cy, w, h
+
+    def _render_monster_outline(self, source: MonsterSpriteSource, direction_id: int) -> SpriteAndOffsetAndDims:
+        sprite_img, cx, cy, w, h = self._render_monster_sprite(source, direction_id)
+
+        # Convert to outline + stripes
+
+        im_outline = sprite_img.filter(ImageFilter.FIND_EDGES)
+        alpha_outline = im_outline.getchannel("A")
+        im_outline = Image.new("RGBA", im_outline.size, color="white")
+        im_outline.putalpha(alpha_outline)
+
+        # /
+
+        return pil_to_cairo_surface(im_outline), cx, cy, w, h
+
+    def _monster_sprite_sources(
+        self, md_indices: Iterable
+    ) -> dict[Hashable, bytes | MonsterSpriteSource | BaseException]:
+        """The raw (compressed) entries of the sprites of the monsters in the monster.bin, by monster.md index."""
+        sources: dict[Hashable, bytes | MonsterSpriteSource | BaseException] = {}
+        sprite_ids = {}
+        with self._monster_md.read() as monster_md:
+            for md_index in md_indices:
+                try:
+                    sprite_ids[md_index] = monster_md[md_index].sprite_index
+                    if sprite_ids[md_index] < 0:
+                        raise ValueError("Invalid Sprite index")
+                except BaseException as e:
+                    sources[md_index] = e
+        with self._monster_bin.read() as monster_bin:
+            for md_index, sprite_id in sprite_ids.items():
+                if md_index not in sources:
+                    try:
+                        sources[md_index] = MonsterSpriteSource(sprite_id, bytes(monster_bin[sprite_id]))
+                    except BaseException as e:
+                        sources[md_index] = e
+        return sources
+
+    def _render_monster_sprite(
+        self, source: MonsterSpriteSource, direction_id: int
+    ) -> tuple[Image.Image, int, int, int, int]:
+        sprite = self._decode_monster_sprite(source)
+
+        ani_group = sprite.anim_groups[0]
+        frame_id = direction_id - 1 if direction_id > 0 else 0
+        mfg_id = ani_group[frame_id].frames[0].frame_id
+
+        sprite_img, (cx, cy) = sprite.render_frame(sprite.frames[mfg_id])
+        return sprite_img, cx, cy, sprite_img.width, sprite_img.height
+
+    def _decode_monster_sprite(self, source: MonsterSpriteSource) -> Wan:
+        """Decodes the sprite, unless it was decoded recently from the same data."""
+        with self._decoded_sprites_lock:
+            cached = self._decoded_sprites.get(source.sprite_id)
+            if cached is not None and cached[0] == source.data:
+                self._decoded_sprites.move_to_end(source.sprite_id)
+                return cached[1]
+        # Decoded without holding the lock, so multiple sprites can be decoded at the same time.
+        # Rendering doesn't change the model, so it can be shared between threads afterwards.
+        sprite = FileType.WAN.deserialize(FileType.COMMON_AT.deserialize(source.data).decompress())
+        with self._decoded_sprites_lock:
+            self._decoded_sprites[source.sprite_id] = (source.data, sprite)
+            self._decoded_sprites.move_to_end(source.sprite_id)
+            while len(self._decoded_sprites) > DECODED_SPRITE_CACHE_SIZE:
+                self._decoded_sprites.popitem(last=False)
+        return sprite
+
+    def _load_object(self, name) -> SpriteAndOffsetAndDims:
+        path = f"GROUND/{name}.wan"
+        if self._project.is_opened(path):
+            # The model may have been changed, the file in the ROM doesn't tell us what it looks like.
+            return self._render_object(path)
+        source = self._project.open_file_manually(path)
+        return self._render_cached(SPRITE_KIND_OBJECT, source, (), lambda: self._render_object(path))
+
+    def _render_object(self, path: str) -> SpriteAndOffsetAndDims:
+        with self._load_sprite_from_rom(path) as sprite:
+            ani_group = sprite.anim_groups[0]
+            frame_id = 0
+            mfg_id = ani_group[frame_id].frames[0].frame_id
+
+            sprite_img, (cx, cy) = sprite.render_frame(sprite.frames[mfg_id])
+        return pil_to_cairo_surface(sprite_img), cx, cy, sprite_img.width, sprite_img.height
+
+    def _render_trap(self, trp: int) -> SpriteAndOffsetAndDims:
+        assert self._dungeon_bin is not None
+        with self._dungeon_bin as dungeon_bin:
+            traps: ImgTrp = dungeon_bin.get(TRP_FILENAME)
+        surf = pil_to_cairo_surface(traps.to_pil(trp, TRAP_PALETTE_MAP[trp]).convert("RGBA"))
+        return surf, 0, 0, 24, 24
+
+    def _render_item(self, item: ItemPEntryProtocol) -> SpriteAndOffsetAndDims:
+        assert self._dungeon_bin is not None
+        with self._dungeon_bin as dungeon_bin:
+            items: ImgItm = dungeon_bin.get(ITM_FILENAME)
+        img = items.to_pil(item.sprite, item.palette)
+        # The first color of each palette is transparent.
+        alpha = Image.frombytes("L", img.size, img.tobytes()).point(_LUT_PALETTE_OPAQUE)
+        img = img.convert("RGBA")
+        img.putalpha(alpha)
+        return pil_to_cairo_surface(img), 0, 0, 16, 16
+
+    def _render_cached(
+        self, kind: str, source: bytes | None, params: tuple, render: Callable[[], SpriteAndOffsetAndDims]
+    ) -> SpriteAndOffsetAndDims:
+        """
+        Returns the sprite from the on-disk render cache or renders it and stores it there, if the cache is enabled.
+        ``source`` is the raw data the sprite is rendered from, ``params`` everything else that changes the result.
+        If ``source`` is None, the data is not known to match the model the sprite is rendered from, and the cache
+        is not used.
+        """
+        if self._render_cache is None or source is None:
+            return render()
+        key = self._render_cache.key(kind, source, *params)
+        loaded = self._render_cache.load(key)
+        if loaded is None:
+            loaded = render()
+            self._render_cache.store(key, loaded)
+        return loaded
 
     def _load_sprite_from_rom(self, path: str) -> ModelContext[Wan]:
         return self._project.open_file_in_rom(path, FileType.WAN, threadsafe=True)
@@ -559,7 +678,7 @@ class SpriteProvider:
 
     def set_standin_entities(self, mappings):
         with sprite_provider_lock:
-            self._loaded__actor_placeholders = {}
+            self._loaded.remove_if(lambda key: key[0] == SPRITE_KIND_ACTOR_PLACEHOLDER)
         p = self._standin_entities_filepath()
         with open_utf8(p, "w") as f:
             json.dump(mappings, f)
@@ -0,0 +1,191 @@
+"""On-disk cache of rendered sprites, so sprites show up immediately after restarting SkyTemple."""
+
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import struct
+import threading
+
+import cairo
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = "sprite_cache"
+# Increase when the way sprites are rendered changes, to not use entries rendered the old way.
+RENDER_VERSION = 1
+# Contains the RENDER_VERSION the entries in the directory were rendered with.
+VERSION_FILE_NAME = "version"
+ENTRY_EXT = ".bin"
+# When the cache is over its budget, the least recently used entries are removed until it's at this fraction of it.
+TRIM_TO = 0.75
+_MAGIC = b"STS\x01"
+# magic, surface width, surface height, stride, cx, cy, w, h
+_HEADER = struct.Struct("<4sIIIiiii")
+
+
+class SpriteRenderCache:
+    """
+    Stores the pixels of rendered sprite surfaces (premultiplied BGRA, as used by cairo) together with their
+    offsets and dimensions.
+
+    Entries are keyed by a hash of the raw data the sprite is rendered from, the kind of rendering
+    (monster, outline, ...) and any other parameters (eg. the direction), so entries of changed sprites are not
+    used again. They are removed once the cache grows over its budget: the modification time of an entry is updated
+    whenever it is used, and the entries that were not used for the longest time are removed first.
+    All entries are removed when the RENDER_VERSION changes.
+    """
+
+    def __init__(self, directory: str, budget_bytes: int):
+        self.directory = directory
+        self.budget_bytes = budget_bytes
+        self._enabled = True
+        self._lock = threading.Lock()
+        # Total size of the entries; approximate, since replaced entries are counted twice until the next trim.
+        self._size = 0
+        self._prepare()
+
+    @staticmethod
+    def remove(directory: str):
+        """Removes the cache in the directory, if there is one. Used when the cache is disabled."""
+        if os.path.isdir(directory):
+            shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    def key(variant: str, source: bytes, *params) -> str:
+        h = hashlib.sha256()
+        h.update(f"{RENDER_VERSION}|{variant}|{params!r}|".encode())
+        h.update(source)
+        return h.hexdigest()
+
+    def load(self, key: str) -> tuple[cairo.ImageSurface, int, int, int, int] | None:
+        if not self._enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            magic, width, height, stride, cx, cy, w, h = _HEADER.unpack_from(data)
+            pixels = bytearray(data[_HEADER.size :])
+            if magic != _MAGIC or len(pixels) != stride * height:
+                return None
+            surface = cairo.ImageSurface.create_for_data(pixels, cairo.FORMAT_ARGB32, width, height, stride)
+        except (struct.error, ValueError, cairo.Error) as ex:
+            logger.warning(f"Ignoring broken sprite cache entry {key}.", exc_info=ex)
+            return None
+        try:
+            # Marks the entry as recently used.
+            os.utime(path)
+        except OSError:
+            pass
+        return surface, cx, cy, w, h
+
+    def store(self, key: str, loaded: tuple[cairo.ImageSurface, int, int, int, int]):
+        if not self._enabled:
+            return
+        surface, cx, cy, w, h = loaded
+        if surface.get_format() != cairo.FORMAT_ARGB32:
+            return
+        surface.flush()
+        path = self._path(key)
+        # Unique per thread, the same sprite might be rendered by two workers at once.
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        header = _HEADER.pack(_MAGIC, surface.get_width(), surface.get_height(), surface.get_stride(), cx, cy, w, h)
+        pixels = surface.get_data()
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(pixels)
+            os.replace(tmp_path, path)
+        except OSError as ex:
+            logger.warning("Failed to write the sprite cache, disabling it.", exc_info=ex)
+            self._enabled = False
+            return
+        with self._lock:
+            self._size += len(header) + len(pixels)
+            if self._size > self.budget_bytes:
+                self._trim()
+
+    def _prepare(self):
+        """
+        Removes the entries of other render versions and left over temporary files, and makes sure the cache
+        is within its budget.
+        """
+        version_path = os.path.join(self.directory, VERSION_FILE_NAME)
+        try:
+            with open(version_path) as f:
+                version: int | None = int(f.read().strip())
+        except (OSError, ValueError):
+            version = None
+        outdated = version != RENDER_VERSION
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name == VERSION_FILE_NAME:
+                    continue
+                if outdated or not entry.name.endswith(ENTRY_EXT):
+                    _remove_file(entry.path)
+                else:
+                    self._size += entry.stat().st_size
+            if outdated:
+                with open(version_path, "w") as f:
+                    f.write(str(RENDER_VERSION))
+        except OSError as ex:
+            logger.warning("Failed to prepare the sprite cache, disabling it.", exc_info=ex)
+            self._enabled = False
+            return
+        if self._size > self.budget_bytes:
+            with self._lock:
+                self._trim()
+
+    def _trim(self):
+        """Removes the least recently used entries. Must be called with the lock held."""
+        entries = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(ENTRY_EXT):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as ex:
+            logger.warning("Failed to list the sprite cache.", exc_info=ex)
+            return
+        entries.sort()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        target = self.budget_bytes * TRIM_TO
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            if _remove_file(path):
+                size -= entry_size
+        self._size = size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_EXT)
+
+
+def _remove_file(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,198 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic, NamedTuple, TypeVar
+
+import cairo
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+Tint = tuple[float, float, float]
+SCALED_SURFACE_CACHE_BUDGET_BYTES = 32 * 1024 * 1024
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    budget_bytes: int
+    pinned: int
+
+    def __str__(self):
+        return (
+            f"{self.entries} entries, {self.size_bytes / 1024 / 1024:.1f}/{self.budget_bytes / 1024 / 1024:.0f} MiB, "
+            f"{self.pinned} pinned, {self.hits} hits, {self.misses} misses, {self.evictions} evictions"
+        )
+
+
+class SurfaceCache(Generic[K, V]):
+    """
+    Least recently used cache of rendered images, limited by the number of bytes they use.
+
+    Every entry that is read or stored is pinned until ``release_pins`` is called. Pinned entries are never
+    evicted, which keeps everything the currently open view uses loaded, even if that exceeds the budget.
+
+    Not threadsafe; callers need to hold their own lock.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._entries: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self._pinned: set[K] = set()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: K) -> bool:
+        """Whether the key is cached. Unlike ``get``, this doesn't count as a use of the entry."""
+        return key in self._entries
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        self._pinned.add(key)
+        return entry[0]
+
+    def put(self, key: K, value: V, size: int):
+        self.remove(key)
+        self._entries[key] = (value, size)
+        self._size += size
+        self._pinned.add(key)
+        self._evict()
+
+    def remove(self, key: K):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+        self._pinned.discard(key)
+
+    def remove_if(self, predicate):
+        for key in [key for key in self._entries if predicate(key)]:
+            self.remove(key)
+
+    def release_pins(self):
+        self._pinned = set()
+        self._evict()
+
+    def clear(self):
+        self._entries = OrderedDict()
+        self._pinned = set()
+        self._size = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            self.hits, self.misses, self.evictions, len(self._entries), self._size, self.budget_bytes, len(self._pinned)
+        )
+
+    def _evict(self):
+        if self._size <= self.budget_bytes:
+            return
+        for key in list(self._entries.keys()):
+            if self._size <= self.budget_bytes:
+                break
+            if key not in self._pinned:
+                self.remove(key)
+                self.evictions += 1
+
+
+def surface_size(surface: cairo.ImageSurface) -> int:
+    """The number of bytes of pixel data of the surface."""
+    return surface.get_stride() * surface.get_height()
+
+
+class ScaledSurfaceCache:
+    """
+    Surfaces scaled up by an integer factor (with nearest neighbour filtering) and optionally tinted in one color,
+    shared by all widgets, so they don't need to scale and tint sprites on every draw.
+
+    Entries are keyed by the original surface; a new surface (eg. once a sprite finished loading) is scaled again.
+    Like SurfaceCache, entries are pinned until ``release_pins`` is called, which happens when the view changes.
+    """
+
+    _instance: ScaledSurfaceCache | None = None
+
+    @classmethod
+    def instance(cls) -> ScaledSurfaceCache:
+        if cls._instance is None:
+            cls._instance = cls(SCALED_SURFACE_CACHE_BUDGET_BYTES)
+        return cls._instance
+
+    def __init__(self, budget_bytes: int):
+        self._lock = threading.Lock()
+        # The original surface is kept in the entry, so no other surface can get the same id while it exists.
+        self._cache: SurfaceCache[
+            tuple[int, int, Tint | None, int, int], tuple[cairo.ImageSurface, cairo.ImageSurface]
+        ] = SurfaceCache(budget_bytes)
+
+    def get(
+        self,
+        surface: cairo.ImageSurface,
+        scale: int,
+        tint: Tint | None = None,
+        width: int | None = None,
+        height: int | None = None,
+    ) -> cairo.ImageSurface:
+        """
+        Returns the surface scaled by scale, with all its pixels in the tint color (keeping their alpha), if set.
+        With width and height, only that area at the top left of the surface is used.
+        """
+        width = surface.get_width() if width is None else width
+        height = surface.get_height() if height is None else height
+        if scale == 1 and tint is None and (width, height) == (surface.get_width(), surface.get_height()):
+            return surface
+        key = (id(surface), scale, tint, width, height)
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None:
+            return entry[1]
+        scaled = cairo.ImageSurface(cairo.FORMAT_ARGB32, width * scale, height * scale)
+        ctx = cairo.Context(scaled)
+        ctx.scale(scale, scale)
+        ctx.set_source_surface(surface)
+        ctx.get_source().set_filter(cairo.Filter.NEAREST)
+        ctx.paint()
+        if tint is not None:
+            ctx.set_source_rgb(*tint)
+            ctx.set_operator(cairo.OPERATOR_IN)
+            ctx.paint()
+        scaled.flush()
+        with self._lock:
+            self._cache.put(key, (surface, scaled), surface_size(scaled))
+        return scaled
+
+    def release_pins(self):
+        with self._lock:
+            self._cache.release_pins()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return self._cache.stats()
@@ -24,6 +24,7 @@ from gi.repository import Gtk
 
 from skytemple.core.abstract_module import AbstractModule
 from skytemple.core.sprite_provider import SpriteAndOffsetAndDims
+from skytemple.core.surface_cache import ScaledSurfaceCache
 from skytemple.core.ui_utils import data_dir
 from skytemple.init_locale import LocalePatchedGtkTemplate
 
@@ -98,20 +99,11 @@ class StSprite(Gtk.DrawingArea):
             return
         sprite, x, y, w, h = self.loaded_sprite
 
-        if self.sprite_data.tint_placeholder:
-            sp_ctx = cairo.Context(sprite)
-            sp_ctx.set_source_rgb(*ORANGE_RGB)
-            sp_ctx.rectangle(0, 0, w, h)
-            sp_ctx.set_operator(cairo.OPERATOR_IN)
-            sp_ctx.fill()
-
-        if self.sprite_data.scale != 1:
-            ctx.scale(self.sprite_data.scale, self.sprite_data.scale)
-        ctx.set_source_surface(sprite)
-        ctx.get_source().set_filter(cairo.Filter.NEAREST)
+        scaled = ScaledSurfaceCache.instance().get(
+            sprite, self.sprite_data.scale, ORANGE_RGB if self.sprite_data.tint_placeholder else None, w, h
+        )
+        ctx.set_source_surface(scaled)
         ctx.paint()
-        if self.sprite_data.scale != 1:
-            ctx.scale(1 / self.sprite_data.scale, 1 / self.sprite_data.scale)
         if self.get_size_request() != (
             w * self.sprite_data.scale,
             h * self.sprite_data.scale,
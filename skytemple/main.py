@@ -114,11 +114,40 @@ from skytemple.app import SkyTempleApplication
 
 
 def main():
-    # TODO: At the moment doesn't support any cli arguments.
+    # TODO: At the moment doesn't support any cli arguments, except for --trace.
     from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
 
+    trace_path = _pop_trace_arg()
+    if trace_path is not None:
+        from skytemple.core.profiling_trace import TraceRecorder
+
+        TraceRecorder.enable(trace_path)
+
     path = os.path.abspath(os.path.dirname(__file__))
-    AsyncTaskDelegator.run_main(SkyTempleApplication(path, settings))
+    try:
+        AsyncTaskDelegator.run_main(SkyTempleApplication(path, settings))
+    finally:
+        _export_trace()
+
+
+def _pop_trace_arg() -> str | None:
+    """Removes ``--trace PATH`` / ``--trace=PATH`` from the arguments, GTK would reject it otherwise."""
+    for i, arg in enumerate(sys.argv):
+        if arg == "--trace" and i + 1 < len(sys.argv):
+            del sys.argv[i]
+            return sys.argv.pop(i)
+        if arg.startswith("--trace="):
+            del sys.argv[i]
+            return arg[len("--trace=") :]
+    return None
+
+
+def _export_trace():
+    from skytemple.core.profiling_trace import TraceRecorder
+
+    recorder = TraceRecorder.instance()
+    if recorder is not None:
+        recorder.export()
 
 
 if __name__ == "__main__":
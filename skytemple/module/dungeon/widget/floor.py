@@ -24,10 +24,9 @@ import traceback
 import typing
 from enum import Enum
 from functools import partial
-from itertools import zip_longest
 from typing import TYPE_CHECKING, cast
 from xml.etree import ElementTree
-from gi.repository import Gtk, GLib, GdkPixbuf
+from gi.repository import Gtk, GLib
 from range_typed_integers import (
     u8,
     u8_checked,
@@ -42,6 +41,7 @@ from skytemple_files.common.types.file_types import FileType
 from skytemple.controller.main import MainController
 from skytemple.core.canvas_scale import CanvasScale
 from skytemple.core.error_handler import display_error
+from skytemple.core.img_utils import PixbufCache
 from skytemple.core.list_icon_renderer import ListIconRenderer
 from skytemple.core.message_dialog import SkyTempleMessageDialog
 from skytemple.core.open_request import (
@@ -50,6 +50,8 @@ from skytemple.core.open_request import (
     REQUEST_TYPE_DUNGEON_FIXED_FLOOR,
     REQUEST_TYPE_DUNGEON_MUSIC,
 )
+from skytemple.core.async_tasks.worker_pool import TaskPriority
+from skytemple.core.sprite_provider import SPRITE_KIND_MONSTER
 from skytemple.core.string_provider import StringType
 from skytemple.core.ui_utils import (
     add_dialog_xml_filter,
@@ -427,6 +429,7 @@ class StDungeonFloorPage(Gtk.Box):
         self._draw: Gtk.DrawingArea | None = None
         self.drawer: FixedRoomDrawer | None = None
         self._refresh_timer: int | None = None
+        self._icon_pixbufs = PixbufCache()
         self._loading = False
         self._string_provider = module.project.get_string_provider()
         self._sprite_provider = module.project.get_sprite_provider()
@@ -2031,6 +2034,13 @@ class StDungeonFloorPage(Gtk.Box):
             sum_of_all_weights_main = 1  # all weights are zero, so we just set this to 1 so it doesn't / by 0.
         if sum_of_all_weights_mh <= 0:
             sum_of_all_weights_mh = 1
+        # Load all icons in one go, the rows are refreshed once all of them are loaded.
+        self._sprite_provider.prefetch(
+            SPRITE_KIND_MONSTER,
+            [(monster.md_index, 0) for monster in self.entry.monsters],
+            self._reload_icons_in_tree,
+            TaskPriority.HIGH,
+        )
         for i, monster in enumerate(self.entry.monsters):
             relative_weight_main = relative_weights_main[i]
             relative_weight_mh = relative_weights_mh[i]
@@ -2244,22 +2254,7 @@ class StDungeonFloorPage(Gtk.Box):
             0,
             lambda: GLib.idle_add(partial(self._reload_icon, entid, idx, was_loading)),
         )
-        data = bytes(sprite.get_data())
-        # this is painful.
-        new_data = bytearray()
-        for b, g, r, a in grouper(data, 4):
-            new_data += bytes([r, g, b, a])
-        # todo: memory leak?
-        return GdkPixbuf.Pixbuf.new_from_data(
-            new_data,  # type: ignore
-            GdkPixbuf.Colorspace.RGB,
-            True,
-            8,
-            w,
-            h,
-            sprite.get_stride(),
-            destroy_fn=None,
-        )
+        return self._icon_pixbufs.get(entid, sprite, w, h)
 
     def _reload_icon(self, entid, idx, was_loading):
         try:
@@ -2593,8 +2588,3 @@ class StDungeonFloorPage(Gtk.Box):
         if LINKBOX_ITEM_ID in item_ids:
             return LINKBOX_ITEM_ID
         return item_ids[0]
-
-
-def grouper(iterable, n, fillvalue=None):
-    args = [iter(iterable)] * n
-    return (bytes(bytearray(x)) for x in zip_longest(*args, fillvalue=fillvalue))
@@ -0,0 +1,70 @@
+"""Renders the chunks of dungeon tilesets and backgrounds for the ChunkSurfaceProvider."""
+
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import itertools
+from collections.abc import Callable
+
+import cairo
+from skytemple_files.common.util import lcm
+from skytemple_files.graphics.dpc.protocol import DpcProtocol
+from skytemple_files.graphics.dpci.protocol import DpciProtocol
+from skytemple_files.graphics.dpl.protocol import DplProtocol
+from skytemple_files.graphics.dpla.protocol import DplaProtocol
+
+from skytemple.core.img_utils import cairo_palette, indexed_to_cairo_surface
+from skytemple.module.tiled_img.chunk_surface_provider import ChunkSurfaceProvider
+
+
+def dungeon_chunk_provider(
+    dpc: DpcProtocol,
+    dpci: DpciProtocol,
+    dpl: DplProtocol,
+    dpla: DplaProtocol,
+    after_load_cb: Callable[[], None] = lambda: None,
+) -> ChunkSurfaceProvider:
+    return ChunkSurfaceProvider(
+        len(dpc.chunks), lambda chunk_idx: render_chunk(dpc, dpci, dpl, dpla, chunk_idx), after_load_cb
+    )
+
+
+def render_chunk(
+    dpc: DpcProtocol, dpci: DpciProtocol, dpl: DplProtocol, dpla: DplaProtocol, chunk_idx: int
+) -> list[list[cairo.ImageSurface]]:
+    """All frames of palette animation of the chunk (each with one frame, since there are no animated tiles)."""
+    chunk_image = dpc.single_chunk_to_pil(chunk_idx, dpci, dpl.palettes)
+    has_pal_ani = any(
+        chunk.pal_idx >= 10 and dpla.has_for_palette(chunk.pal_idx - 10) for chunk in dpc.chunks[chunk_idx]
+    )
+    if not has_pal_ani:
+        palette = cairo_palette(list(itertools.chain.from_iterable(dpl.palettes)))
+        return [[indexed_to_cairo_surface(chunk_image, palette)]]
+    ani_pal_lengths = [dpla.get_frame_count_for_palette(x) for x in (0, 1) if dpla.has_for_palette(x)]
+    if len(ani_pal_lengths) < 2:
+        len_pal_ani = ani_pal_lengths[0]
+    else:
+        len_pal_ani = lcm(*ani_pal_lengths)
+    pal_ani_frames = []
+    for pal_ani in range(0, len_pal_ani):
+        # Switch out the palette with that from the palette animation
+        palette = cairo_palette(
+            list(itertools.chain.from_iterable(dpla.apply_palette_animations(dpl.palettes, pal_ani)))
+        )
+        pal_ani_frames.append([indexed_to_cairo_surface(chunk_image, palette)])
+    return pal_ani_frames
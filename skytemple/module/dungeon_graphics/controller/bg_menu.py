@@ -43,6 +43,12 @@ from gi.repository.Gtk import ResponseType
 
 from skytemple.controller.main import MainController
 from skytemple.core.ui_utils import add_dialog_png_filter
+from skytemple.module.tiled_img.chunk_surface_provider import (
+    changed_chunks,
+    changed_palettes,
+    chunk_mappings,
+    chunks_using_palettes,
+)
 from skytemple.module.tiled_img.widget.chunk_editor import StChunkEditorDialog
 from skytemple.module.tiled_img.widget.palette_editor import StPaletteEditorDialog
 
@@ -55,6 +61,7 @@ if TYPE_CHECKING:
     )
 
 logger = logging.getLogger(__name__)
+DPC_TILES_PER_CHUNK = DPC_TILING_DIM * DPC_TILING_DIM
 
 
 class BgMenuController:
@@ -125,6 +132,8 @@ class BgMenuController:
 
     def on_men_chunks_layer1_edit_activate(self):
         all_tilemaps = list(itertools.chain.from_iterable(self.parent.dpc.chunks))
+        # Taken before the editor is shown, in case it changes the mappings in place.
+        old_chunks = chunk_mappings(all_tilemaps, DPC_TILES_PER_CHUNK)
         static_tiles_provider = DungeonTilesProvider(self.parent.dpci)
         palettes_provider = DungeonPalettesProvider(self.parent.dpl, self.parent.dpla)
         cntrl = StChunkEditorDialog(
@@ -136,8 +145,8 @@ class BgMenuController:
         )
         edited_mappings = cntrl.show_dialog()
         if edited_mappings:
-            self.parent.dpc.chunks = list(chunks(edited_mappings, DPC_TILING_DIM * DPC_TILING_DIM))
-            self.parent.reload_all()
+            self.parent.dpc.chunks = list(chunks(edited_mappings, DPC_TILES_PER_CHUNK))
+            self.parent.reload_chunks(changed_chunks(old_chunks, chunk_mappings(edited_mappings, DPC_TILES_PER_CHUNK)))
             self.parent.mark_as_modified()
         del cntrl
 
@@ -280,8 +289,9 @@ class BgMenuController:
         cntrl = StPaletteEditorDialog(MainController.window(), dict_pals)
         edited_palettes = cntrl.show_dialog()
         if edited_palettes:
+            pal_idxs = changed_palettes(self.parent.dpl.palettes, edited_palettes)
             self.parent.dpl.palettes = edited_palettes
-            self.parent.reload_all()
+            self.parent.reload_chunks(self._chunks_using_palettes(pal_idxs))
             self.parent.mark_as_modified()
         del cntrl
 
@@ -386,6 +396,12 @@ class BgMenuController:
             colors = list(self.parent.dpla.colors)
             colors[ani_pal_id * 16 : (ani_pal_id + 1) * 16] = edited_colors
             self.parent.dpla.colors = colors
-            self.parent.reload_all()
+            # Animation 0 is for palette 10, animation 1 for palette 11.
+            self.parent.reload_chunks(self._chunks_using_palettes([10 + ani_pal_id]))
             self.parent.mark_as_modified()
         del cntrl
+
+    def _chunks_using_palettes(self, pal_idxs: list[int]) -> list[int]:
+        return chunks_using_palettes(
+            list(itertools.chain.from_iterable(self.parent.dpc.chunks)), DPC_TILES_PER_CHUNK, pal_idxs
+        )
@@ -17,8 +17,6 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 
-from collections.abc import Iterable
-
 from gi.repository import GLib, Gtk, Gdk
 from gi.repository.GObject import ParamFlags
 from gi.repository.Gtk import Widget
@@ -26,7 +24,9 @@ from gi.repository.Gtk import Widget
 from skytemple.core.events.manager import EventManager
 from skytemple.core.mapbg_util.drawer_plugin.grid import GridDrawerPlugin
 from skytemple.core.mapbg_util.drawer_plugin.selection import SelectionDrawerPlugin
+from skytemple.core.mapbg_util.visible_area import visible_cells
 from skytemple.module.tiled_img.animation_context import AnimationContext
+from skytemple.module.tiled_img.chunk_surface_provider import ChunkSurfaceProvider
 import cairo
 
 from skytemple_files.graphics.dbg.protocol import DbgProtocol
@@ -42,18 +42,17 @@ class Drawer:
         draw_area: Widget,
         dbg: DbgProtocol | None,
         pal_ani_durations: int,
-        # chunks_surfaces[chunk_idx][palette_animation_frame][frame]
-        chunks_surfaces: Iterable[Iterable[list[cairo.Surface]]],
+        chunk_surfaces: ChunkSurfaceProvider,
     ):
         """
         Initialize a drawer...
         :param draw_area:  Widget to draw on.
         :param dbg: Either a DBG with chunk indexes or None, has to be set manually then for drawing
-        :param chunks_surfaces: Bg controller format chunk surfaces
+        :param chunk_surfaces: Provider of the chunk surfaces
         """
         self.draw_area = draw_area
 
-        self.reset(dbg, pal_ani_durations, chunks_surfaces)
+        self.reset(dbg, pal_ani_durations, chunk_surfaces)
 
         self.draw_chunk_grid = True
         self.draw_tile_grid = True
@@ -85,13 +84,15 @@ class Drawer:
         self.drawing_is_active = False
 
     # noinspection PyAttributeOutsideInit
-    def reset(self, dbg, pal_ani_durations, chunks_surfaces):
+    def reset(self, dbg, pal_ani_durations, chunk_surfaces: ChunkSurfaceProvider):
         if isinstance(dbg, DbgProtocol):
             self.mappings = dbg.mappings
         else:
             self.mappings = []
 
-        self.animation_context = AnimationContext([chunks_surfaces], 0, pal_ani_durations)
+        self.chunk_surfaces = chunk_surfaces
+        # Only used for the frame counters, the surfaces are rendered by the provider.
+        self.animation_context = AnimationContext([], 0, pal_ani_durations)
 
     def start(self):
         """Start drawing on the DrawingArea"""
@@ -113,6 +114,9 @@ class Drawer:
             return False
         self.animation_context.advance()
         if EventManager.instance().get_if_main_window_has_fous():
+            # Only the chunks drawn in the next frame have to stay loaded; this also applies to the chunks
+            # drawn by the cell renderers of icon views, which are all drawn again.
+            self.chunk_surfaces.release_pins()
             self.draw_area.queue_draw()
         return self.drawing_is_active
 
@@ -135,26 +139,29 @@ class Drawer:
         ctx.fill()
 
         # Layers
-        for chunks_at_frame in self.animation_context.current():
-            for i, chunk_at_pos in enumerate(self.mappings):
-                if 0 < chunk_at_pos < len(chunks_at_frame):
-                    chunk = chunks_at_frame[chunk_at_pos]
-                    ctx.set_source_surface(chunk, 0, 0)
+        if do_translates:
+            # Only the chunks drawn now have to stay loaded (cell renderers only draw single chunks).
+            self.chunk_surfaces.release_pins()
+        pal_ani_frame = self.animation_context.pal_ani_frame
+        if do_translates:
+            # Only the chunks that are on screen
+            columns, rows = visible_cells(ctx, chunk_width, chunk_height, self.width_in_chunks, self.height_in_chunks)
+            positions = [
+                (row * self.width_in_chunks + column, column * chunk_width, row * chunk_height)
+                for row in rows
+                for column in columns
+            ]
+        else:
+            positions = [(i, 0, 0) for i in range(len(self.mappings))]
+        for i, x, y in positions:
+            chunk_at_pos = self.mappings[i] if i < len(self.mappings) else 0
+            if 0 < chunk_at_pos < len(self.chunk_surfaces):
+                chunk = self.chunk_surfaces.get(chunk_at_pos, pal_ani_frame)
+                if chunk is not None:
+                    ctx.set_source_surface(chunk, x, y)
                     ctx.get_source().set_filter(cairo.Filter.NEAREST)
-                    ctx.paint()
-                if (i + 1) % self.width_in_chunks == 0:
-                    # Move to beginning of next line
-                    if do_translates:
-                        ctx.translate(-chunk_width * (self.width_in_chunks - 1), chunk_height)
-                else:
-                    # Move to next tile in line
-                    if do_translates:
-                        ctx.translate(chunk_width, 0)
-
-            # Move back to beginning
-            if do_translates:
-                ctx.translate(0, -chunk_height * self.height_in_chunks)
-            break
+                    ctx.rectangle(x, y, chunk_width, chunk_height)
+                    ctx.fill()
 
         size_w, size_h = self.draw_area.get_size_request()
         assert size_w is not None and size_h is not None
@@ -175,10 +182,11 @@ class Drawer:
 
     def selection_draw_callback(self, ctx: cairo.Context, x: int, y: int):
         # Draw a chunk
-        chunks_at_frame = self.animation_context.current()[0]
-        ctx.set_source_surface(chunks_at_frame[self.interaction_chunks_selected_id], x, y)
-        ctx.get_source().set_filter(cairo.Filter.NEAREST)
-        ctx.paint()
+        chunk = self.chunk_surfaces.get(self.interaction_chunks_selected_id, self.animation_context.pal_ani_frame)
+        if chunk is not None:
+            ctx.set_source_surface(chunk, x, y)
+            ctx.get_source().set_filter(cairo.Filter.NEAREST)
+            ctx.paint()
 
     def set_mouse_position(self, x, y):
         self.mouse_x = x
@@ -210,9 +218,9 @@ class DrawerCellRenderer(Drawer, Gtk.CellRenderer):
         self,
         icon_view,
         pal_ani_durations: int,
-        chunks_surfaces: list[list[list[cairo.Surface]]],
+        chunk_surfaces: ChunkSurfaceProvider,
     ):
-        super().__init__(icon_view, None, pal_ani_durations, chunks_surfaces)
+        super().__init__(icon_view, None, pal_ani_durations, chunk_surfaces)
         super(Gtk.CellRenderer, self).__init__()
 
         self.chunkidx = 0
@@ -17,14 +17,13 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 
-from collections.abc import Iterable
-
 from gi.repository import GLib, Gtk, Gdk
 from gi.repository.GObject import ParamFlags
 from gi.repository.Gtk import Widget
 
 from skytemple.core.events.manager import EventManager
 from skytemple.module.tiled_img.animation_context import AnimationContext
+from skytemple.module.tiled_img.chunk_surface_provider import ChunkSurfaceProvider
 import cairo
 
 from skytemple_files.graphics.dpc import DPC_TILING_DIM
@@ -38,34 +37,34 @@ class DungeonChunkDrawer:
         self,
         draw_area: Widget,
         pal_ani_durations: int,
-        # chunks_surfaces[chunk_idx][palette_animation_frame][frame]
-        # Since we only have static tiles, frames should always only contain one element.
-        chunks_surfaces: Iterable[Iterable[list[cairo.Surface]]],
+        chunk_surfaces: ChunkSurfaceProvider,
     ):
         """
         Initialize a drawer...
         :param draw_area:  Widget to draw on.
         :param pal_ani_durations: How many frames to hold a palette animation.
-        :param chunks_surfaces: Bg controller format chunk surfaces
+        :param chunk_surfaces: Provider of the chunk surfaces
         """
         self.draw_area = draw_area
 
-        self.reset(pal_ani_durations, chunks_surfaces)
+        self.reset(pal_ani_durations, chunk_surfaces)
 
         self.scale = 2
 
         self.drawing_is_active = False
 
     # noinspection PyAttributeOutsideInit
-    def reset(self, pal_ani_durations, chunks_surfaces):
+    def reset(self, pal_ani_durations, chunk_surfaces):
         # Chunk to draw
         self.chunkidx = 0
         self.pal_ani_durations = pal_ani_durations
-        self.reset_surfaces(chunks_surfaces)
+        self.reset_surfaces(chunk_surfaces)
 
     # noinspection PyAttributeOutsideInit
-    def reset_surfaces(self, chunks_surfaces):
-        self.animation_context = AnimationContext([chunks_surfaces], 1, self.pal_ani_durations)
+    def reset_surfaces(self, chunk_surfaces: ChunkSurfaceProvider):
+        self.chunk_surfaces = chunk_surfaces
+        # Only used for the frame counters, the surfaces are rendered by the provider.
+        self.animation_context = AnimationContext([], 1, self.pal_ani_durations)
 
     def start(self):
         """Start drawing on the DrawingArea"""
@@ -87,6 +86,9 @@ class DungeonChunkDrawer:
             return False
         self.animation_context.advance()
         if EventManager.instance().get_if_main_window_has_fous():
+            # Only the chunks drawn in the next frame have to stay loaded; this also applies to the chunks
+            # drawn by the cell renderers of icon views, which are all drawn again.
+            self.chunk_surfaces.release_pins()
             self.draw_area.queue_draw()
         return self.drawing_is_active
 
@@ -94,9 +96,10 @@ class DungeonChunkDrawer:
         ctx.set_antialias(cairo.Antialias.NONE)
         ctx.scale(self.scale, self.scale)
 
-        chunks_at_frame = self.animation_context.current()[0]
-        if 0 <= self.chunkidx < len(chunks_at_frame):
-            chunk = chunks_at_frame[self.chunkidx]
+        if 0 <= self.chunkidx < len(self.chunk_surfaces):
+            chunk = self.chunk_surfaces.get(self.chunkidx, self.animation_context.pal_ani_frame)
+            if chunk is None:
+                return
             ctx.set_source_surface(chunk, 0, 0)
             ctx.get_source().set_filter(cairo.Filter.NEAREST)
             ctx.paint()
@@ -112,10 +115,10 @@ class DungeonChunkCellDrawer(DungeonChunkDrawer, Gtk.CellRenderer):
         self,
         icon_view,
         pal_ani_durations: int,
-        chunks_surfaces: Iterable[Iterable[list[cairo.Surface]]],
+        chunk_surfaces: ChunkSurfaceProvider,
         selection_draw_solid,
     ):
-        super().__init__(icon_view, pal_ani_durations, chunks_surfaces)
+        super().__init__(icon_view, pal_ani_durations, chunk_surfaces)
         super(Gtk.CellRenderer, self).__init__()
         self.selection_draw_solid = selection_draw_solid
 
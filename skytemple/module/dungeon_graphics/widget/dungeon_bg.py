@@ -15,13 +15,12 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
-import itertools
 from typing import TYPE_CHECKING, cast
-import cairo
 from gi.repository import Gtk, Gdk
 from skytemple.controller.main import MainController
 from skytemple.core.canvas_scale import CanvasScale
-from skytemple.core.img_utils import pil_to_cairo_surface
+from skytemple.module.dungeon_graphics.chunk_surfaces import dungeon_chunk_provider
+from skytemple.module.tiled_img.chunk_surface_provider import ChunkSurfaceProvider
 from skytemple.core.message_dialog import SkyTempleMessageDialog
 from skytemple.core.ui_utils import data_dir, safe_destroy
 from skytemple.init_locale import LocalePatchedGtkTemplate
@@ -30,7 +29,6 @@ from skytemple.module.dungeon_graphics.dungeon_bg_drawer import (
     Drawer,
     DrawerCellRenderer,
 )
-from skytemple_files.common.util import lcm
 from skytemple_files.graphics.dbg.protocol import DbgProtocol
 from skytemple_files.graphics.dbg import DBG_TILING_DIM, DBG_WIDTH_AND_HEIGHT
 from skytemple_files.graphics.dpc.protocol import DpcProtocol
@@ -166,9 +164,6 @@ class StDungeonGraphicsDungeonBgPage(Gtk.Box):
         self.dpla: DplaProtocol = module.get_bg_dpla(item_data)
         self.dpc: DpcProtocol = module.get_bg_dpc(item_data)
         self.dpci: DpciProtocol = module.get_bg_dpci(item_data)
-        # Cairo surfaces for each tile in each layer for each frame
-        # chunks_surfaces[chunk_idx][palette_animation_frame]
-        self.chunks_surfaces: list[list[list[cairo.Surface]]] = []
         self.drawer: Drawer | None = None
         self.current_icon_view_renderer: DrawerCellRenderer | None = None
         self.bg_draw: Gtk.DrawingArea | None = None
@@ -358,40 +353,19 @@ class StDungeonGraphicsDungeonBgPage(Gtk.Box):
     def on_men_tools_tilequant_activate(self, *args):
         MainController.show_tilequant_dialog(DPL_MAX_PAL, DPL_PAL_LEN)
 
+    def reload_chunks(self, chunk_idxs: list[int] | None):
+        """Renders only the chunks again after they were edited, or reloads everything (like reload_all) if None."""
+        if chunk_idxs is None:
+            self.reload_all()
+            return
+        self.chunk_surfaces.invalidate(chunk_idxs)
+        self.queue_draw()
+
     def _init_chunk_imgs(self):
-        """(Re)-draw the chunk images"""
-        self.chunks_surfaces = []
-        # For each chunk...
-        for chunk_idx in range(0, len(self.dpc.chunks)):
-            # For each frame of palette animation... ( applicable for this chunk )
-            pal_ani_frames: list[list[cairo.Surface]] = []
-            self.chunks_surfaces.append(pal_ani_frames)
-            chunk_data = self.dpc.chunks[chunk_idx]
-            chunk_image = self.dpc.single_chunk_to_pil(chunk_idx, self.dpci, self.dpl.palettes)
-            has_pal_ani = any(
-                chunk.pal_idx >= 10 and self.dpla.has_for_palette(chunk.pal_idx - 10) for chunk in chunk_data
-            )
-            if not has_pal_ani:
-                len_pal_ani = 1
-            else:
-                ani_pal_lengths = [
-                    self.dpla.get_frame_count_for_palette(x) for x in (0, 1) if self.dpla.has_for_palette(x)
-                ]
-                if len(ani_pal_lengths) < 2:
-                    len_pal_ani = ani_pal_lengths[0]
-                else:
-                    len_pal_ani = lcm(*ani_pal_lengths)
-            for pal_ani in range(0, len_pal_ani):
-                # We don't have animated tiles, so ani_frames just has one entry.
-                ani_frames: list[cairo.Surface] = []
-                pal_ani_frames.append(ani_frames)
-                # Switch out the palette with that from the palette animation
-                if has_pal_ani:
-                    pal_for_frame = itertools.chain.from_iterable(
-                        self.dpla.apply_palette_animations(self.dpl.palettes, pal_ani)
-                    )
-                    chunk_image.putpalette(pal_for_frame)
-                ani_frames.append(pil_to_cairo_surface(chunk_image.convert("RGBA")))
+        """(Re)-create the provider of the chunk images. The chunks are rendered once they are drawn."""
+        self.chunk_surfaces: ChunkSurfaceProvider = dungeon_chunk_provider(
+            self.dpc, self.dpci, self.dpl, self.dpla, self.queue_draw
+        )
         # TODO: No DPLA animations at different speeds supported at the moment
         ani_pal11 = 9999
         ani_pal12 = 9999
@@ -424,7 +398,7 @@ class StDungeonGraphicsDungeonBgPage(Gtk.Box):
             DBG_WIDTH_AND_HEIGHT * DBG_TILING_DIM * DPCI_TILE_DIM,
             DBG_WIDTH_AND_HEIGHT * DBG_TILING_DIM * DPCI_TILE_DIM,
         )
-        self.drawer = Drawer(self.bg_draw, self.dbg, self.pal_ani_durations, self.chunks_surfaces)
+        self.drawer = Drawer(self.bg_draw, self.dbg, self.pal_ani_durations, self.chunk_surfaces)
         self.drawer.start()
 
     def _init_chunks_icon_view(self):
@@ -432,13 +406,13 @@ class StDungeonGraphicsDungeonBgPage(Gtk.Box):
         self._deinit_chunks_icon_view()
         icon_view = self.bg_chunks_view
         icon_view.set_selection_mode(Gtk.SelectionMode.BROWSE)
-        self.current_icon_view_renderer = DrawerCellRenderer(icon_view, self.pal_ani_durations, self.chunks_surfaces)
+        self.current_icon_view_renderer = DrawerCellRenderer(icon_view, self.pal_ani_durations, self.chunk_surfaces)
         store = Gtk.ListStore(int)
         icon_view.set_model(store)
         icon_view.pack_start(self.current_icon_view_renderer, True)
         icon_view.add_attribute(self.current_icon_view_renderer, "chunkidx", 0)
         icon_view.connect("selection-changed", self.on_current_icon_view_selection_changed)
-        for idx in range(0, len(self.chunks_surfaces)):
+        for idx in range(0, len(self.chunk_surfaces)):
             store.append([idx])
         first_iter = store.get_iter_first()
         if first_iter:
@@ -484,5 +458,5 @@ class StDungeonGraphicsDungeonBgPage(Gtk.Box):
             self.current_icon_view_renderer.stop()
         self._init_chunk_imgs()
         assert self.drawer is not None
-        self.drawer.reset(self.dbg, self.pal_ani_durations, self.chunks_surfaces)
+        self.drawer.reset(self.dbg, self.pal_ani_durations, self.chunk_surfaces)
         self._init_main_area()
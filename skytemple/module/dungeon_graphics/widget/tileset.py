@@ -15,7 +15,6 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
-import itertools
 import math
 import os
 import shutil
@@ -23,8 +22,7 @@ import sys
 import webbrowser
 from typing import TYPE_CHECKING, Optional, cast
 from collections.abc import Callable
-from collections.abc import Iterable, MutableSequence
-import cairo
+from collections.abc import MutableSequence
 from skytemple_files.user_error import mark_as_user_err
 from skytemple.core.error_handler import display_error
 from skytemple.core.message_dialog import SkyTempleMessageDialog
@@ -48,10 +46,12 @@ from skytemple_files.hardcoded.dungeons import (
 from gi.repository import Gtk
 from skytemple.controller.main import MainController
 from skytemple.core.img_utils import pil_to_cairo_surface
+from skytemple.module.dungeon_graphics.chunk_surfaces import dungeon_chunk_provider
+from skytemple.module.tiled_img.chunk_surface_provider import ChunkSurfaceProvider
 from skytemple.module.dungeon_graphics.dungeon_chunk_drawer import (
     DungeonChunkCellDrawer,
 )
-from skytemple_files.common.util import lcm, chunks
+from skytemple_files.common.util import chunks
 from skytemple_files.graphics.dma.protocol import DmaProtocol, DmaExtraType, DmaType
 from skytemple_files.graphics.dpc.protocol import DpcProtocol
 from skytemple_files.graphics.dpci.protocol import DpciProtocol
@@ -179,7 +179,6 @@ class StDungeonGraphicsTilesetPage(Gtk.Box):
         ]
         self.pal_ani_durations = 0
         self.current_icon_view_renderers: list[DungeonChunkCellDrawer] = []
-        self.chunks_surfaces: Iterable[Iterable[list[cairo.Surface]]] = []
         self._init_chunk_imgs()
         self.dtef = None
         self.menu_controller = BgMenuController(self)
@@ -474,44 +473,23 @@ class StDungeonGraphicsTilesetPage(Gtk.Box):
             renderer.stop()
         self._init_chunk_imgs()
         for renderer in self.current_icon_view_renderers:
-            renderer.reset(self.pal_ani_durations, self.chunks_surfaces)
+            renderer.reset(self.pal_ani_durations, self.chunk_surfaces)
         self._init_rule_icon_views()
         self._init_chunk_picker_icon_view()
 
+    def reload_chunks(self, chunk_idxs: list[int] | None):
+        """Renders only the chunks again after they were edited, or reloads everything (like reload_all) if None."""
+        if chunk_idxs is None:
+            self.reload_all()
+            return
+        self.chunk_surfaces.invalidate(chunk_idxs)
+        self.queue_draw()
+
     def _init_chunk_imgs(self):
-        """(Re)-draw the chunk images"""
-        self.chunks_surfaces = []
-        # For each chunk...
-        for chunk_idx in range(0, len(self.dpc.chunks)):
-            # For each frame of palette animation... ( applicable for this chunk )
-            pal_ani_frames: list[list[cairo.Surface]] = []
-            self.chunks_surfaces.append(pal_ani_frames)
-            chunk_data = self.dpc.chunks[chunk_idx]
-            chunk_image = self.dpc.single_chunk_to_pil(chunk_idx, self.dpci, self.dpl.palettes)
-            has_pal_ani = any(
-                chunk.pal_idx >= 10 and self.dpla.has_for_palette(chunk.pal_idx - 10) for chunk in chunk_data
-            )
-            if not has_pal_ani:
-                len_pal_ani = 1
-            else:
-                ani_pal_lengths = [
-                    self.dpla.get_frame_count_for_palette(x) for x in (0, 1) if self.dpla.has_for_palette(x)
-                ]
-                if len(ani_pal_lengths) < 2:
-                    len_pal_ani = ani_pal_lengths[0]
-                else:
-                    len_pal_ani = lcm(*ani_pal_lengths)
-            for pal_ani in range(0, len_pal_ani):
-                # We don't have animated tiles, so ani_frames just has one entry.
-                ani_frames: list[cairo.Surface] = []
-                pal_ani_frames.append(ani_frames)
-                # Switch out the palette with that from the palette animation
-                if has_pal_ani:
-                    pal_for_frame = itertools.chain.from_iterable(
-                        self.dpla.apply_palette_animations(self.dpl.palettes, pal_ani)
-                    )
-                    chunk_image.putpalette(pal_for_frame)
-                ani_frames.append(pil_to_cairo_surface(chunk_image.convert("RGBA")))
+        """(Re)-create the provider of the chunk images. The chunks are rendered once they are drawn."""
+        self.chunk_surfaces: ChunkSurfaceProvider = dungeon_chunk_provider(
+            self.dpc, self.dpci, self.dpl, self.dpla, self.queue_draw
+        )
         # TODO: No DPLA animations at different speeds supported at the moment
         ani_pal11 = 9999
         ani_pal12 = 9999
@@ -567,7 +545,7 @@ class StDungeonGraphicsTilesetPage(Gtk.Box):
             renderer = DungeonChunkCellDrawer(
                 icon_view,
                 self.pal_ani_durations,
-                self.chunks_surfaces,
+                self.chunk_surfaces,
                 selection_draw_solid,
             )
             self.current_icon_view_renderers.append(renderer)
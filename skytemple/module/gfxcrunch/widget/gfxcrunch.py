@@ -72,7 +72,7 @@ class StGfxcrunchDialog(Gtk.Dialog):
     def import_sprite(self, dir_fn: str) -> bytes:
         with tempfile.TemporaryDirectory() as tmp_path:
             tmp_path = os.path.join(tmp_path, "tmp.wan")
-            AsyncTaskDelegator.run_task(self._run_gfxcrunch([dir_fn, tmp_path]))
+            AsyncTaskDelegator.run_task(self._run_gfxcrunch([dir_fn, tmp_path]), threadsafe=False)
             self._run_window()
             if self.status == GfxcrunchStatus.SUCCESS:
                 with open(tmp_path, "rb") as f:
@@ -85,7 +85,7 @@ class StGfxcrunchDialog(Gtk.Dialog):
             tmp_path = os.path.join(tmp_path, "tmp.wan")
             with open(tmp_path, "wb") as f:
                 f.write(wan)
-            AsyncTaskDelegator.run_task(self._run_gfxcrunch([tmp_path, dir_fn]))
+            AsyncTaskDelegator.run_task(self._run_gfxcrunch([tmp_path, dir_fn]), threadsafe=False)
             self._run_window()
             if self.status != GfxcrunchStatus.SUCCESS:
                 raise make_user_err(RuntimeError, _("The gfxcrunch process failed."))
@@ -18,7 +18,7 @@
 from range_typed_integers import i16, u16, u8
 
 from gi.repository import Gtk
-from skytemple.core.abstract_module import AbstractModule, DebuggingInfo
+from skytemple.core.abstract_module import AbstractModule, DebuggingInfo, LazyFile
 from skytemple.core.item_tree import (
     ItemTree,
     ItemTreeEntry,
@@ -92,6 +92,8 @@ MAIN_VIEW_DATA = StStatusPageData(
 class ListsModule(AbstractModule):
     """Module to modify lists."""
 
+    waza_p_bin = LazyFile(WAZA_P_BIN, FileType.WAZA_P)
+
     @classmethod
     def depends_on(cls):
         return ["monster", "map_bg"]
@@ -117,8 +119,6 @@ class ListsModule(AbstractModule):
         self._tactics_root_iter: ItemTreeEntryRef
         self._iq_tree_iter: ItemTreeEntryRef
 
-        self.waza_p_bin: WazaPProtocol = self.project.open_file_in_rom(WAZA_P_BIN, FileType.WAZA_P)
-
     def load_tree_items(self, item_tree: ItemTree):
         root = item_tree.add_entry(
             None,
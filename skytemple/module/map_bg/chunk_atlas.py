@@ -0,0 +1,162 @@
+"""Renders all animation frames of the chunks of a map background layer into one atlas surface."""
+
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import itertools
+import math
+from collections.abc import Iterable, Sequence
+
+import cairo
+from skytemple_files.graphics.bpa.protocol import BpaProtocol
+from skytemple_files.graphics.bpc import BPC_TILE_DIM
+from skytemple_files.graphics.bpc.protocol import BpcProtocol
+from skytemple_files.graphics.bpl.protocol import BplProtocol
+
+from skytemple.core.img_utils import cairo_palette, indexed_to_cairo_bytes, write_to_surface
+
+
+class ChunkAtlas:
+    """
+    All frames of all chunks of one layer, in a grid of cells in one surface.
+
+    Every chunk has a cell for each of its frames of palette animation and of BPA animation; chunks that are not
+    animated only have one cell. Drawers paint sub-rectangles of the atlas (see ``paint``).
+
+    The cells of a chunk are only rendered when it is painted for the first time. This happens on the main thread,
+    since the BPC temporarily changes its tiles while rendering BPA frames.
+    """
+
+    def __init__(self, bpc: BpcProtocol, layer: int, bpl: BplProtocol, bpas: Sequence[BpaProtocol | None]):
+        self.bpc = bpc
+        self.layer = layer
+        self.bpl = bpl
+        self.bpas = bpas
+        self.chunk_width = bpc.tiling_width * BPC_TILE_DIM
+        self.chunk_height = bpc.tiling_height * BPC_TILE_DIM
+
+        self._palettes: list[list[int]] = []
+        self._number_bpa_frames = 1
+        self._read_frames()
+
+        # For each chunk: index of the first cell, number of palette animation frames, number of BPA frames
+        self._cells: list[tuple[int, int, int]] = []
+        number_cells = 0
+        for chunk_idx in range(bpc.layers[layer].chunk_tilemap_len):
+            pal_ani_frames, bpa_frames = self._frame_counts(chunk_idx)
+            self._cells.append((number_cells, pal_ani_frames, bpa_frames))
+            number_cells += pal_ani_frames * bpa_frames
+        self._rendered = [False] * len(self._cells)
+        # Roughly square, to stay far below the maximum size of cairo surfaces.
+        self.columns = max(1, math.ceil(math.sqrt(number_cells * self.chunk_height / self.chunk_width)))
+        self.surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32,
+            self.columns * self.chunk_width,
+            max(1, math.ceil(number_cells / self.columns)) * self.chunk_height,
+        )
+
+    def __len__(self):
+        return len(self._cells)
+
+    @property
+    def highest_palette(self) -> int:
+        """The highest palette index used by any tile of the chunks."""
+        return max((mapping.pal_idx for mapping in self.bpc.layers[self.layer].tilemap), default=0)
+
+    def frame_counts(self, chunk_idx: int) -> tuple[int, int]:
+        """The number of frames of palette animation and of BPA animation in the atlas for the chunk."""
+        return self._cells[chunk_idx][1], self._cells[chunk_idx][2]
+
+    def cell_origin(self, chunk_idx: int, pal_ani_frame: int, bpa_frame: int) -> tuple[int, int]:
+        """
+        Position of the cell of the chunk in the atlas. The frame numbers are the counters of the AnimationContext;
+        like there, they wrap around for each chunk separately.
+        """
+        first, pal_ani_frames, bpa_frames = self._cells[chunk_idx]
+        cell = first + (pal_ani_frame % pal_ani_frames) * bpa_frames + bpa_frame % bpa_frames
+        return (cell % self.columns) * self.chunk_width, (cell // self.columns) * self.chunk_height
+
+    def paint(self, ctx: cairo.Context, chunk_idx: int, pal_ani_frame: int, bpa_frame: int, x: float, y: float):
+        """Paints the chunk with its top left corner at x, y."""
+        if not self._rendered[chunk_idx]:
+            self._render(chunk_idx)
+        cell_x, cell_y = self.cell_origin(chunk_idx, pal_ani_frame, bpa_frame)
+        ctx.set_source_surface(self.surface, x - cell_x, y - cell_y)
+        ctx.get_source().set_filter(cairo.Filter.NEAREST)
+        ctx.rectangle(x, y, self.chunk_width, self.chunk_height)
+        ctx.fill()
+
+    def invalidate(self, chunk_idxs: Iterable[int]) -> bool:
+        """
+        Renders the chunks again the next time they are painted, after they were edited. Returns False if that's not
+        possible, because the number of chunks or of the frames of one of them changed; a new atlas is needed then.
+        """
+        chunk_idxs = list(chunk_idxs)
+        # The palettes might have been edited.
+        self._read_frames()
+        if len(self._cells) != self.bpc.layers[self.layer].chunk_tilemap_len:
+            return False
+        for chunk_idx in chunk_idxs:
+            if self._cells[chunk_idx][1:] != self._frame_counts(chunk_idx):
+                return False
+        for chunk_idx in chunk_idxs:
+            self._rendered[chunk_idx] = False
+        return True
+
+    def _render(self, chunk_idx: int):
+        images = self.bpc.single_chunk_animated_to_pil(self.layer, chunk_idx, self.bpl.palettes, self.bpas)
+        _, pal_ani_frames, bpa_frames = self._cells[chunk_idx]
+        for pal_ani in range(pal_ani_frames):
+            palette = self._palettes[pal_ani + 1] if pal_ani_frames > 1 else self._palettes[0]
+            for bpa_frame in range(bpa_frames):
+                x, y = self.cell_origin(chunk_idx, pal_ani, bpa_frame)
+                pixels = indexed_to_cairo_bytes(images[bpa_frame % len(images)], palette)
+                write_to_surface(self.surface, pixels, self.chunk_width, self.chunk_height, x, y)
+        self._rendered[chunk_idx] = True
+
+    def _read_frames(self):
+        # The palettes to apply to the chunks: The first without palette animation, then one per frame of it.
+        # The first color of each 16 color palette is transparent.
+        self._palettes = [cairo_palette(list(itertools.chain.from_iterable(self.bpl.palettes)), 16)]
+        if self.bpl.has_palette_animation:
+            for pal_ani in range(len(self.bpl.animation_palette)):
+                rgb_palette = list(itertools.chain.from_iterable(self.bpl.apply_palette_animations(pal_ani)))
+                self._palettes.append(cairo_palette(rgb_palette, 16))
+        self._number_bpa_frames = self._count_bpa_frames()
+
+    def _frame_counts(self, chunk_idx: int) -> tuple[int, int]:
+        """The number of frames of palette animation and of BPA animation of the chunk."""
+        chunk = self.bpc.get_chunk(self.layer, chunk_idx)
+        has_pal_ani = len(self._palettes) > 1 and any(
+            self.bpl.is_palette_affected_by_animation(mapping.pal_idx) for mapping in chunk
+        )
+        uses_bpa = any(mapping.idx > self.bpc.layers[self.layer].number_tiles for mapping in chunk)
+        return (
+            len(self._palettes) - 1 if has_pal_ani else 1,
+            self._number_bpa_frames if uses_bpa else 1,
+        )
+
+    def _count_bpa_frames(self) -> int:
+        """
+        The number of frames single_chunk_animated_to_pil of the BPC returns for chunks using BPA tiles:
+        It renders frames until all BPAs of the layer are back at their first frame at the same time.
+        """
+        if len(self.bpas) < 1 or not any(x > 0 for x in self.bpc.layers[self.layer].bpas):
+            return 1
+        frame_counts = [bpa.number_of_frames for bpa in self.bpc.get_bpas_for_layer(self.layer, self.bpas)]
+        return math.lcm(*(count for count in frame_counts if count > 0))
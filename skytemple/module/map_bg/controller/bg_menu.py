@@ -23,7 +23,7 @@ import os
 import re
 import sys
 from collections import OrderedDict
-from collections.abc import MutableSequence
+from collections.abc import Iterable, MutableSequence
 from functools import partial
 from typing import TYPE_CHECKING, cast
 
@@ -61,6 +61,12 @@ from skytemple.module.map_bg.controller.bg_menu_dialogs.map_width_height import
     on_map_height_chunks_changed,
     on_map_wh_link_state_set,
 )
+from skytemple.module.tiled_img.chunk_surface_provider import (
+    changed_chunks,
+    changed_palettes,
+    chunk_mappings,
+    chunks_using_palettes,
+)
 from skytemple.module.tiled_img.widget.chunk_editor import StChunkEditorDialog
 from skytemple.module.tiled_img.widget.palette_editor import StPaletteEditorDialog
 
@@ -366,6 +372,8 @@ class BgMenuController:
     def on_men_chunks_layer1_edit_activate(self):
         # This is controlled by a separate controller
         bpc_layer_to_use = 0 if self.parent.bma.number_of_layers < 2 else 1
+        # Taken before the editor is shown, in case it changes the mappings in place.
+        old_chunks = chunk_mappings(self.parent.bpc.layers[bpc_layer_to_use].tilemap, self._tiles_per_chunk())
         (
             mappings,
             static_tiles_provider,
@@ -388,7 +396,9 @@ class BgMenuController:
             if new_chunk_size > self.parent.bpc.layers[bpc_layer_to_use].chunk_tilemap_len:
                 self.parent.bpc.layers[bpc_layer_to_use].chunk_tilemap_len = new_chunk_size
             self.parent.bpc.layers[bpc_layer_to_use].tilemap = edited_mappings.copy()
-            self.parent.reload_all()
+            self.parent.reload_chunks(
+                {bpc_layer_to_use: changed_chunks(old_chunks, chunk_mappings(edited_mappings, self._tiles_per_chunk()))}
+            )
             self.parent.mark_as_modified()
         del cntrl
 
@@ -398,6 +408,7 @@ class BgMenuController:
             self._no_second_layer()
         else:
             bpc_layer_to_use = 0
+            old_chunks = chunk_mappings(self.parent.bpc.layers[bpc_layer_to_use].tilemap, self._tiles_per_chunk())
             (
                 mappings,
                 static_tiles_provider,
@@ -421,7 +432,13 @@ class BgMenuController:
                 if new_chunk_size > self.parent.bpc.layers[bpc_layer_to_use].chunk_tilemap_len:
                     self.parent.bpc.layers[bpc_layer_to_use].chunk_tilemap_len = new_chunk_size
                 self.parent.bpc.layers[bpc_layer_to_use].tilemap = edited_mappings
-                self.parent.reload_all()
+                self.parent.reload_chunks(
+                    {
+                        bpc_layer_to_use: changed_chunks(
+                            old_chunks, chunk_mappings(edited_mappings, self._tiles_per_chunk())
+                        )
+                    }
+                )
                 self.parent.mark_as_modified()
             del cntrl
 
@@ -733,8 +750,9 @@ class BgMenuController:
         cntrl = StPaletteEditorDialog(MainController.window(), dict_pals)
         edited_palettes = cntrl.show_dialog()
         if edited_palettes:
+            pal_idxs = changed_palettes(self.parent.bpl.get_real_palettes(), edited_palettes)
             self.parent.bpl.set_palettes(edited_palettes)
-            self.parent.reload_all()
+            self._reload_chunks_using_palettes(pal_idxs)
             self.parent.mark_as_modified()
         del cntrl
 
@@ -880,7 +898,9 @@ class BgMenuController:
         edited_palettes = cntrl.show_dialog()
         if edited_palettes:
             self.parent.bpl.animation_palette = edited_palettes
-            self.parent.reload_all()
+            self._reload_chunks_using_palettes(
+                i for i in range(self.parent.bpl.number_palettes) if self.parent.bpl.is_palette_affected_by_animation(i)
+            )
             self.parent.mark_as_modified()
         del cntrl
 
@@ -1023,6 +1043,18 @@ class BgMenuController:
     def _get_bpa_export_name_pattern(self, bpa_number, frame_number):
         return f"{self.parent.module.bgs.level[self.parent.item_data].bma_name}_bpa{bpa_number}_{frame_number}.png"
 
+    def _reload_chunks_using_palettes(self, pal_idxs: Iterable[int]):
+        pal_idxs = list(pal_idxs)
+        self.parent.reload_chunks(
+            {
+                layer: chunks_using_palettes(self.parent.bpc.layers[layer].tilemap, self._tiles_per_chunk(), pal_idxs)
+                for layer in range(self.parent.bpc.number_of_layers)
+            }
+        )
+
+    def _tiles_per_chunk(self) -> int:
+        return self.parent.bpc.tiling_width * self.parent.bpc.tiling_height
+
     def _get_chunk_editor_provider(
         self,
         bpc_layer_to_use,
@@ -28,6 +28,9 @@ from skytemple.core.events.manager import EventManager
 from skytemple.core.mapbg_util.drawer_plugin.grid import GridDrawerPlugin
 from skytemple.core.mapbg_util.drawer_plugin.selection import SelectionDrawerPlugin
 from skytemple.core.mapbg_util.map_tileset_overlay import MapTilesetOverlay
+from skytemple.core.mapbg_util.visible_area import visible_cells
+from skytemple.module.map_bg.chunk_atlas import ChunkAtlas
+from skytemple.module.map_bg.tile_overlay import CollisionOverlay, DataOverlay, TileOverlay, label_atlas, paint_label
 from skytemple.module.tiled_img.animation_context import AnimationContext
 from skytemple_files.graphics.bma.protocol import BmaProtocol
 import cairo
@@ -44,6 +47,93 @@ class DrawerInteraction(Enum):
     DAT = auto()
 
 
+class CompositedLayer:
+    """
+    A layer of the map with all of its chunks painted into one surface, so it can be drawn at once.
+
+    ``update`` only paints the chunks again that changed since the last update, and the animated chunks
+    whose current frame changed.
+    """
+
+    def __init__(self, atlas: ChunkAtlas, width_in_chunks: int, height_in_chunks: int):
+        self.atlas = atlas
+        self.width_in_chunks = width_in_chunks
+        self.height_in_chunks = height_in_chunks
+        self.surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32,
+            max(1, width_in_chunks * atlas.chunk_width),
+            max(1, height_in_chunks * atlas.chunk_height),
+        )
+        # The chunk painted at each position, -1 if it needs to be painted.
+        self._painted = [-1] * (width_in_chunks * height_in_chunks)
+        self._pal_ani_frame = 0
+        self._bpa_frame = 0
+        # Positions of the chunks with more than one frame of palette or BPA animation.
+        self._pal_animated: set[int] = set()
+        self._bpa_animated: set[int] = set()
+        # Positions that need to be painted, but were not visible yet.
+        self._pending: set[int] = set()
+
+    def is_animated(self) -> bool:
+        return len(self._pal_animated) > 0 or len(self._bpa_animated) > 0
+
+    def invalidate(self, chunk_idxs: Iterable[int]):
+        """Paints the positions that show one of the chunks again on the next update."""
+        chunk_idxs = set(chunk_idxs)
+        self._painted = [-1 if chunk in chunk_idxs else chunk for chunk in self._painted]
+
+    def update(self, mappings: Sequence[int], pal_ani_frame: int, bpa_frame: int, columns: range, rows: range):
+        """
+        Paints the chunks that changed. Only those in the visible columns and rows are painted now, the others
+        when they become visible.
+        """
+        number_positions = len(self._painted)
+        mappings = list(mappings[:number_positions])
+        mappings += [0] * (number_positions - len(mappings))
+
+        dirty = self._pending
+        if mappings != self._painted:
+            dirty.update(i for i, (new, old) in enumerate(zip(mappings, self._painted)) if new != old)
+        if pal_ani_frame != self._pal_ani_frame:
+            dirty.update(self._pal_animated)
+        if bpa_frame != self._bpa_frame:
+            dirty.update(self._bpa_animated)
+        self._painted = mappings
+        self._pal_ani_frame = pal_ani_frame
+        self._bpa_frame = bpa_frame
+        self._pending = set()
+        if len(dirty) < 1:
+            return
+
+        ctx = cairo.Context(self.surface)
+        for i in dirty:
+            column = i % self.width_in_chunks
+            row = i // self.width_in_chunks
+            if column not in columns or row not in rows:
+                self._pending.add(i)
+                continue
+            x = column * self.atlas.chunk_width
+            y = row * self.atlas.chunk_height
+            ctx.set_operator(cairo.Operator.CLEAR)
+            ctx.rectangle(x, y, self.atlas.chunk_width, self.atlas.chunk_height)
+            ctx.fill()
+            ctx.set_operator(cairo.Operator.OVER)
+            chunk = mappings[i]
+            if 0 < chunk < len(self.atlas):
+                self.atlas.paint(ctx, chunk, pal_ani_frame, bpa_frame, x, y)
+                pal_ani_frames, bpa_frames = self.atlas.frame_counts(chunk)
+            else:
+                pal_ani_frames, bpa_frames = 1, 1
+            if pal_ani_frames > 1:
+                self._pal_animated.add(i)
+            else:
+                self._pal_animated.discard(i)
+            if bpa_frames > 1:
+                self._bpa_animated.add(i)
+            else:
+                self._bpa_animated.discard(i)
+
+
 class Drawer:
     def __init__(
         self,
@@ -51,19 +141,18 @@ class Drawer:
         bma: BmaProtocol | None,
         bpa_durations: int,
         pal_ani_durations: int,
-        # chunks_surfaces[layer_number][chunk_idx][palette_animation_frame][frame]
-        chunks_surfaces: Iterable[Iterable[Iterable[Iterable[cairo.Surface]]]],
+        chunk_atlases: Sequence[ChunkAtlas],
     ):
         """
         Initialize a drawer...
         :param draw_area:  Widget to draw on.
         :param bma: Either a BMA with tile indexes or None, has to be set manually then for drawing
         :param bpa_durations: How many frames to hold a BPA animation tile
-        :param chunks_surfaces: Bg controller format chunk surfaces
+        :param chunk_atlases: The chunks of each layer
         """
         self.draw_area = draw_area
 
-        self.reset(bma, bpa_durations, pal_ani_durations, chunks_surfaces)
+        self.reset(bma, bpa_durations, pal_ani_durations, chunk_atlases)
 
         self.draw_chunk_grid = False
         self.draw_tile_grid = False
@@ -97,7 +186,12 @@ class Drawer:
 
         self.drawing_is_active = False
 
+    def request_redraw(self):
+        """Draws again on the next tick, after something that is drawn changed."""
+        self._redraw_needed = True
+
     def reset_bma(self, bma):
+        self.request_redraw()
         if isinstance(bma, BmaProtocol):
             self.tiling_width = bma.tiling_width
             self.tiling_height = bma.tiling_height
@@ -122,11 +216,17 @@ class Drawer:
             self.data_layer = None
 
     # noinspection PyAttributeOutsideInit
-    def reset(self, bma, bpa_durations, pal_ani_durations, chunks_surfaces):
+    def reset(self, bma, bpa_durations, pal_ani_durations, chunk_atlases):
         self.reset_bma(bma)
 
-        self.animation_context = AnimationContext(chunks_surfaces, bpa_durations, pal_ani_durations)
+        self.chunk_atlases: Sequence[ChunkAtlas] = chunk_atlases
+        # Only used for the frame counters, the frames of the chunks are in the atlases.
+        self.animation_context = AnimationContext([], bpa_durations, pal_ani_durations)
         self._tileset_drawer_overlay: MapTilesetOverlay | None = None
+        self._composited_layers: list[CompositedLayer] = []
+        # Collision 1, collision 2 and the data layer
+        self._tile_overlays: dict[int, TileOverlay] = {}
+        self._redraw_needed = True
 
     def start(self):
         """Start drawing on the DrawingArea"""
@@ -146,16 +246,94 @@ class Drawer:
             # XXX: Gtk doesn't remove the widget on switch sometimes...
             self.draw_area.destroy()
             return False
+        frames_before = (self.animation_context.pal_ani_frame, self.animation_context.bpa_frame)
         self.animation_context.advance()
-        if EventManager.instance().get_if_main_window_has_fous():
+        if frames_before != (self.animation_context.pal_ani_frame, self.animation_context.bpa_frame):
+            if self._shows_animation():
+                self._redraw_needed = True
+        if self._redraw_needed and EventManager.instance().get_if_main_window_has_fous():
+            self._redraw_needed = False
             self.draw_area.queue_draw()
         return self.drawing_is_active
 
+    def _shows_animation(self) -> bool:
+        """Whether any of the chunks currently drawn are animated."""
+        if self._tileset_drawer_overlay is not None and self._tileset_drawer_overlay.enabled:
+            return False
+        if self.interaction_mode == DrawerInteraction.CHUNKS and 0 <= self.edited_layer < len(self.chunk_atlases):
+            atlas = self.chunk_atlases[self.edited_layer]
+            if self.interaction_chunks_selected_id < len(atlas):
+                # The chunk under the cursor
+                if atlas.frame_counts(self.interaction_chunks_selected_id) != (1, 1):
+                    return True
+        return any(layer.is_animated() for layer in self._composited_layers)
+
+    def _tile_overlay(self, overlay_idx: int, values: Sequence[int]) -> TileOverlay:
+        """The collision or data layer, with the current values. Created again if the size of the map changed."""
+        assert self.width_in_tiles is not None and self.height_in_tiles is not None
+        overlay = self._tile_overlays.get(overlay_idx)
+        if overlay is None or (overlay.width_in_tiles, overlay.height_in_tiles) != (
+            self.width_in_tiles,
+            self.height_in_tiles,
+        ):
+            if overlay_idx == 0:
+                overlay = CollisionOverlay(self.width_in_tiles, self.height_in_tiles, (1, 0, 0, 0.4))
+            elif overlay_idx == 1:
+                overlay = CollisionOverlay(self.width_in_tiles, self.height_in_tiles, (0, 1, 0, 0.4))
+            else:
+                overlay = DataOverlay(self.width_in_tiles, self.height_in_tiles, (0, 0, 1))
+            self._tile_overlays[overlay_idx] = overlay
+        overlay.update(values)
+        return overlay
+
+    def _draw_data_labels(self, ctx: cairo.Context, values: Sequence[int]):
+        """Draws the labels of the visible tiles of the data layer, from an atlas rendered at the current scale."""
+        assert self.width_in_tiles is not None and self.height_in_tiles is not None
+        labels = label_atlas(0, 0, 1, self.scale)
+        columns, rows = visible_cells(ctx, BPC_TILE_DIM, BPC_TILE_DIM, self.width_in_tiles, self.height_in_tiles)
+        for y in rows:
+            for x in columns:
+                i = y * self.width_in_tiles + x
+                if i < len(values) and values[i] > 0:
+                    paint_label(ctx, labels, values[i], x * BPC_TILE_DIM, y * BPC_TILE_DIM, self.scale)
+
+    def invalidate_chunks(self, layer_idx: int, chunk_idxs: Iterable[int]):
+        """Paints the chunks of the layer again, after they were changed in the atlas."""
+        if layer_idx < len(self._composited_layers):
+            self._composited_layers[layer_idx].invalidate(chunk_idxs)
+        self.request_redraw()
+
+    def _composited_layer(self, ctx: cairo.Context, layer_idx: int) -> CompositedLayer:
+        """
+        The layer, with the visible chunks at the current frames. Created again if the size of the map changed.
+        """
+        while len(self._composited_layers) <= layer_idx:
+            self._composited_layers.append(
+                CompositedLayer(self.chunk_atlases[layer_idx], self.width_in_chunks, self.height_in_chunks)
+            )
+        layer = self._composited_layers[layer_idx]
+        if (layer.width_in_chunks, layer.height_in_chunks) != (self.width_in_chunks, self.height_in_chunks):
+            layer = CompositedLayer(self.chunk_atlases[layer_idx], self.width_in_chunks, self.height_in_chunks)
+            self._composited_layers[layer_idx] = layer
+        columns, rows = visible_cells(
+            ctx,
+            self.chunk_atlases[layer_idx].chunk_width,
+            self.chunk_atlases[layer_idx].chunk_height,
+            self.width_in_chunks,
+            self.height_in_chunks,
+        )
+        layer.update(
+            self.mappings[layer_idx],
+            self.animation_context.pal_ani_frame,
+            self.animation_context.bpa_frame,
+            columns,
+            rows,
+        )
+        return layer
+
     def draw(self, wdg, ctx: cairo.Context, do_translates=True):
         ctx.set_antialias(cairo.Antialias.NONE)
         ctx.scale(self.scale, self.scale)
-        chunk_width = self.tiling_width * BPC_TILE_DIM
-        chunk_height = self.tiling_height * BPC_TILE_DIM
         # Background
         if not self.use_pink_bg:
             ctx.set_source_rgb(0, 0, 0)
@@ -173,37 +351,35 @@ class Drawer:
             self._tileset_drawer_overlay.draw_full(ctx, self.mappings[0], self.width_in_chunks, self.height_in_chunks)
         else:
             # Layers
-            for layer_idx, chunks_at_frame in enumerate(self.animation_context.current()):
+            pal_ani_frame = self.animation_context.pal_ani_frame
+            bpa_frame = self.animation_context.bpa_frame
+            for layer_idx, atlas in enumerate(self.chunk_atlases):
                 if self.show_only_edited_layer and layer_idx != self.edited_layer:
                     continue
-                current_layer_mappings = self.mappings[layer_idx]
-                for i, chunk_at_pos in enumerate(current_layer_mappings):
-                    if 0 < chunk_at_pos < len(chunks_at_frame):
-                        chunk = chunks_at_frame[chunk_at_pos]
-                        ctx.set_source_surface(chunk, 0, 0)
-                        ctx.get_source().set_filter(cairo.Filter.NEAREST)
-                        if self.edited_layer != -1 and layer_idx > 0 and layer_idx != self.edited_layer:
-                            # For Layer 1 if not the current edited: Set an alpha mask
-                            ctx.paint_with_alpha(0.7)
-                        else:
-                            ctx.paint()
-                    if (i + 1) % self.width_in_chunks == 0:
-                        # Move to beginning of next line
-                        if do_translates:
-                            ctx.translate(-chunk_width * (self.width_in_chunks - 1), chunk_height)
-                    else:
-                        # Move to next tile in line
-                        if do_translates:
-                            ctx.translate(chunk_width, 0)
-
-                # Move back to beginning
+                # For Layer 1 if not the current edited: Set an alpha mask.
+                with_alpha = self.edited_layer != -1 and layer_idx > 0 and layer_idx != self.edited_layer
                 if do_translates:
-                    ctx.translate(0, -chunk_height * self.height_in_chunks)
+                    ctx.set_source_surface(self._composited_layer(ctx, layer_idx).surface, 0, 0)
+                    ctx.get_source().set_filter(cairo.Filter.NEAREST)
+                    if with_alpha:
+                        ctx.paint_with_alpha(0.7)
+                    else:
+                        ctx.paint()
+                else:
+                    # Only the chunks of the icon views, at the origin.
+                    if with_alpha:
+                        ctx.push_group()
+                    for chunk_at_pos in self.mappings[layer_idx]:
+                        if 0 < chunk_at_pos < len(atlas):
+                            atlas.paint(ctx, chunk_at_pos, pal_ani_frame, bpa_frame, 0, 0)
+                    if with_alpha:
+                        ctx.pop_group_to_source()
+                        ctx.paint_with_alpha(0.7)
 
                 if (
                     (self.edited_layer != -1 and layer_idx < 1 and layer_idx != self.edited_layer)
                     or (layer_idx == 1 and self.dim_layers)
-                    or (layer_idx == 0 and self.animation_context.num_layers < 2 and self.dim_layers)
+                    or (layer_idx == 0 and len(self.chunk_atlases) < 2 and self.dim_layers)
                 ):
                     # For Layer 0 if not the current edited: Draw dark rectangle
                     # or for layer 1 if dim layers
@@ -217,59 +393,22 @@ class Drawer:
                     )
                     ctx.fill()
 
-        # Col 1 and 2
-        for col_index, should_draw in enumerate([self.draw_collision1, self.draw_collision2]):
-            if should_draw:
-                if col_index == 0:
-                    ctx.set_source_rgba(1, 0, 0, 0.4)
-                    col: Sequence[bool] = self.collision1  # type: ignore
-                else:
-                    ctx.set_source_rgba(0, 1, 0, 0.4)
-                    col = self.collision2  # type: ignore
-
-                for i, c in enumerate(col):
-                    if c:
-                        ctx.rectangle(0, 0, BPC_TILE_DIM, BPC_TILE_DIM)
-                        ctx.fill()
-                    if (i + 1) % self.width_in_tiles == 0:  # type: ignore
-                        # Move to beginning of next line
-                        if do_translates:
-                            ctx.translate(
-                                -BPC_TILE_DIM * (self.width_in_tiles - 1),  # type: ignore
-                                BPC_TILE_DIM,
-                            )
-                    else:
-                        # Move to next tile in line
-                        if do_translates:
-                            ctx.translate(BPC_TILE_DIM, 0)
-                # Move back to beginning
-                if do_translates:
-                    ctx.translate(0, -BPC_TILE_DIM * self.height_in_tiles)  # type: ignore
-
-        # Data
-        if self.draw_data_layer:
-            ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
-            ctx.set_font_size(6)
-            ctx.set_source_rgb(0, 0, 1)
-            assert self.data_layer is not None
-            for i, dat in enumerate(self.data_layer):
-                if dat > 0:
-                    ctx.move_to(0, BPC_TILE_DIM - 2)
-                    ctx.show_text(f"{dat:02x}")
-                if (i + 1) % self.width_in_tiles == 0:  # type: ignore
-                    # Move to beginning of next line
-                    if do_translates:
-                        ctx.translate(
-                            -BPC_TILE_DIM * (self.width_in_tiles - 1),  # type: ignore
-                            BPC_TILE_DIM,
-                        )
-                else:
-                    # Move to next tile in line
-                    if do_translates:
-                        ctx.translate(BPC_TILE_DIM, 0)
-            # Move back to beginning
-            if do_translates:
-                ctx.translate(0, -BPC_TILE_DIM * self.height_in_tiles)  # type: ignore
+        # Col 1 and 2, and Data
+        if self.width_in_tiles is not None and self.height_in_tiles is not None:
+            for overlay_idx, should_draw, values in (
+                (0, self.draw_collision1, self.collision1),
+                (1, self.draw_collision2, self.collision2),
+                (2, self.draw_data_layer, self.data_layer),
+            ):
+                if should_draw:
+                    assert values is not None
+                    if overlay_idx == 2 and self.scale != 1:
+                        # The cached surface would make the text blurry when zoomed.
+                        self._draw_data_labels(ctx, values)
+                        continue
+                    ctx.set_source_surface(self._tile_overlay(overlay_idx, values).surface, 0, 0)
+                    ctx.get_source().set_filter(cairo.Filter.NEAREST)
+                    ctx.paint()
 
         size_w, size_h = self.draw_area.get_size_request()
         assert size_w is not None and size_h is not None
@@ -295,10 +434,14 @@ class Drawer:
     def selection_draw_callback(self, ctx: cairo.Context, x: int, y: int):
         if self.interaction_mode == DrawerInteraction.CHUNKS:
             # Draw a chunk
-            chunks_at_frame = self.animation_context.current()[self.edited_layer]
-            ctx.set_source_surface(chunks_at_frame[self.interaction_chunks_selected_id], x, y)
-            ctx.get_source().set_filter(cairo.Filter.NEAREST)
-            ctx.paint()
+            self.chunk_atlases[self.edited_layer].paint(
+                ctx,
+                self.interaction_chunks_selected_id,
+                self.animation_context.pal_ani_frame,
+                self.animation_context.bpa_frame,
+                x,
+                y,
+            )
         elif self.interaction_mode == DrawerInteraction.COL:
             # Draw collision
             if self.interaction_col_solid:
@@ -308,29 +451,30 @@ class Drawer:
         elif self.interaction_mode == DrawerInteraction.DAT:
             # Draw data
             if self.interaction_dat_value > 0:
-                ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
-                ctx.set_font_size(6)
-                ctx.set_source_rgb(1, 1, 1)
-                ctx.move_to(x, y + BPC_TILE_DIM - 2)
-                ctx.show_text(f"{self.interaction_dat_value:02x}")
+                paint_label(ctx, label_atlas(1, 1, 1, self.scale), self.interaction_dat_value, x, y, self.scale)
 
     def set_mouse_position(self, x, y):
+        if (x, y) != (self.mouse_x, self.mouse_y):
+            self.request_redraw()
         self.mouse_x = x
         self.mouse_y = y
 
     def set_selected_chunk(self, chunk_id):
+        self.request_redraw()
         self.interaction_chunks_selected_id = chunk_id
 
     def get_selected_chunk_id(self):
         return self.interaction_chunks_selected_id
 
     def set_interaction_col_solid(self, v):
+        self.request_redraw()
         self.interaction_col_solid = v
 
     def get_interaction_col_solid(self):
         return self.interaction_col_solid
 
     def set_interaction_dat_value(self, v):
+        self.request_redraw()
         self.interaction_dat_value = v
 
     def get_interaction_dat_value(self):
@@ -339,6 +483,7 @@ class Drawer:
     def set_edited_layer(self, layer_id):
         # The layer that is not edited will be drawn with a bit of transparency or darker
         # Default is -1, which shows all at full opacity
+        self.request_redraw()
         self.dim_layers = False
         self.edited_layer = layer_id
         self.draw_collision1 = False
@@ -348,9 +493,11 @@ class Drawer:
         self.interaction_mode = DrawerInteraction.CHUNKS
 
     def set_show_only_edited_layer(self, v):
+        self.request_redraw()
         self.show_only_edited_layer = v
 
     def set_edited_collision(self, collision_id):
+        self.request_redraw()
         self.dim_layers = True
         self.edited_layer = -1
         self.draw_collision1 = False
@@ -367,6 +514,7 @@ class Drawer:
         return self.edited_collision
 
     def set_edit_data_layer(self):
+        self.request_redraw()
         self.dim_layers = True
         self.edited_layer = -1
         self.edited_collision = -1
@@ -379,18 +527,23 @@ class Drawer:
         return self.interaction_mode
 
     def set_draw_chunk_grid(self, v):
+        self.request_redraw()
         self.draw_chunk_grid = v
 
     def set_draw_tile_grid(self, v):
+        self.request_redraw()
         self.draw_tile_grid = v
 
     def set_pink_bg(self, v):
+        self.request_redraw()
         self.use_pink_bg = v
 
     def set_scale(self, v):
+        self.request_redraw()
         self.scale = v
 
     def add_overlay(self, tileset_drawer_overlay):
+        self.request_redraw()
         self._tileset_drawer_overlay = tileset_drawer_overlay
 
 
@@ -403,14 +556,18 @@ class DrawerCellRenderer(Drawer, Gtk.CellRenderer):
         layer: int,
         bpa_durations: int,
         pal_ani_durations: int,
-        chunks_surfaces: Iterable[Iterable[Iterable[Iterable[cairo.Surface]]]],
+        chunk_atlases: Sequence[ChunkAtlas],
     ):
-        super().__init__(icon_view, None, bpa_durations, pal_ani_durations, chunks_surfaces)
+        super().__init__(icon_view, None, bpa_durations, pal_ani_durations, chunk_atlases)
         super(Gtk.CellRenderer, self).__init__()
         self.layer = layer
 
         self.chunkidx = 0
 
+    def _shows_animation(self) -> bool:
+        atlas = self.chunk_atlases[self.layer]
+        return any(atlas.frame_counts(chunk_idx) != (1, 1) for chunk_idx in range(len(atlas)))
+
     def do_get_size(self, widget: Widget, cell_area: Gdk.Rectangle | None = None) -> tuple[int, int, int, int]:
         return (
             0,
@@ -0,0 +1,157 @@
+"""Cached surfaces for the collision and data layers drawn over map backgrounds."""
+
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from functools import lru_cache
+import math
+
+import cairo
+from skytemple_files.graphics.bpc import BPC_TILE_DIM
+
+# Values of the data layer are shown as two hex digits.
+NUMBER_LABELS = 256
+LABEL_ATLAS_COLUMNS = 16
+# Atlases are not rendered any larger than this (512x512 pixels); at higher zooms they are scaled up by cairo.
+MAX_LABEL_ATLAS_SCALE = 4
+
+
+def label_atlas(red: float, green: float, blue: float, scale: float = 1) -> cairo.ImageSurface:
+    """
+    The labels of all values of the data layer, in a grid of tiles, in the color. Rendered once per color and
+    scale (the zoom of the drawer, up to MAX_LABEL_ATLAS_SCALE), since laying out text is slow.
+    """
+    return _render_label_atlas(red, green, blue, _atlas_scale(scale))
+
+
+# Only the atlases of the current zoom (and the previous one) are needed.
+@lru_cache(maxsize=4)
+def _render_label_atlas(red: float, green: float, blue: float, scale: float) -> cairo.ImageSurface:
+    surface = cairo.ImageSurface(
+        cairo.FORMAT_ARGB32,
+        math.ceil(LABEL_ATLAS_COLUMNS * BPC_TILE_DIM * scale),
+        math.ceil(NUMBER_LABELS // LABEL_ATLAS_COLUMNS * BPC_TILE_DIM * scale),
+    )
+    ctx = cairo.Context(surface)
+    ctx.scale(scale, scale)
+    ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
+    ctx.set_font_size(6)
+    ctx.set_source_rgb(red, green, blue)
+    for value in range(NUMBER_LABELS):
+        x, y = _label_origin(value)
+        ctx.move_to(x, y + BPC_TILE_DIM - 2)
+        ctx.show_text(f"{value:02x}")
+    return surface
+
+
+def paint_label(ctx: cairo.Context, atlas: cairo.ImageSurface, value: int, x: float, y: float, scale: float = 1):
+    """
+    Paints the label of the value from the atlas with its top left corner at x, y. The atlas must be rendered for
+    the scale of the context, its scale is undone to paint it, so the text is not scaled a second time.
+    """
+    scale = _atlas_scale(scale)
+    label_x, label_y = _label_origin(value)
+    ctx.save()
+    ctx.scale(1 / scale, 1 / scale)
+    ctx.set_source_surface(atlas, (x - label_x) * scale, (y - label_y) * scale)
+    ctx.rectangle(x * scale, y * scale, BPC_TILE_DIM * scale, BPC_TILE_DIM * scale)
+    ctx.fill()
+    ctx.restore()
+
+
+def _atlas_scale(scale: float) -> float:
+    return min(scale, MAX_LABEL_ATLAS_SCALE)
+
+
+def _label_origin(value: int) -> tuple[int, int]:
+    return (value % LABEL_ATLAS_COLUMNS) * BPC_TILE_DIM, (value // LABEL_ATLAS_COLUMNS) * BPC_TILE_DIM
+
+
+class TileOverlay(ABC):
+    """
+    A layer with one value per tile of the map, drawn into a surface once. ``update`` only draws the tiles again
+    whose value changed since the last update.
+    """
+
+    def __init__(self, width_in_tiles: int, height_in_tiles: int):
+        self.width_in_tiles = width_in_tiles
+        self.height_in_tiles = height_in_tiles
+        self.surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32, max(1, width_in_tiles * BPC_TILE_DIM), max(1, height_in_tiles * BPC_TILE_DIM)
+        )
+        # The values drawn; None until the first update.
+        self._drawn: list[int] | None = None
+
+    def update(self, values: Sequence[int]):
+        number_tiles = self.width_in_tiles * self.height_in_tiles
+        values = [int(value) for value in values[:number_tiles]]
+        values += [0] * (number_tiles - len(values))
+        if values == self._drawn:
+            return
+        ctx = cairo.Context(self.surface)
+        drawn = self._drawn
+        for row in range(self.height_in_tiles):
+            start = row * self.width_in_tiles
+            end = start + self.width_in_tiles
+            if drawn is not None and values[start:end] == drawn[start:end]:
+                continue
+            for i in range(start, end):
+                if drawn is None or values[i] != drawn[i]:
+                    x = (i - start) * BPC_TILE_DIM
+                    y = row * BPC_TILE_DIM
+                    if drawn is not None:
+                        ctx.set_operator(cairo.Operator.CLEAR)
+                        ctx.rectangle(x, y, BPC_TILE_DIM, BPC_TILE_DIM)
+                        ctx.fill()
+                        ctx.set_operator(cairo.Operator.OVER)
+                    if values[i] > 0:
+                        self._draw_tile(ctx, values[i], x, y)
+        self._drawn = values
+
+    @abstractmethod
+    def _draw_tile(self, ctx: cairo.Context, value: int, x: int, y: int):
+        """Draws a tile with a value other than 0 on the empty surface."""
+
+
+class CollisionOverlay(TileOverlay):
+    """Solid tiles as rectangles in a translucent color."""
+
+    def __init__(self, width_in_tiles: int, height_in_tiles: int, color: tuple[float, float, float, float]):
+        super().__init__(width_in_tiles, height_in_tiles)
+        self.color = color
+
+    def _draw_tile(self, ctx: cairo.Context, value: int, x: int, y: int):
+        ctx.set_source_rgba(*self.color)
+        ctx.rectangle(x, y, BPC_TILE_DIM, BPC_TILE_DIM)
+        ctx.fill()
+
+
+class DataOverlay(TileOverlay):
+    """
+    The values of the data layer as hex labels. Only sharp when drawn unscaled; when zoomed, the labels should
+    be painted directly from an atlas at the zoom (see ``paint_label``).
+    """
+
+    def __init__(self, width_in_tiles: int, height_in_tiles: int, color: tuple[float, float, float]):
+        super().__init__(width_in_tiles, height_in_tiles)
+        self.labels = label_atlas(*color)
+
+    def _draw_tile(self, ctx: cairo.Context, value: int, x: int, y: int):
+        paint_label(ctx, self.labels, value, x, y)
@@ -15,26 +15,22 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
-import itertools
 import typing
 from typing import TYPE_CHECKING, cast
-from collections.abc import Iterable, Sequence
-import cairo
 from gi.repository import Gtk, Gdk
 from skytemple.controller.main import MainController
 from skytemple.core.canvas_scale import CanvasScale
-from skytemple.core.img_utils import pil_to_cairo_surface
 from skytemple.core.mapbg_util.map_tileset_overlay import MapTilesetOverlay
 from skytemple.core.message_dialog import SkyTempleMessageDialog
 from skytemple.core.open_request import OpenRequest, REQUEST_TYPE_SCENE
 from skytemple.core.ui_utils import data_dir, safe_destroy
 from skytemple.init_locale import LocalePatchedGtkTemplate
+from skytemple.module.map_bg.chunk_atlas import ChunkAtlas
 from skytemple.module.map_bg.controller.bg_menu import BgMenuController
 from skytemple.module.map_bg.drawer import Drawer, DrawerCellRenderer, DrawerInteraction
 from skytemple_files.common.ppmdu_config.script_data import Pmd2ScriptLevelMapType
 from skytemple_files.common.types.file_types import FileType
 from skytemple_files.graphics.bg_list_dat import BMA_EXT, BPC_EXT, BPL_EXT, BPA_EXT, DIR
-from skytemple_files.graphics.bma import MASK_PAL
 from skytemple_files.graphics.bma.protocol import BmaProtocol
 from skytemple_files.graphics.bpc import BPC_TILE_DIM
 from skytemple_files.graphics.bpl import BPL_NORMAL_MAX_PAL
@@ -247,9 +243,8 @@ class StMapBgBgPage(Gtk.Box):
         self.bpas = module.get_bpas(item_data)
         self.first_cursor_pos = (0, 0)
         self.last_bma: BmaProtocol | None = None
-        # Cairo surfaces for each tile in each layer for each frame
-        # chunks_surfaces[layer_number][chunk_idx][palette_animation_frame][frame]
-        self.chunks_surfaces: list[Sequence[Iterable[list[cairo.Surface]]]] = []
+        # All frames of the chunks of each layer
+        self.chunk_atlases: list[ChunkAtlas] = []
         self.bpa_durations = 0
         self.drawer: Drawer | None = None
         self.current_icon_view_renderer: DrawerCellRenderer | None = None
@@ -425,6 +420,7 @@ class StMapBgBgPage(Gtk.Box):
                     self.drawer.get_selected_chunk_id(),
                 )
                 self.drawer.mappings = [self.bma.layer0, self.bma.layer1]  # type: ignore
+                self.drawer.request_redraw()
 
     def _set_col_at_pos(self, mouse_x, mouse_y):
         if self.drawer:
@@ -439,6 +435,7 @@ class StMapBgBgPage(Gtk.Box):
                     tile_y,
                     self.drawer.get_interaction_col_solid(),
                 )
+                self.drawer.request_redraw()
 
     def _set_data_at_pos(self, mouse_x, mouse_y):
         if self.drawer:
@@ -448,6 +445,7 @@ class StMapBgBgPage(Gtk.Box):
                 # Set data value at current position
                 self.mark_as_modified()
                 self.bma.place_data(tile_x, tile_y, self.drawer.get_interaction_dat_value())
+                self.drawer.request_redraw()
 
     def on_current_icon_view_selection_changed(self, icon_view: Gtk.IconView):
         model, treeiter = (icon_view.get_model(), icon_view.get_selected_items())
@@ -662,54 +660,14 @@ class StMapBgBgPage(Gtk.Box):
 
     def _init_chunk_imgs(self):
         """(Re)-draw the chunk images"""
-        # Set the weird palette warning to false
-        self.weird_palette = False
         if self.bpc.number_of_layers > 1:
             layer_idxs_bpc = [1, 0]
         else:
             layer_idxs_bpc = [0]
-        self.chunks_surfaces = []
+        self.chunk_atlases = []
         # For each layer...
-        for layer_idx, layer_idx_bpc in enumerate(layer_idxs_bpc):
-            chunks_current_layer: list[list[list[cairo.Surface]]] = []
-            self.chunks_surfaces.append(chunks_current_layer)
-            # For each chunk...
-            for chunk_idx in range(0, self.bpc.layers[layer_idx_bpc].chunk_tilemap_len):
-                # For each frame of palette animation... ( applicable for this chunk )
-                pal_ani_frames: list[list[cairo.Surface]] = []
-                chunks_current_layer.append(pal_ani_frames)
-                chunk_data = self.bpc.get_chunk(layer_idx_bpc, chunk_idx)
-                chunk_images = self.bpc.single_chunk_animated_to_pil(
-                    layer_idx_bpc, chunk_idx, self.bpl.palettes, self.bpas
-                )
-                if not self.weird_palette:
-                    for x in chunk_images:
-                        for n in x.tobytes("raw", "P"):
-                            n //= 16
-                            if n >= self.bpl.number_palettes or n >= BPL_NORMAL_MAX_PAL:
-                                # If one chunk uses weird palette values, display the warning
-                                self.weird_palette = True
-                                break
-                        if self.weird_palette:
-                            break
-                has_pal_ani = any(self.bpl.is_palette_affected_by_animation(chunk.pal_idx) for chunk in chunk_data)
-                len_pal_ani = len(self.bpl.animation_palette) if has_pal_ani else 1
-                for pal_ani in range(0, len_pal_ani):
-                    # For each frame of tile animation...
-                    bpa_ani_frames: list[cairo.Surface] = []
-                    pal_ani_frames.append(bpa_ani_frames)
-                    for img in chunk_images:
-                        # Switch out the palette with that from the palette animation
-                        if has_pal_ani:
-                            pal_for_frame = itertools.chain.from_iterable(self.bpl.apply_palette_animations(pal_ani))
-                            img.putpalette(pal_for_frame)
-                        # Remove alpha first
-                        img_mask = img.copy()
-                        img_mask.putpalette(MASK_PAL)
-                        img_mask = img_mask.convert("1")
-                        img = img.convert("RGBA")
-                        img.putalpha(img_mask)
-                        bpa_ani_frames.append(pil_to_cairo_surface(img))
+        for layer_idx_bpc in layer_idxs_bpc:
+            self.chunk_atlases.append(ChunkAtlas(self.bpc, layer_idx_bpc, self.bpl, self.bpas))
             # TODO: No BPAs at different speeds supported at the moment
             self.bpa_durations = 0
             for bpa in self.bpas:
@@ -723,6 +681,14 @@ class StMapBgBgPage(Gtk.Box):
             self.pal_ani_durations = 0
             if self.bpl.has_palette_animation:
                 self.pal_ani_durations = max(spec.duration_per_frame for spec in self.bpl.animation_specs)
+        self._check_weird_palette()
+
+    def _check_weird_palette(self):
+        # If one chunk uses weird palette values, display the warning
+        self.weird_palette = any(
+            atlas.highest_palette >= self.bpl.number_palettes or atlas.highest_palette >= BPL_NORMAL_MAX_PAL
+            for atlas in self.chunk_atlases
+        )
         self.set_warning_palette()
 
     def _init_drawer(self):
@@ -753,7 +719,7 @@ class StMapBgBgPage(Gtk.Box):
             self.bma,
             self.bpa_durations,
             self.pal_ani_durations,
-            self.chunks_surfaces,
+            self.chunk_atlases,
         )
         if self._tileset_drawer_overlay:
             self.drawer.add_overlay(self._tileset_drawer_overlay)
@@ -797,14 +763,14 @@ class StMapBgBgPage(Gtk.Box):
             layer_number,
             self.bpa_durations,
             self.pal_ani_durations,
-            self.chunks_surfaces,
+            self.chunk_atlases,
         )
         store = Gtk.ListStore(int)
         icon_view.set_model(store)
         icon_view.pack_start(self.current_icon_view_renderer, True)
         icon_view.add_attribute(self.current_icon_view_renderer, "chunkidx", 0)
         icon_view.connect("selection-changed", self.on_current_icon_view_selection_changed)
-        for idx in range(0, len(self.chunks_surfaces[layer_number])):
+        for idx in range(0, len(self.chunk_atlases[layer_number])):
             store.append([idx])
         siter = store.get_iter_first()
         if siter:
@@ -958,7 +924,7 @@ class StMapBgBgPage(Gtk.Box):
                 self.bma,
                 self.bpa_durations,
                 self.pal_ani_durations,
-                self.chunks_surfaces,
+                self.chunk_atlases,
             )
         if self.notebook is not None:
             tab = self.notebook.get_nth_page(self.notebook.get_current_page())
@@ -966,6 +932,28 @@ class StMapBgBgPage(Gtk.Box):
                 self._init_tab(typing.cast(Gtk.Box, tab))
         self._refresh_metadata()
 
+    def reload_chunks(self, chunk_idxs_by_layer: dict[int, list[int] | None]):
+        """
+        Renders the chunks again after they were edited, by BPC layer. Reloads everything like reload_all instead
+        (once), if the chunks of a layer are None or can not be updated in place.
+        """
+        # The chunk atlases are in drawing order, the layers of the BPC are the other way around.
+        by_layer_idx = {
+            len(self.chunk_atlases) - 1 - bpc_layer: chunk_idxs for bpc_layer, chunk_idxs in chunk_idxs_by_layer.items()
+        }
+        if any(
+            chunk_idxs is None or not self.chunk_atlases[layer_idx].invalidate(chunk_idxs)
+            for layer_idx, chunk_idxs in by_layer_idx.items()
+        ):
+            self.reload_all()
+            return
+        if self.drawer:
+            for layer_idx, chunk_idxs in by_layer_idx.items():
+                assert chunk_idxs is not None
+                self.drawer.invalidate_chunks(layer_idx, chunk_idxs)
+        self._check_weird_palette()
+        self.queue_draw()
+
     def _init_rest_room_note(self):
         mode_10_or_11_level = None
         for level in self.module.get_all_associated_script_maps(self.item_data):
@@ -1055,3 +1043,5 @@ class StMapBgBgPage(Gtk.Box):
     def on_btn_toggle_overlay_rendering_clicked(self, *args):
         assert self._tileset_drawer_overlay is not None
         self._tileset_drawer_overlay.enabled = not self._tileset_drawer_overlay.enabled
+        if self.drawer:
+            self.drawer.request_redraw()
@@ -20,7 +20,7 @@ from xml.etree.ElementTree import Element
 from gi.repository import Gtk
 from range_typed_integers import u16, u8, i16
 
-from skytemple.core.abstract_module import AbstractModule, DebuggingInfo
+from skytemple.core.abstract_module import AbstractModule, DebuggingInfo, LazyFile, LazyFileContext
 from skytemple.core.item_tree import (
     ItemTree,
     ItemTreeEntryRef,
@@ -33,7 +33,6 @@ from skytemple.core.string_provider import StringType
 from skytemple.controller.main import MainController as SkyTempleMainController
 from skytemple.core.widget.status_page import StStatusPageData, StStatusPage
 from skytemple_files.common.types.file_types import FileType
-from skytemple_files.container.bin_pack.model import BinPack
 from skytemple_files.data.val_list.handler import ValListHandler
 from skytemple_files.data.level_bin_entry.model import LevelBinEntry
 from skytemple_files.data.tbl_talk.model import TblTalk, TalkType
@@ -72,6 +71,13 @@ logger = logging.getLogger(__name__)
 class MonsterModule(AbstractModule):
     """Module to edit the monster.md and other Pokémon related data."""
 
+    # Not needed for the item tree, opened on first use.
+    m_level_bin = LazyFile(M_LEVEL_BIN, FileType.BIN_PACK)
+    waza_p_bin = LazyFile(WAZA_P_BIN, FileType.WAZA_P)
+    waza_p2_bin = LazyFile(WAZA_P2_BIN, FileType.WAZA_P)
+    monster_bin = LazyFileContext(MONSTER_BIN, FileType.BIN_PACK)
+    m_attack_bin = LazyFileContext(M_ATTACK_BIN, FileType.BIN_PACK)
+
     @classmethod
     def depends_on(cls):
         return ["portrait", "sprite"]
@@ -84,14 +90,6 @@ class MonsterModule(AbstractModule):
         self.project = rom_project
         logger.debug("Preloading MD...")
         self.monster_md: MdProtocol[MdEntryProtocol] = self.project.open_file_in_rom(MONSTER_MD_FILE, FileType.MD)
-        logger.debug("Preloading m_level.bin...")
-        self.m_level_bin: BinPack = self.project.open_file_in_rom(M_LEVEL_BIN, FileType.BIN_PACK)
-        logger.debug("Preloading waza_p.bin...")
-        self.waza_p_bin: WazaPProtocol = self.project.open_file_in_rom(WAZA_P_BIN, FileType.WAZA_P)
-        logger.debug("Preloading waza_p2.bin...")
-        self.waza_p2_bin: WazaPProtocol = self.project.open_file_in_rom(WAZA_P2_BIN, FileType.WAZA_P)
-        self.monster_bin = self.project.open_file_in_rom(MONSTER_BIN, FileType.BIN_PACK, threadsafe=True)
-        self.m_attack_bin = self.project.open_file_in_rom(M_ATTACK_BIN, FileType.BIN_PACK, threadsafe=True)
         logger.debug("Done preloading.")
 
         self._tbl_talk: TblTalk | None = None
@@ -533,6 +531,7 @@ class MonsterModule(AbstractModule):
                         kao.set(monster_id - 1, i, portrait)
                     else:
                         kao.delete(monster_id - 1, i)
+                portrait_module.get_portrait_provider().invalidate(monster_id - 1)
             self.refresh(monster_id)
             self.mark_md_as_modified(monster_id)
             self.project.mark_as_modified(WAZA_P_BIN)
@@ -453,7 +453,7 @@ class StMonsterMainPage(Gtk.Box):
                 progress_dialog = self.progress_dialog
                 progress_dialog.set_attached_to(SkyTempleMainController.window())
                 progress_dialog.set_transient_for(SkyTempleMainController.window())
-                AsyncTaskDelegator.run_task(export())
+                AsyncTaskDelegator.run_task(export(), threadsafe=False)
                 progress_dialog.run()
             else:
                 md = SkyTempleMessageDialog(
@@ -260,7 +260,12 @@ class StMonsterMonsterPage(Gtk.Box):
             name = self.module.project.get_string_provider().get_value(StringType.ITEM_NAMES, i)
             self.item_names[i] = f"{name} (#{i:04})"
         self._sprite_provider.reset()
-        self._portrait_provider.reset()
+        # Portraits are invalidated when they change, so they can stay loaded when switching between monsters.
+        self._portrait_provider.release_pins()
+        # The monsters next to this one are likely opened next.
+        self._portrait_provider.prefetch(
+            [entry_id for entry_id in (self.entry.md_index - 2, self.entry.md_index) if entry_id >= 0], [0]
+        )
         self._init_language_labels()
         self._init_entid()
         self._init_stores()
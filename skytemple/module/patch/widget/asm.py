@@ -397,7 +397,8 @@ class StPatchAsmPage(Gtk.Box):
                 parameter_data = ParamDialogController(MainSkyTempleController.window()).run(
                     patch, patches[patch].parameters
                 )
-        self._patcher.apply(patch, parameter_data)
+        with self.module.project.direct_rom_access():
+            self._patcher.apply(patch, parameter_data)
 
     def _load_image_for_issue_dialog(self):
         img: Gtk.Image = Gtk.Image.new_from_file(os.path.join(data_dir(), IMG_SAD))
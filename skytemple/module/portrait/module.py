@@ -97,6 +97,7 @@ class PortraitModule(AbstractModule):
                 f(_("Failed importing portraits sheet:\n{err}")),
                 _("Could not import."),
             )
+        self._portrait_provider.invalidate(idx)
         # Mark as modified
         self.mark_as_modified()
 
@@ -14,7 +14,9 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+import logging
 import threading
+from collections.abc import Iterable
 
 import cairo
 from gi.repository import Gdk, GdkPixbuf, Gtk
@@ -23,11 +25,16 @@ from skytemple_files.common.types.file_types import FileType
 
 from skytemple.core.img_utils import pil_to_cairo_surface
 from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
+from skytemple.core.async_tasks.worker_pool import TaskPriority
+from skytemple.core.surface_cache import CacheStats, SurfaceCache, surface_size
 from skytemple_files.graphics.kao import KAO_IMG_METAPIXELS_DIM, KAO_IMG_IMG_DIM
 from skytemple_files.graphics.kao.protocol import KaoProtocol
 
 IMG_DIM = KAO_IMG_METAPIXELS_DIM * KAO_IMG_IMG_DIM
+# Portraits are small (~6 KiB), so this is enough for a few thousand of them.
+CACHE_BUDGET_BYTES = 16 * 1024 * 1024
 portrait_provider_lock = threading.RLock()
+logger = logging.getLogger(__name__)
 
 
 class PortraitProvider:
@@ -41,10 +48,12 @@ class PortraitProvider:
         self._loader_surface: cairo.ImageSurface | None = None
         self._error_surface: cairo.ImageSurface | None = None
 
-        self._loaded: dict[tuple[int, int], cairo.Surface] = {}
-        self._loaded__is_fallback: dict[tuple[int, int], bool] = {}
+        # Loaded portraits and whether they are the portrait of the base form (the fallback), by (entry_id, sub_id).
+        self._loaded: SurfaceCache[tuple[int, int], tuple[cairo.ImageSurface, bool]] = SurfaceCache(CACHE_BUDGET_BYTES)
 
-        self._requests: list[tuple[int, int]] = []
+        self._requests: set[tuple[int, int]] = set()
+        # Increased for a base form entry when it is invalidated, so results of loads still running are not used.
+        self._versions: dict[int, int] = {}
 
         # init_loader MUST be called next!
 
@@ -82,9 +91,31 @@ class PortraitProvider:
 
     def reset(self):
         with portrait_provider_lock:
-            self._loaded = {}
-            self._loaded__is_fallback = {}
-            self._requests = []
+            self._loaded.clear()
+            self._requests = set()
+
+    def invalidate(self, entry_id: int):
+        """
+        Forgets the loaded portraits of the entry, after they were changed.
+        This includes all entries using its portraits as a fallback.
+        """
+        base_id = self._base_id(entry_id)
+        with portrait_provider_lock:
+            self._loaded.remove_if(lambda key: self._base_id(key[0]) == base_id)
+            self._requests = {key for key in self._requests if self._base_id(key[0]) != base_id}
+            self._versions[base_id] = self._versions.get(base_id, 0) + 1
+
+    def release_pins(self):
+        """
+        Allows portraits that were used so far to be evicted from the cache again. Should be called when a view
+        is opened; the portraits the new view requests are pinned until the next call.
+        """
+        with portrait_provider_lock:
+            self._loaded.release_pins()
+
+    def cache_stats(self) -> CacheStats:
+        with portrait_provider_lock:
+            return self._loaded.stats()
 
     def get(
         self,
@@ -99,42 +130,108 @@ class PortraitProvider:
         If allow_fallback is set, the base form entry is loaded (% 600), when the portrait doesn't exist.
         """
         with portrait_provider_lock:
-            if (entry_id, sub_id) in self._loaded:
-                if allow_fallback or (not allow_fallback and not self._loaded__is_fallback[(entry_id, sub_id)]):
-                    return self._loaded[(entry_id, sub_id)]
+            loaded = self._loaded.get((entry_id, sub_id))
+            if loaded is not None:
+                surface, is_fallback = loaded
+                if allow_fallback or not is_fallback:
+                    return surface
                 else:
                     return self.get_error()
-            if (entry_id, sub_id) not in self._requests:
-                self._requests.append((entry_id, sub_id))
-                self._load(entry_id, sub_id, after_load_cb, allow_fallback)
+            self._request([(entry_id, sub_id)], after_load_cb, allow_fallback, TaskPriority.HIGH)
         return self.get_loader()
 
-    def _load(self, entry_id, sub_id, after_load_cb, allow_fallback):
-        AsyncTaskDelegator.run_task(self._load__impl(entry_id, sub_id, after_load_cb, allow_fallback))
-
-    async def _load__impl(self, entry_id, sub_id, after_load_cb, allow_fallback):
-        is_fallback = False
+    def prefetch(
+        self,
+        entry_ids: Iterable[int],
+        sub_ids: Iterable[int],
+        after_load_cb=lambda: None,
+        allow_fallback=True,
+        priority: TaskPriority = TaskPriority.PREFETCH,
+    ) -> bool:
+        """
+        Loads the portraits of all combinations of the entries and sub IDs in the background, in a single task.
+        after_load_cb is called once, after all of them were loaded. Portraits that are already loaded or being
+        loaded are skipped; if that leaves nothing to load, False is returned and after_load_cb is never called.
+        """
+        sub_ids = list(sub_ids)
+        with portrait_provider_lock:
+            return self._request(
+                [(entry_id, sub_id) for entry_id in entry_ids for sub_id in sub_ids],
+                after_load_cb,
+                allow_fallback,
+                priority,
+            )
+
+    def _request(self, keys: Iterable[tuple[int, int]], after_load_cb, allow_fallback, priority: TaskPriority) -> bool:
+        """Must be called with the portrait_provider_lock held."""
+        batch = []
+        for key in keys:
+            if key not in self._requests and key not in self._loaded:
+                self._requests.add(key)
+                batch.append((key, self._versions.get(self._base_id(key[0]), 0)))
+        if not batch:
+            return False
+        AsyncTaskDelegator.run_task(self._load_batch(batch, after_load_cb, allow_fallback), priority=priority)
+        return True
+
+    async def _load_batch(self, batch: list[tuple[tuple[int, int], int]], after_load_cb, allow_fallback):
         try:
-            kao = self._kao.get(entry_id, sub_id)
-            if kao is None:
-                if allow_fallback:
-                    is_fallback = True
-                    kao = self._kao.get(entry_id % FileType.MD.properties().num_entities, sub_id)
-                    if kao is None:
-                        raise RuntimeError()
-                else:
-                    raise RuntimeError()
-            portrait_pil = kao.get()
-            surf = pil_to_cairo_surface(portrait_pil.convert("RGBA"))
-            loaded = surf
-        except (RuntimeError, ValueError, OverflowError):
-            loaded = self.get_error()
+            for key, version in batch:
+                loaded = self._load(key[0], key[1], version, allow_fallback)
+                with portrait_provider_lock:
+                    if self._is_current(key[0], version):
+                        self._store(key, loaded)
+                        self._requests.discard(key)
+                await AsyncTaskDelegator.buffer()
+        finally:
+            # If the task was cancelled, the remaining portraits must be requested again.
+            with portrait_provider_lock:
+                self._requests.difference_update(key for key, version in batch if self._is_current(key[0], version))
+        AsyncTaskDelegator.run_on_main_thread(after_load_cb)
+
+    def _load(self, entry_id: int, sub_id: int, version: int, allow_fallback) -> tuple[cairo.ImageSurface, bool]:
+        try:
+            surface = self._decode(entry_id, sub_id, version)
+            if surface is not None:
+                return surface, False
+            if allow_fallback:
+                base_id = self._base_id(entry_id)
+                surface = self._decode(base_id, sub_id, version)
+                if surface is not None:
+                    return surface, True
+        except (RuntimeError, ValueError, OverflowError, IndexError) as e:
+            logger.warning(f"Error loading portrait {sub_id} of {entry_id}.", exc_info=e)
+        return self.get_error(), False
+
+    def _decode(self, entry_id: int, sub_id: int, version: int) -> cairo.ImageSurface | None:
+        """Decodes the portrait, or None if it doesn't exist. Portraits that are already loaded are reused."""
+        with portrait_provider_lock:
+            # Eg. the base form, after it was used as a fallback.
+            loaded = self._loaded.get((entry_id, sub_id))
+            if loaded is not None and not loaded[1] and loaded[0] is not self.get_error():
+                return loaded[0]
+        kao = self._kao.get(entry_id, sub_id)
+        if kao is None:
+            return None
+        surface = pil_to_cairo_surface(kao.get().convert("RGBA"))
         with portrait_provider_lock:
-            self._loaded[(entry_id, sub_id)] = loaded
-            self._loaded__is_fallback[(entry_id, sub_id)] = is_fallback
-            if (entry_id, sub_id) in self._requests:
-                self._requests.remove((entry_id, sub_id))
-        after_load_cb()
+            # Shared with requests for the entry itself (or other entries using it as a fallback).
+            if (entry_id, sub_id) not in self._loaded and self._is_current(entry_id, version):
+                self._store((entry_id, sub_id), (surface, False))
+        return surface
+
+    def _is_current(self, entry_id: int, version: int) -> bool:
+        """Whether the entry wasn't invalidated since the version. Must be called with the portrait_provider_lock held."""
+        return self._versions.get(self._base_id(entry_id), 0) == version
+
+    @staticmethod
+    def _base_id(entry_id: int) -> int:
+        """The entry of the base form, which the portraits of the entry fall back to."""
+        return entry_id % FileType.MD.properties().num_entities
+
+    def _store(self, key: tuple[int, int], loaded: tuple[cairo.ImageSurface, bool]):
+        """Must be called with the portrait_provider_lock held."""
+        self._loaded.put(key, loaded, surface_size(loaded[0]))
 
     def get_loader(self) -> cairo.ImageSurface:
         """
@@ -29,6 +29,7 @@ from skytemple_files.common.util import add_extension_if_missing
 from skytemple_files.graphics.kao import SUBENTRIES
 from skytemple_files.graphics.kao.sprite_bot_sheet import SpriteBotSheet
 from skytemple.controller.main import MainController
+from skytemple.core.async_tasks.worker_pool import TaskPriority
 from skytemple.core.error_handler import display_error
 from skytemple.core.message_dialog import SkyTempleMessageDialog
 from skytemple.core.ui_utils import add_dialog_png_filter, data_dir, safe_destroy
@@ -188,6 +189,8 @@ class StPortraitPortraitPage(Gtk.Box):
             draw = getattr(self, f"portrait_draw{gui_number}")
             self._draws.append(draw)
             draw.connect("draw", partial(self.on_draw, subindex))
+        self._portrait_provider.release_pins()
+        self._prefetch()
 
     @Gtk.Template.Callback()
     def on_self_destroy(self, *args):
@@ -234,7 +237,18 @@ class StPortraitPortraitPage(Gtk.Box):
         safe_destroy(self.image9)
 
     def re_render(self):
-        self._portrait_provider.reset()
+        self._portrait_provider.invalidate(self.item_data)
+        self._prefetch()
+        for draw in self._draws:
+            draw.queue_draw()
+
+    def _prefetch(self):
+        # Loads all portraits of the page in one go, instead of one by one when they are first drawn.
+        self._portrait_provider.prefetch(
+            [self.item_data], range(0, SUBENTRIES), self._queue_draws, False, TaskPriority.HIGH
+        )
+
+    def _queue_draws(self):
         for draw in self._draws:
             draw.queue_draw()
 
@@ -646,13 +646,14 @@ class Drawer:
         """Draws the sprite for an actor"""
         if actor.actor.entid == 0:
             sprite = self.sprite_provider.get_actor_placeholder(
-                actor.actor.id, assert_not_none(actor.pos.direction).id, self._redraw
+                actor.actor.id, assert_not_none(actor.pos.direction).id, self._redraw, all_directions=True
             )[0]
         else:
             sprite = self.sprite_provider.get_monster(
                 actor.actor.entid,
                 assert_not_none(actor.pos.direction).id,
                 lambda: GLib.idle_add(self._redraw),
+                all_directions=True,
             )[0]
         ctx.translate(x, y)
         ctx.set_source_surface(sprite)
@@ -31,6 +31,7 @@ from skytemple.core.events.manager import EventManager
 from skytemple.core.img_utils import pil_to_cairo_surface
 from skytemple.core.message_dialog import SkyTempleMessageDialog
 from skytemple.core.model_context import ModelContext
+from skytemple.core.surface_cache import ScaledSurfaceCache
 from skytemple_files.common.types.file_types import FileType
 from skytemple_files.container.bin_pack.model import BinPack
 from skytemple_files.graphics.chara_wan.model import WanFile
@@ -143,14 +144,11 @@ class StSpriteMonsterSpritePage(Gtk.Box):
             return True
         scale = 4
         sprite, x, y, w, h = self._get_sprite_anim()
-        ctx.scale(scale, scale)
-        ctx.set_source_surface(sprite)
-        ctx.get_source().set_filter(cairo.Filter.NEAREST)
+        ctx.set_source_surface(ScaledSurfaceCache.instance().get(sprite, scale))
         ctx.paint()
         ww, wh = widget.get_size_request()
         if ww < w or wh < h:
             widget.set_size_request(w * scale, h * scale)
-        ctx.scale(1 / scale, 1 / scale)
         return True
 
     def _zip_is_active(self):
@@ -54,6 +54,16 @@ class AnimationContext:
     def num_layers(self) -> int:
         return len(self.surfaces)
 
+    @property
+    def pal_ani_frame(self) -> int:
+        """The counter of palette animation frames. Use % with the number of frames of an element."""
+        return self._pal_counter
+
+    @property
+    def bpa_frame(self) -> int:
+        """The counter of BPA animation frames. Use % with the number of frames of an element."""
+        return self._bpa_counter
+
     def current(self) -> list[list[cairo.Surface]]:
         """Returns the surfaces for this frame"""
         if (self._pal_counter, self._bpa_counter) == self._current_cache_hash:
@@ -0,0 +1,184 @@
+"""Renders the surfaces of chunks the first time they are drawn."""
+
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable, Iterable, Sequence
+
+import cairo
+from gi.repository import GLib
+from skytemple_files.common.protocol import TilemapEntryProtocol
+
+from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
+from skytemple.core.async_tasks.worker_pool import TaskPriority
+from skytemple.core.surface_cache import CacheStats, SurfaceCache, surface_size
+
+# Enough for all frames of all chunks of most tilesets.
+CHUNK_CACHE_BUDGET_BYTES = 16 * 1024 * 1024
+logger = logging.getLogger(__name__)
+
+
+class ChunkSurfaceProvider:
+    """
+    Provides the surfaces of the chunks of a tileset for drawers. A chunk is rendered in the background the first
+    time it is requested; until then, ``get`` returns None and nothing should be drawn for it.
+
+    ``render`` returns all frames of a chunk, in the format of one element of the AnimationContext:
+    [palette_animation_frame][frame]. It is called from worker threads, so it must not modify the tileset.
+
+    The rendered chunks are kept in a cache with a limited size. Chunks requested since the last call to
+    ``release_pins`` are never evicted; drawers of the full map should call it at the start of each draw.
+    """
+
+    def __init__(
+        self,
+        number_of_chunks: int,
+        render: Callable[[int], list[list[cairo.ImageSurface]]],
+        after_load_cb: Callable[[], None] = lambda: None,
+        budget_bytes: int = CHUNK_CACHE_BUDGET_BYTES,
+    ):
+        self.number_of_chunks = number_of_chunks
+        self._render = render
+        self._after_load_cb = after_load_cb
+        self._lock = threading.Lock()
+        self._loaded: SurfaceCache[int, list[list[cairo.ImageSurface]]] = SurfaceCache(budget_bytes)
+        self._requests: set[int] = set()
+        # Chunks requested with get, that are not yet submitted for rendering.
+        self._pending: set[int] = set()
+        # Increased for a chunk when it is invalidated, so results of renders still running are not used.
+        self._versions: dict[int, int] = {}
+
+    def __len__(self):
+        return self.number_of_chunks
+
+    def get(self, chunk_idx: int, pal_ani_frame: int, bpa_frame: int = 0) -> cairo.ImageSurface | None:
+        """
+        Returns the surface of the chunk for the frame counters of the AnimationContext, or None if the chunk
+        is still being rendered.
+        """
+        with self._lock:
+            frames = self._loaded.get(chunk_idx)
+            if frames is None:
+                # Requested together with all other chunks drawn in this frame, once the draw is done.
+                if len(self._pending) < 1:
+                    GLib.idle_add(self._request_pending)
+                self._pending.add(chunk_idx)
+                return None
+        if len(frames) < 1:
+            # Failed to render.
+            return None
+        bpa_frames = frames[pal_ani_frame % len(frames)]
+        return bpa_frames[bpa_frame % len(bpa_frames)]
+
+    def prefetch(self, chunk_idxs: Iterable[int]) -> bool:
+        """Renders the chunks in the background, if they aren't already. Returns False if there was nothing to do."""
+        with self._lock:
+            return self._request(chunk_idxs, TaskPriority.PREFETCH)
+
+    def invalidate(self, chunk_idxs: Iterable[int]):
+        """Forgets the surfaces of the chunks after they were changed. They are rendered again when requested."""
+        with self._lock:
+            for chunk_idx in chunk_idxs:
+                self._loaded.remove(chunk_idx)
+                self._requests.discard(chunk_idx)
+                self._versions[chunk_idx] = self._versions.get(chunk_idx, 0) + 1
+
+    def invalidate_all(self):
+        self.invalidate(range(self.number_of_chunks))
+
+    def release_pins(self):
+        with self._lock:
+            self._loaded.release_pins()
+
+    def cache_stats(self) -> CacheStats:
+        with self._lock:
+            return self._loaded.stats()
+
+    def _request_pending(self):
+        with self._lock:
+            pending = sorted(self._pending)
+            self._pending = set()
+            self._request(pending, TaskPriority.HIGH)
+        return False
+
+    def _request(self, chunk_idxs: Iterable[int], priority: TaskPriority) -> bool:
+        """Must be called with the lock held."""
+        batch = []
+        for chunk_idx in chunk_idxs:
+            if not 0 <= chunk_idx < self.number_of_chunks:
+                continue
+            if chunk_idx not in self._requests and chunk_idx not in self._loaded:
+                self._requests.add(chunk_idx)
+                batch.append((chunk_idx, self._versions.get(chunk_idx, 0)))
+        if not batch:
+            return False
+        AsyncTaskDelegator.run_task(self._load_batch(batch), priority=priority)
+        return True
+
+    async def _load_batch(self, batch: list[tuple[int, int]]):
+        try:
+            for chunk_idx, version in batch:
+                try:
+                    frames = self._render(chunk_idx)
+                except (RuntimeError, ValueError, IndexError) as e:
+                    logger.warning(f"Error rendering chunk {chunk_idx}.", exc_info=e)
+                    frames = []
+                with self._lock:
+                    if self._versions.get(chunk_idx, 0) == version:
+                        size = sum(surface_size(surface) for bpa_frames in frames for surface in bpa_frames)
+                        self._loaded.put(chunk_idx, frames, size)
+                        self._requests.discard(chunk_idx)
+                await AsyncTaskDelegator.buffer()
+        finally:
+            # If the task was cancelled, the remaining chunks must be requested again.
+            with self._lock:
+                self._requests.difference_update(
+                    chunk_idx for chunk_idx, version in batch if self._versions.get(chunk_idx, 0) == version
+                )
+        AsyncTaskDelegator.run_on_main_thread(self._after_load_cb)
+
+
+def chunk_mappings(mappings: Sequence[TilemapEntryProtocol], tiles_per_chunk: int) -> list[tuple[int, ...]]:
+    """
+    The tile mappings of each chunk as integers. Taken before and after an edit, to find the chunks
+    that changed with changed_chunks.
+    """
+    ints = [mapping.to_int() for mapping in mappings]
+    return [tuple(ints[i : i + tiles_per_chunk]) for i in range(0, len(ints), tiles_per_chunk)]
+
+
+def changed_chunks(old: Sequence[tuple[int, ...]], new: Sequence[tuple[int, ...]]) -> list[int] | None:
+    """The indices of the chunks that differ, or None if the number of chunks changed."""
+    if len(old) != len(new):
+        return None
+    return [i for i, (old_chunk, new_chunk) in enumerate(zip(old, new)) if old_chunk != new_chunk]
+
+
+def chunks_using_palettes(
+    mappings: Sequence[TilemapEntryProtocol], tiles_per_chunk: int, pal_idxs: Iterable[int]
+) -> list[int]:
+    """The indices of the chunks with tiles that use one of the palettes."""
+    pal_idxs = set(pal_idxs)
+    return sorted({i // tiles_per_chunk for i, mapping in enumerate(mappings) if mapping.pal_idx in pal_idxs})
+
+
+def changed_palettes(old: Sequence[Sequence[int]], new: Sequence[Sequence[int]]) -> list[int]:
+    """The indices of the palettes that differ. Palettes that only exist in one of both count as changed."""
+    return [i for i in range(max(len(old), len(new))) if i >= len(old) or i >= len(new) or list(old[i]) != list(new[i])]